@@ -2,28 +2,101 @@ import os
 import time
 from glob import glob
 import datetime
+import inspect
 from typing import Literal
 
 import numpy as np
-from scipy.stats import gmean
 import pandas as pd
+import pyarrow.parquet as pq
 
 from utils import *
+from core.snapshot_store import SnapshotStore, META_FILE
+from core.manifest import list_versions
+from core.cache import FrameCache, make_cache_key
+from core.history import load_history_panel
+from core.asof import AsOfIndex
+from core.estimates import EstimatesMatrix
+from core.valuation import PERIODS, compute_valuations
+from core.dcf import make_dcf_inputs, dcf_grid
+from core.factors import make_factors
+from core.screener import Screener, Filter
+from core.ohlcv_panel import OhlcvPanel, PANEL_INDEX_FILE
+from core.indicators import compute_indicators
+
+# 테이블별 날짜 index 이름 (load_table의 start, end 조건에 사용)
+_DATE_LEVELS = {
+    "income_statement": "As Of Date",
+    "income_statement_quarter": "As Of Date",
+    "balance_sheet": "As Of Date",
+    "balance_sheet_quarter": "As Of Date",
+    "cash_flow": "As Of Date",
+    "cash_flow_quarter": "As Of Date",
+    "estimates": "Fiscal Period",
+    "ohlcv": "Date",
+}
+
+# 파생 테이블(stocks_df, sectors_df, industries_df, valuation_df)을 만드는 데 쓰이는 테이블과 코드
+_CACHE_SOURCES = ["info", "estimates", "ohlcv"]
+_CACHE_CODE_FILES = [os.path.abspath(__file__)] + [
+    inspect.getfile(obj) for obj in (AsOfIndex, EstimatesMatrix, compute_valuations)
+]
+_FACTOR_SOURCES = ["income_statement_quarter", "balance_sheet_quarter", "cash_flow_quarter", "info"]
+_FACTOR_CODE_FILES = [inspect.getfile(make_factors)]
+_CACHE_DIR = "_cache"
+
+
+class _LazyTable:
+    # 처음 접근할 때 테이블 전체를 읽어서 인스턴스에 캐시 (이후에는 인스턴스 속성이 바로 쓰임)
+    def __init__(self, sort_index: bool = False):
+        self.sort_index = sort_index
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        df = obj._read_table(self.name)
+        if self.sort_index:
+            df = df.sort_index()
+        obj.__dict__[self.name] = df
+        return df
 
 
 class Database:
     # TODO: fundamental 점수 측정 알고리즘 개발
-    # TODO: 차트 분석 알고리즘 개발(%b, 과거 대비 거래량 증가, 거래대금 증가율 대비 주가 상승률)
-    def __init__(self, load_dir: str | None = None, load_ohlcv: bool = False):
+    info = _LazyTable()
+    income_statement = _LazyTable()
+    income_statement_quarter = _LazyTable()
+    balance_sheet = _LazyTable()
+    balance_sheet_quarter = _LazyTable()
+    cash_flow = _LazyTable()
+    cash_flow_quarter = _LazyTable()
+    estimates = _LazyTable(sort_index=True)
+    ohlcv = _LazyTable()
+
+    def __init__(
+        self,
+        load_dir: str | None = None,
+        load_ohlcv: bool = False,
+        store: SnapshotStore | str | None = None,
+        use_cache: bool = True,
+    ):
+        # store: 버전별 변경분만 저장한 SnapshotStore(또는 그 경로)에서 읽을 때 사용
+        # use_cache: 파생 테이블을 디스크에 캐시해서 다음 실행 때 다시 계산하지 않음
         nation = "usa" # usa, kor
         root = f"DB/{nation}"
-        if load_dir is None:
-            version_list = [f for f in os.listdir(root) if os.path.isdir(f"{root}/{f}")]
-            self.version = max(version_list)  # get latest file
+        self.store = SnapshotStore(store) if isinstance(store, str) else store
+        if load_dir is None and self.store is not None:
+            self.version = self.store.versions[-1]
+            print(f"Loading database from {self.version} (snapshot store)...")
+        elif load_dir is None:
+            self.version = list_versions(root)[-1]  # get latest version
             print(f"Loading database from {self.version}...")
             load_dir = f"{root}/{self.version}"
         else:
-            self.version = os.path.basename(load_dir)
+            self.version = os.path.basename(os.path.normpath(load_dir))
+        self.load_dir = load_dir
 
         self._dt_version = datetime.datetime.strptime(self.version, "%y%m%d")
         self._dt_today = datetime.datetime.today()
@@ -31,27 +104,222 @@ class Database:
         # check version format is like yymmdd
         assert len(self.version) == 6 and self.version.isdigit(), "Version format must be yymmdd."
 
-        self.info = pd.read_parquet(f"{load_dir}/info.parquet")
-        self.income_statement = pd.read_parquet(f"{load_dir}/income_statement.parquet")
-        self.income_statement_quarter = pd.read_parquet(f"{load_dir}/income_statement_quarter.parquet")
-        self.balance_sheet = pd.read_parquet(f"{load_dir}/balance_sheet.parquet")
-        self.balance_sheet_quarter = pd.read_parquet(f"{load_dir}/balance_sheet_quarter.parquet")
-        self.cash_flow = pd.read_parquet(f"{load_dir}/cash_flow.parquet")
-        self.cash_flow_quarter = pd.read_parquet(f"{load_dir}/cash_flow_quarter.parquet")
-        self.estimates = pd.read_parquet(f"{load_dir}/estimates.parquet").sort_index()
-        if load_ohlcv:
-            self.ohlcv = pd.read_parquet(f"{load_dir}/ohlcv.parquet")
-        else:
+        # 테이블(info, income_statement, ..., ohlcv)과 아래 파생 테이블은 처음 접근할 때 만들어짐
+        if not load_ohlcv:
             self.ohlcv = None
-
-        self.sector_list = self.info["Sector"].replace("", None).dropna().unique().tolist()
-        self.industry_list = self.info["Industry"].replace("", None).dropna().unique().tolist()
-
-        self.stocks_df, self.sectors_df, self.industries_df = self._make_stocks_and_sectors()
-        self.valuation_df = self.stocks_df[["Sector", "Industry", "Long Business Summary", "Market Cap", "Price"]].copy()
-
-        self.calc_simple_fper_valuation(forward=0)
-        self.calc_fpegr_valuation(forward=0)  # default: this year
+        self._stocks_df = None
+        self._sectors_df = None
+        self._industries_df = None
+        self._valuation_df = None
+        self._asof_index = None
+        self._version_bars = None
+        self._estimates_matrix = None
+        self._factors_df = None
+        self._screener = None
+        self._ohlcv_panel = None
+        self._use_cache = use_cache
+        self._cache = self._make_cache("derived", _CACHE_SOURCES, _CACHE_CODE_FILES) if use_cache else None
+        self._factors_cache = self._make_cache("factors", _FACTOR_SOURCES, _FACTOR_CODE_FILES) if use_cache else None
+
+    def _make_cache(self, name: str, sources: list[str], code_files: list[str]) -> FrameCache:
+        # 원본 파일이 다시 저장되거나 계산 코드가 바뀌면 key가 달라져서 다시 만듦
+        if self.store is not None:
+            cache_root = os.path.join(self.store.root, _CACHE_DIR, self.version, name)
+            source_paths = [os.path.join(self.store.root, META_FILE)]
+        else:
+            cache_root = os.path.join(self.load_dir, _CACHE_DIR, name)
+            source_paths = [f"{self.load_dir}/{source}.parquet" for source in sources]
+            source_paths = [path for path in source_paths if os.path.exists(path)]
+        return FrameCache(cache_root, make_cache_key(self.version, source_paths, code_files))
+
+    @property
+    def sector_list(self):
+        return self.info["Sector"].replace("", None).dropna().unique().tolist()
+
+    @property
+    def industry_list(self):
+        return self.info["Industry"].replace("", None).dropna().unique().tolist()
+
+    @property
+    def stocks_df(self):
+        if self._stocks_df is None:
+            names = ["stocks_df", "sectors_df", "industries_df"]
+            frames = self._cache.load_many(*names) if self._cache is not None else None
+            if frames is None:
+                if self.__dict__.get("ohlcv", 0) is None:
+                    del self.ohlcv  # 캐시가 없으면 가격 계산에 ohlcv가 필요하므로 읽도록 함
+                frames = self._make_stocks_and_sectors()
+                if self._cache is not None:
+                    for name, df in zip(names, frames):
+                        self._cache.save(name, df)
+            self._stocks_df, self._sectors_df, self._industries_df = frames
+        return self._stocks_df
+
+    @property
+    def sectors_df(self):
+        if self._sectors_df is None:
+            self.stocks_df
+        return self._sectors_df
+
+    @property
+    def industries_df(self):
+        if self._industries_df is None:
+            self.stocks_df
+        return self._industries_df
+
+    @property
+    def valuation_df(self):
+        if self._valuation_df is None:
+            if self._cache is not None:
+                self._valuation_df = self._cache.load("valuation_df")
+            if self._valuation_df is None:
+                self._valuation_df = self.stocks_df[
+                    ["Sector", "Industry", "Long Business Summary", "Market Cap", "Price"]
+                ].copy()
+                self.calc_valuations(["Forward PER", "Forward PEGR"], forwards=[0])  # default: this year
+                if self._cache is not None:
+                    self._cache.save("valuation_df", self._valuation_df)
+        return self._valuation_df
+
+    @property
+    def factors_df(self):
+        # 분기 재무제표 TTM 기반 factor (ROIC, FCF Yield, margin 등, core.factors.make_factors 참고)
+        if self._factors_df is None:
+            if self._factors_cache is not None:
+                self._factors_df = self._factors_cache.load("factors_df")
+            if self._factors_df is None:
+                self._factors_df = make_factors(
+                    self.income_statement_quarter, self.balance_sheet_quarter, self.cash_flow_quarter, self.info
+                )
+                if self._factors_cache is not None:
+                    self._factors_cache.save("factors_df", self._factors_df)
+        return self._factors_df
+
+    @property
+    def screener(self) -> Screener:
+        # stocks_df + valuation_df (+ 분기 재무제표가 있으면 factors_df)의 순위/백분위를 미리 계산한 screener
+        if self._screener is None:
+            frame = self.stocks_df.join(self.valuation_df[self.valuation_df.columns.difference(self.stocks_df.columns)])
+            if all(self._has_table(name) for name in _FACTOR_SOURCES):
+                frame = frame.join(self.factors_df[self.factors_df.columns.difference(frame.columns)])
+            self._screener = Screener(frame)
+        return self._screener
+
+    def screen(
+        self,
+        filters: list[Filter],
+        columns: list[str] | None = None,
+        sort_by: str | None = None,
+        ascending: bool = False,
+    ) -> pd.DataFrame:
+        # e.g. db.screen([Between("Market Cap", min=1e9), Percentile("Forward PER (This Year)", max=0.3, group="Sector")])
+        return self.screener.screen(filters, columns, sort_by, ascending)
+
+    def _has_table(self, name: str) -> bool:
+        if self.store is not None:
+            return name in self.store.keys(self.version)
+        return os.path.exists(f"{self.load_dir}/{name}.parquet")
+
+    def _read_table(self, name: str, columns: list[str] | None = None, filters: list[tuple] | None = None):
+        if self.store is not None:
+            return self.store.read(name, self.version, columns=columns, filters=filters)
+        path = f"{self.load_dir}/{name}.parquet"
+        if filters is not None:
+            filters = adapt_parquet_filters(filters, pq.read_schema(path))
+        return pd.read_parquet(path, columns=columns, filters=filters)
+
+    def load_table(
+        self,
+        name: str,
+        columns: list[str] | None = None,
+        tickers: str | list[str] | None = None,
+        start: str | datetime.date | None = None,
+        end: str | datetime.date | None = None,
+    ) -> pd.DataFrame:
+        """
+        테이블에서 필요한 부분만 읽습니다. 컬럼 선택과 티커/날짜 조건은 parquet reader에서 처리하므로
+        전체 테이블을 읽지 않습니다. (이미 전체를 읽은 테이블은 메모리에서 잘라냄)
+
+        Args:
+            name: 테이블 이름입니다. (e.g. "balance_sheet", "ohlcv")
+            columns: 읽을 컬럼입니다. None이면 전체입니다.
+            tickers: 읽을 티커입니다. None이면 전체입니다.
+            start, end: 날짜 index(As Of Date, Fiscal Period, Date)의 범위입니다. (양 끝 포함)
+
+        Returns:
+            조건에 맞는 DataFrame입니다.
+        """
+        if isinstance(tickers, str):
+            tickers = [tickers]
+        date_level = _DATE_LEVELS.get(name)
+        if (start is not None or end is not None) and date_level is None:
+            raise ValueError(f"'{name}' has no date index.")
+
+        if self.__dict__.get(name) is not None:
+            df = self.__dict__[name]
+            mask = np.ones(len(df), dtype=bool)
+            if tickers is not None:
+                mask &= df.index.get_level_values("Ticker").isin(tickers)
+            if start is not None or end is not None:
+                dates = pd.to_datetime(df.index.get_level_values(date_level))
+                if start is not None:
+                    mask &= dates >= _align_timestamp(start, dates)
+                if end is not None:
+                    mask &= dates <= _align_timestamp(end, dates)
+            df = df[mask]
+            return df if columns is None else df[columns]
+
+        filters = []
+        if tickers is not None:
+            filters.append(("Ticker", "in", list(tickers)))
+        if start is not None:
+            filters.append((date_level, ">=", start))
+        if end is not None:
+            filters.append((date_level, "<=", end))
+        df = self._read_table(name, columns=columns, filters=filters or None)
+        return df.sort_index() if name == "estimates" else df
+
+    def load_history(
+        self,
+        columns: list[str] | None = None,
+        info_columns: list[str] | None = ("Sector", "Industry"),
+        start: str | None = None,
+        end: str | None = None,
+        max_workers: int = 8,
+    ) -> pd.DataFrame:
+        """
+        start ~ end 버전(yymmdd, 양 끝 포함)의 estimates를 (Version, Ticker, Fiscal Period) panel로 읽습니다.
+        revision_trend, revision_breadth(core.history)로 추정치 변화를 계산할 수 있습니다.
+
+        Args:
+            columns: 읽을 estimates 컬럼입니다. None이면 전체입니다.
+            info_columns: 버전별로 티커에 붙일 info 컬럼입니다.
+            start, end: 버전 범위입니다. end가 None이면 현재 버전까지입니다.
+            max_workers: 버전을 동시에 읽을 thread 수입니다.
+
+        Returns:
+            (Version, Ticker, Fiscal Period) index의 DataFrame입니다.
+        """
+        end = self.version if end is None else end
+        if self.store is not None:
+            versions = self.store.versions
+            read_table = lambda v, name, cols: self.store.read(name, v, columns=cols)
+        else:
+            root = os.path.dirname(os.path.normpath(self.load_dir))
+            versions = [
+                f for f in os.listdir(root)
+                if len(f) == 6 and f.isdigit() and os.path.exists(f"{root}/{f}/estimates.parquet")
+            ]
+
+            def read_table(version: str, name: str, cols: list[str] | None) -> pd.DataFrame:
+                path = f"{root}/{version}/{name}.parquet"
+                if cols is not None:
+                    names = pq.read_schema(path).names  # 예전 버전에 없는 컬럼은 빼고 읽음
+                    cols = [c for c in cols if c in names]
+                return pd.read_parquet(path, columns=cols)
+        versions = [v for v in versions if (start is None or v >= start) and v <= end]
+        info_columns = list(info_columns) if info_columns else None
+        return load_history_panel(read_table, versions, columns, info_columns, max_workers)
 
     def _make_stocks_and_sectors(self):
         stocks_df = self.info.copy()
@@ -101,52 +369,130 @@ class Database:
 
         return stocks_df, sectors_df, industries_df
     
+    def get_valuation_inputs(self, forward: Literal[0, 1] = 0) -> dict[str, np.ndarray]:
+        # stocks_df 순서로 맞춘 valuation 모델 입력값
+        to_float = lambda s: pd.to_numeric(s.replace("", np.nan), errors="coerce").to_numpy(dtype=float)
+        period = PERIODS[forward]
+        stocks_df = self.stocks_df
+        return {
+            "Price": to_float(stocks_df["Price"]),
+            "Market Cap": to_float(stocks_df["Market Cap"]),
+            "Enterprise Value": to_float(stocks_df["Enterprise Value"]),
+            "Shares Outstanding": to_float(stocks_df["Shares Outstanding"]),
+            "EPS": to_float(stocks_df[f"Forward EPS {period}"]),
+            "EPS Growth": to_float(stocks_df["Forward EPS Growth (CAGR)"]),
+            "Sales": to_float(self.get_forward_sales(forward).reindex(stocks_df.index)),
+        }
+
+    def calc_valuations(
+        self,
+        models: list[str] | None = None,
+        forwards: list[int] = (0, 1),
+        peer: Literal["Sector", "Industry"] | pd.Series = "Sector",
+    ) -> pd.DataFrame:
+        """
+        valuation 모델(core.valuation.VALUATION_MODELS)들의 적정 주가를 한 번에 계산해서 valuation_df에 추가합니다.
+
+        Args:
+            models: 모델 이름입니다. (e.g. ["Forward PER", "Forward PSR"]) None이면 등록된 모델 전체입니다.
+            forwards: 0 = this year, 1 = next year
+            peer: 중앙값 배수를 구할 peer 그룹입니다. "Sector", "Industry" 또는 티커별 그룹 Series입니다.
+                Sector가 아니면 컬럼 이름 뒤에 " [<그룹 이름>]"이 붙습니다.
+
+        Returns:
+            계산한 적정 주가 컬럼들입니다.
+        """
+        if isinstance(peer, str):
+            groups = self.stocks_df[peer]
+        else:
+            groups = peer.reindex(self.stocks_df.index)
+        name = groups.name if groups.name else "Custom"
+        suffix = "" if name == "Sector" else f" [{name}]"
+        inputs = {forward: self.get_valuation_inputs(forward) for forward in forwards}
+        fair_prices = compute_valuations(inputs, groups, models, suffix)
+        self.valuation_df[fair_prices.columns] = fair_prices
+        self._screener = None  # 새 컬럼을 포함하도록 다시 만듦
+        return fair_prices
+
     def calc_simple_fper_valuation(self, forward: Literal[0, 1] = 1):
         # forward: 0 = this year, 1 = next year
-        period = "(This Year)" if forward == 0 else "(Next Year)"
-        if f"Forward PER Fair Price {period}" in self.valuation_df.columns:
-            return self.valuation_df[f"Forward PER Fair Price {period}"]
-        else:
-            forward_eps = self.stocks_df[f"Forward EPS {period}"]
-            sector_forward_per = self.stocks_df.join(self.sectors_df, on="Sector")[f"Sector Forward PER {period}"]
-            fair_price = sector_forward_per * forward_eps
-            fair_price.name = f"Forward PER Fair Price {period}"
-            self.valuation_df[f"Forward PER Fair Price {period}"] = fair_price
-            return fair_price
+        column = f"Forward PER Fair Price {PERIODS[forward]}"
+        if column not in self.valuation_df.columns:
+            self.calc_valuations(["Forward PER"], [forward])
+        return self.valuation_df[column]
 
     def calc_fpegr_valuation(self, forward: Literal[0, 1] = 1):
         # forward: 0 = this year, 1 = next year
-        period = "(This Year)" if forward == 0 else "(Next Year)"
-        if f"Forward PEGR Fair Price {period}" in self.valuation_df.columns:
-            return self.valuation_df[f"Forward PEGR Fair Price {period}"]
-        else:
-            forward_eps = self.stocks_df[f"Forward EPS {period}"]
-            sector_forward_pegr = self.stocks_df.join(self.sectors_df, on="Sector")[f"Sector Forward PEGR {period}"]
-            eps_growth_pct = self.stocks_df["Forward EPS Growth (CAGR)"] * 100
-            positive_eps_growth_pct = eps_growth_pct.where(eps_growth_pct > 0)
-            fair_per = sector_forward_pegr * positive_eps_growth_pct
-            fair_price = (fair_per / forward_eps) * self.stocks_df["Price"]
-            fair_price.name = f"Forward PEGR Fair Price {period}"
-            self.valuation_df[f"Forward PEGR Fair Price {period}"] = fair_price
-            return fair_price
-
-    def _select_ohlcv(self, target_date: pd.Timestamp):
-        return self.ohlcv.xs(target_date, level="Date")
+        column = f"Forward PEGR Fair Price {PERIODS[forward]}"
+        if column not in self.valuation_df.columns:
+            self.calc_valuations(["Forward PEGR"], [forward])
+        return self.valuation_df[column]
+
+    def calc_dcf(
+        self,
+        discount_rates: list[float] = (0.08, 0.09, 0.10, 0.11, 0.12),
+        terminal_growths: list[float] = (0.01, 0.02, 0.03),
+        margin_scales: list[float] = (0.8, 1.0, 1.2),
+        years: int = 5,
+    ) -> pd.DataFrame:
+        # 모든 티커 x 시나리오의 DCF 주당 내재가치 (core.dcf.dcf_grid 참고), 첫해 매출 성장률은 Sales 추정치 CAGR 사용
+        inputs = make_dcf_inputs(
+            self.cash_flow,
+            self.cash_flow_quarter,
+            self.income_statement,
+            self.info,
+            growth=self.get_forward_sales_growth_rate("cagr"),
+        )
+        return dcf_grid(inputs, discount_rates, terminal_growths, margin_scales, years, prices=self.stocks_df["Price"])
+
+    @property
+    def asof_index(self) -> AsOfIndex:
+        if self._asof_index is None:
+            self._asof_index = AsOfIndex(self.ohlcv)
+        return self._asof_index
+
+    def get_ohlcv_asof(self, dates, columns: list[str] | None = None, max_lag: str | None = None) -> pd.DataFrame:
+        # 티커별로 dates(하나 또는 여러 개) 이전(포함) 마지막 거래일의 Close, Volume, Trading Value
+        return self.asof_index.lookup(dates, columns=columns, max_lag=max_lag)
+
+    @property
+    def ohlcv_panel(self) -> OhlcvPanel:
+        # ohlcv를 (티커 x 날짜 x 필드) 배열로 펼친 panel (차트 지표 계산용)
+        # use_cache면 float32 memory map 파일(_cache/ohlcv_panel)로 만들어 두고 열기만 함.
+        # 이 panel은 다른 프로세스로 넘겨도 경로만 전달되어 같은 파일을 공유함 (core.backtest.sweep 등)
+        if self._ohlcv_panel is None:
+            cache = self._make_cache("ohlcv_panel", ["ohlcv"], [inspect.getfile(OhlcvPanel)]) if self._use_cache else None
+            path = None if cache is None else os.path.join(cache.dir, "panel")
+            if path is not None and os.path.exists(os.path.join(path, PANEL_INDEX_FILE)):
+                self._ohlcv_panel = OhlcvPanel.open(path)
+            else:
+                if self.__dict__.get("ohlcv", 0) is None:
+                    del self.ohlcv
+                if cache is not None:
+                    cache.prepare()
+                self._ohlcv_panel = OhlcvPanel.from_frame(self.ohlcv, path=path)
+        return self._ohlcv_panel
+
+    def calc_indicators(self, start=None, end=None, **kwargs) -> pd.DataFrame:
+        # start ~ end 구간의 마지막 날짜 기준 차트 지표 (%b, 이격도, 거래량/거래대금 비율, ATR 등, core.indicators 참고)
+        panel = self.ohlcv_panel.slice_dates(start, end)
+        return panel.last(compute_indicators(panel, **kwargs))
+
+    def _get_version_bars(self) -> pd.DataFrame:
+        # 버전 날짜 당일 데이터는 장중 값일 수 있으므로 그 전날까지의 마지막 거래일 사용
+        if self._version_bars is None:
+            as_of = pd.Timestamp(self._dt_version) - pd.Timedelta(1, unit="ns")
+            self._version_bars = self.get_ohlcv_asof(as_of)
+        return self._version_bars
 
     def get_prices(self):
-        dates = self.ohlcv.index.get_level_values("Date")
-        target_date = find_closest_before_date(dates, self.version, strptime_fmt='%y%m%d')
-        return self._select_ohlcv(target_date).loc[:, "Close"]
+        return self._get_version_bars()["Close"]
 
     def get_volumes(self):
-        dates = self.ohlcv.index.get_level_values("Date")
-        target_date = find_closest_before_date(dates, self.version, strptime_fmt='%y%m%d')
-        return self._select_ohlcv(target_date).loc[:, "Volume"]
+        return self._get_version_bars()["Volume"]
 
     def get_trading_values(self):
-        dates = self.ohlcv.index.get_level_values("Date")
-        target_date = find_closest_before_date(dates, self.version, strptime_fmt='%y%m%d')
-        return self._select_ohlcv(target_date).loc[:, "Trading Value"]
+        return self._get_version_bars()["Trading Value"]
 
     def get_basic_eps(self, before: int = None):
         # before: 1 = last year, 2 = 2 year ago ...
@@ -157,34 +503,36 @@ class Database:
         eps = income_statement["Basic EPS"]
         return eps
     
+    @property
+    def estimates_matrix(self) -> EstimatesMatrix:
+        if self._estimates_matrix is None:
+            self._estimates_matrix = EstimatesMatrix(self.estimates)
+        return self._estimates_matrix
+
     def get_forward_eps(self, forward: int = None):
         # forward: 0 = this year, 1 = next year
-        forward_eps = self.estimates["EPS Estimate"]
         if isinstance(forward, int):
-            forward_eps = forward_eps.groupby("Ticker").nth(forward).droplevel(1)
-        return forward_eps
+            return self.estimates_matrix.aggregate("EPS Estimate", forward)
+        return self.estimates["EPS Estimate"]
 
     def get_forward_eps_growth_rate(self, return_type: str = None):
         # return_type: 0(this), 1(next), "mean", "max", "min", "cagr", "gmean"
-        eps_growth = self.estimates["EPS YoY Growth"]
         if return_type is None:
-            return eps_growth
-        elif return_type == "this" or return_type == 0:
-            eps_growth = eps_growth.groupby("Ticker").nth(0).droplevel(1)
-        elif return_type == "next" or return_type == 1:
-            eps_growth = eps_growth.groupby("Ticker").nth(1).droplevel(1)
-        elif return_type.lower() == "mean":
-            eps_growth = eps_growth.groupby("Ticker").mean()
-        elif return_type.lower() == "max":
-            eps_growth = eps_growth.groupby("Ticker").max()
-        elif return_type.lower() == "min":
-            eps_growth = eps_growth.groupby("Ticker").min()
-        elif return_type.lower() == "cagr" or return_type.lower() == "gmean":
-            eps_growth = eps_growth.groupby("Ticker").apply(lambda x: gmean(x + 1) - 1)
-        else:
-            raise ValueError("growth_agg must be 'mean', 'cagr', 'max' or 'min'.")
-        return eps_growth
-    
+            return self.estimates["EPS YoY Growth"]
+        return self.estimates_matrix.aggregate("EPS YoY Growth", return_type)
+
+    def get_forward_sales(self, forward: int = None):
+        # forward: 0 = this year, 1 = next year
+        if isinstance(forward, int):
+            return self.estimates_matrix.aggregate("Sales Estimate", forward)
+        return self.estimates["Sales Estimate"]
+
+    def get_forward_sales_growth_rate(self, return_type: str = None):
+        # return_type: 0(this), 1(next), "mean", "max", "min", "cagr", "gmean"
+        if return_type is None:
+            return self.estimates["Sales YoY Growth"]
+        return self.estimates_matrix.aggregate("Sales YoY Growth", return_type)
+
     def get_tickers_from_sector(self, sector: str | None = None):
         if sector is None:
             return self.info.index.tolist()
@@ -212,6 +560,14 @@ class Database:
         return self.get_tickers_from_industry(industry)
 
 
+def _align_timestamp(value, dates: pd.DatetimeIndex) -> pd.Timestamp:
+    # 비교 대상 날짜와 timezone을 맞춤
+    ts = pd.Timestamp(value)
+    if dates.tz is not None and ts.tz is None:
+        ts = ts.tz_localize(dates.tz)
+    return ts
+
+
 # class Analyzer:
 #     def __init__(self, data_path: str | None = None) -> None:
 #         self._db = Database(data_path)
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+
+ASOF_COLUMNS = ["Close", "Volume", "Trading Value"]
+
+
+class AsOfIndex:
+    """
+    ohlcv에서 티커별로 "기준일 이전(포함) 마지막 거래일"의 값을 찾는 index입니다.
+
+    Close가 있는 행만 (티커, 날짜) 순으로 정렬해 두고, (티커 번호 * 날짜 수 + 날짜 순위)를 key로 사용해서
+    모든 티커와 여러 기준일을 searchsorted 한 번으로 찾습니다. 기준일에 거래가 없는 티커도 직전 거래일 값을 사용합니다.
+    """
+    def __init__(self, ohlcv: pd.DataFrame, columns: list[str] | None = None):
+        columns = ASOF_COLUMNS if columns is None else columns
+        ohlcv = ohlcv[ohlcv["Close"].notna()]
+        tickers = ohlcv.index.get_level_values("Ticker")
+        dates = pd.DatetimeIndex(ohlcv.index.get_level_values("Date"))
+
+        ticker_codes, self.tickers = pd.factorize(tickers, sort=True)
+        self.tz = dates.tz
+        date_ns = dates.as_unit("ns").asi8
+        self._dates = np.unique(date_ns)
+        date_ranks = np.searchsorted(self._dates, date_ns)
+        keys = ticker_codes.astype(np.int64) * (len(self._dates) + 1) + date_ranks
+
+        order = np.argsort(keys, kind="stable")
+        self._keys = keys[order]
+        self._codes = ticker_codes[order]
+        self._date_ns = date_ns[order]
+        self._values = {col: ohlcv[col].to_numpy()[order] for col in columns}
+        self.columns = list(columns)
+
+    def _to_ns(self, dates) -> np.ndarray:
+        dates = pd.DatetimeIndex(pd.to_datetime(dates))
+        if self.tz is not None and dates.tz is None:
+            dates = dates.tz_localize(self.tz)
+        elif self.tz is None and dates.tz is not None:
+            dates = dates.tz_localize(None)
+        return dates.as_unit("ns").asi8
+
+    def _from_ns(self, date_ns: np.ndarray) -> pd.DatetimeIndex:
+        dates = pd.DatetimeIndex(date_ns.view("datetime64[ns]"))
+        return dates.tz_localize("UTC").tz_convert(self.tz) if self.tz is not None else dates
+
+    def _positions(self, date_ns: np.ndarray, max_lag: pd.Timedelta | None) -> np.ndarray:
+        # (기준일 수, 티커 수) 위치 행렬. 해당하는 행이 없으면 -1
+        n_dates = len(self._dates) + 1
+        date_ranks = np.searchsorted(self._dates, date_ns, side="right")  # 기준일 이전(포함) 날짜 수
+        codes = np.arange(len(self.tickers), dtype=np.int64)
+        targets = codes[None, :] * n_dates + date_ranks[:, None]
+        pos = np.searchsorted(self._keys, targets, side="left") - 1
+        valid = pos >= 0
+        valid[valid] = self._codes[pos[valid]] == np.broadcast_to(codes, pos.shape)[valid]
+        if max_lag is not None:
+            lag = date_ns[:, None] - self._date_ns[np.where(valid, pos, 0)]
+            valid &= lag <= pd.Timedelta(max_lag).value
+        return np.where(valid, pos, -1)
+
+    def lookup(
+        self,
+        dates,
+        columns: list[str] | None = None,
+        max_lag: str | pd.Timedelta | None = None,
+    ) -> pd.DataFrame:
+        """
+        Args:
+            dates: 기준일 하나 또는 여러 개입니다. tz가 없으면 ohlcv의 tz로 간주합니다.
+            columns: 반환할 컬럼입니다. None이면 index를 만들 때 지정한 컬럼 전체입니다.
+            max_lag: 마지막 거래일이 기준일보다 이만큼 넘게 오래되었으면 NaN으로 둡니다. (e.g. "7D")
+
+        Returns:
+            기준일이 하나면 Ticker index, 여러 개면 (As Of Date, Ticker) index의 DataFrame입니다.
+            "Date" 컬럼은 실제로 사용한 거래일입니다.
+        """
+        single = np.ndim(dates) == 0
+        date_ns = self._to_ns([dates] if single else dates)
+        pos = self._positions(date_ns, max_lag).ravel()
+        found = pos >= 0
+
+        data = {"Date": self._from_ns(np.where(found, self._date_ns[pos], np.iinfo(np.int64).min))}  # int64 min = NaT
+        for col in self.columns if columns is None else columns:
+            values = self._values[col]
+            if not np.issubdtype(values.dtype, np.floating):
+                values = values.astype(float)  # 값이 없는 티커를 NaN으로 두기 위함
+            data[col] = np.where(found, values[pos], np.nan)
+
+        if single:
+            index = pd.Index(self.tickers, name="Ticker")
+        else:
+            index = pd.MultiIndex.from_product([self._from_ns(date_ns), self.tickers], names=["As Of Date", "Ticker"])
+        return pd.DataFrame(data, index=index)
@@ -0,0 +1,273 @@
+import inspect
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Literal
+
+import numpy as np
+import pandas as pd
+
+from utils.calculate import kelly_betsize
+from core.ohlcv_panel import OhlcvPanel
+
+TRADE_COLUMNS = ["Ticker", "Entry Date", "Exit Date", "Entry Price", "Exit Price", "Weight", "Return", "Exit Reason"]
+EXIT_REASONS = ["signal", "stop", "trailing", "time", "open"]
+
+
+class BacktestResult:
+    def __init__(self, equity: pd.Series, exposure: pd.Series, trades: pd.DataFrame):
+        self.equity = equity
+        self.exposure = exposure
+        self.trades = trades
+
+    @property
+    def stats(self) -> dict[str, float]:
+        equity = self.equity.dropna()
+        returns = equity.pct_change().dropna()
+        years = max((equity.index[-1] - equity.index[0]).days / 365.25, 1 / 365.25) if len(equity) > 1 else np.nan
+        closed = self.trades[self.trades["Exit Reason"] != "open"]["Return"]
+        wins, losses = closed[closed > 0], closed[closed <= 0]
+        win_rate = len(wins) / len(closed) if len(closed) else np.nan
+        payoff = wins.mean() / -losses.mean() if len(wins) and len(losses) and losses.mean() < 0 else np.nan
+        return {
+            "Total Return": equity.iloc[-1] / equity.iloc[0] - 1,
+            "CAGR": (equity.iloc[-1] / equity.iloc[0]) ** (1 / years) - 1,
+            "MDD": (equity / equity.cummax() - 1).min(),
+            "Sharpe": returns.mean() / returns.std() * np.sqrt(252) if returns.std() > 0 else np.nan,
+            "Trades": len(closed),
+            "Win Rate": win_rate,
+            "Avg Win": wins.mean(),
+            "Avg Loss": losses.mean(),
+            "Payoff": payoff,
+            "Kelly": kelly_betsize(win_rate, payoff),
+            "Exposure": self.exposure.mean(),
+        }
+
+
+def run_backtest(
+    panel: OhlcvPanel,
+    entry_signal: np.ndarray,
+    exit_signal: np.ndarray | None = None,
+    stop_loss: float | None = None,
+    trailing_trigger: float | None = None,
+    trailing_stop: float | None = None,
+    max_holding_days: int | None = None,
+    sizing: Literal["fixed", "kelly"] = "fixed",
+    position_size: float = 0.1,
+    kelly_scale: float = 0.5,
+    min_trades: int = 20,
+    max_positions: int | None = None,
+    priority: np.ndarray | None = None,
+    fee: float = 0.001,
+) -> BacktestResult:
+    """
+    모든 티커를 배열로 묶어 날짜 순서대로 진행하는 long-only 백테스트입니다.
+
+    entry_signal[:, d]가 True면 d + 1일 시가에 매수합니다. 보유 중인 티커는 매일
+        1) exit_signal[:, d - 1]이면 시가에 매도
+        2) 저가가 손절가(매수가 * (1 - stop_loss)) 또는 trailing 스탑가(최고가 * (1 - trailing_stop))에 닿으면
+           그 가격(시가가 더 낮으면 시가)에 매도. trailing 스탑은 최고가가 매수가 * (1 + trailing_trigger) 이상일 때부터 적용
+        3) max_holding_days 이상 보유하면 종가에 매도
+    순서로 처리합니다. (e.g. 단타 stop_loss=0.06, trailing_trigger=0.12, trailing_stop=0.04)
+
+    Args:
+        panel: OhlcvPanel입니다. (Open, High, Low, Close 필요)
+        entry_signal, exit_signal: (티커 x 날짜) bool 배열입니다.
+        sizing: "fixed"면 매수마다 자산의 position_size, "kelly"면 그때까지 끝난 거래의 승률/손익비로 구한
+            Kelly 비율 * kelly_scale (거래가 min_trades개 미만이면 position_size) 입니다.
+        max_positions: 동시에 보유할 최대 종목 수입니다. 넘치면 priority(전일 값이 큰 순, 기본은 거래대금)로 고릅니다.
+        fee: 매수/매도 각각의 수수료 비율입니다.
+
+    Returns:
+        BacktestResult (자산 곡선, 투자 비중, 거래 목록, stats) 입니다.
+    """
+    open_, high, low, close = panel["Open"], panel["High"], panel["Low"], panel["Close"]
+    n_tickers, n_dates = close.shape
+    if priority is None and "Trading Value" in panel.fields:
+        priority = panel["Trading Value"]
+
+    holding = np.zeros(n_tickers, dtype=bool)
+    shares = np.zeros(n_tickers)
+    entry_price = np.full(n_tickers, np.nan)
+    entry_idx = np.zeros(n_tickers, dtype=np.int64)
+    weight = np.zeros(n_tickers)
+    peak = np.full(n_tickers, np.nan)
+    armed = np.zeros(n_tickers, dtype=bool)
+    last_price = np.full(n_tickers, np.nan)
+    cash = 1.0
+    equity = np.full(n_dates, np.nan)
+    exposure = np.zeros(n_dates)
+    # Kelly 추정용 (끝난 거래의 이익/손실 합과 개수)
+    win_sum = loss_sum = 0.0
+    n_win = n_loss = 0
+    trades = []
+
+    def close_positions(mask: np.ndarray, price: np.ndarray, d: int, reason: int):
+        nonlocal cash, win_sum, loss_sum, n_win, n_loss
+        idx = np.flatnonzero(mask)
+        if not len(idx):
+            return
+        exit_price = price[idx]
+        cash += float(np.sum(shares[idx] * exit_price)) * (1 - fee)
+        ret = exit_price / entry_price[idx] * (1 - fee) ** 2 - 1
+        trades.append((idx, entry_idx[idx], np.full(len(idx), d), entry_price[idx], exit_price, weight[idx], ret,
+                       np.full(len(idx), reason)))
+        win_sum += ret[ret > 0].sum()
+        loss_sum += ret[ret <= 0].sum()
+        n_win += int((ret > 0).sum())
+        n_loss += int((ret <= 0).sum())
+        holding[idx] = False
+        shares[idx] = 0.0
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for d in range(n_dates):
+            o, h, l, c = open_[:, d], high[:, d], low[:, d], close[:, d]
+            has_bar = ~np.isnan(o) & ~np.isnan(c)
+            prev_equity = equity[d - 1] if d else cash
+
+            can_enter = ~holding & has_bar & (o > 0)  # 당일 매도한 티커는 다시 사지 않음
+
+            # 1) 전일 exit 신호 -> 시가 매도
+            if exit_signal is not None and d:
+                close_positions(holding & has_bar & exit_signal[:, d - 1], o, d, EXIT_REASONS.index("signal"))
+
+            # 2) 전일 entry 신호 -> 시가 매수
+            if d:
+                candidates = can_enter & entry_signal[:, d - 1]
+                if max_positions is not None:
+                    slots = max(max_positions - int(holding.sum()), 0)
+                    if candidates.sum() > slots:
+                        cand_idx = np.flatnonzero(candidates)
+                        score = priority[cand_idx, d - 1] if priority is not None else np.zeros(len(cand_idx))
+                        keep = cand_idx[np.argsort(-np.nan_to_num(score, nan=-np.inf), kind="stable")[:slots]]
+                        candidates = np.zeros(n_tickers, dtype=bool)
+                        candidates[keep] = True
+                size = position_size
+                if sizing == "kelly" and n_win + n_loss >= min_trades:
+                    p = n_win / (n_win + n_loss)
+                    b = (win_sum / n_win) / (-loss_sum / n_loss) if n_win and n_loss and loss_sum < 0 else np.nan
+                    size = float(np.clip(np.nan_to_num(kelly_betsize(p, b) * kelly_scale, nan=0.0), 0.0, 1.0))
+                idx = np.flatnonzero(candidates)
+                if len(idx) and size > 0 and cash > 0:
+                    amount = min(size * prev_equity, cash / len(idx))  # 현금이 부족하면 나눠서 매수
+                    shares[idx] = amount * (1 - fee) / o[idx]
+                    cash -= amount * len(idx)
+                    holding[idx] = True
+                    entry_price[idx] = o[idx]
+                    entry_idx[idx] = d
+                    weight[idx] = amount / prev_equity
+                    peak[idx] = o[idx]
+                    armed[idx] = False
+
+            # 3) 손절 / trailing 스탑 (장중 저가 기준)
+            active = holding & has_bar
+            stop_level = entry_price * (1 - stop_loss) if stop_loss is not None else np.full(n_tickers, -np.inf)
+            trail_level = np.full(n_tickers, -np.inf)
+            if trailing_stop is not None:
+                trail_level = np.where(armed, peak * (1 - trailing_stop), -np.inf)
+            level = np.fmax(stop_level, trail_level)
+            hit = active & (l <= level)
+            if hit.any():
+                price = np.fmin(o, level)
+                is_trailing = trail_level > stop_level
+                close_positions(hit & is_trailing, price, d, EXIT_REASONS.index("trailing"))
+                close_positions(hit & ~is_trailing, price, d, EXIT_REASONS.index("stop"))
+
+            # 최고가 갱신 후 trailing 스탑 적용 여부 결정 (당일 고가는 다음 날부터 반영)
+            active = holding & has_bar
+            peak = np.where(active, np.fmax(peak, h), peak)
+            if trailing_trigger is not None:
+                armed |= active & (peak >= entry_price * (1 + trailing_trigger))
+            elif trailing_stop is not None:
+                armed |= active
+
+            # 4) 보유 기간 -> 종가 매도
+            if max_holding_days is not None:
+                close_positions(active & (d - entry_idx >= max_holding_days), c, d, EXIT_REASONS.index("time"))
+
+            last_price = np.where(~np.isnan(c), c, last_price)
+            invested = float(np.nansum(shares * last_price))
+            equity[d] = cash + invested
+            exposure[d] = invested / equity[d] if equity[d] > 0 else 0.0
+
+    # 끝까지 보유 중인 종목은 마지막 가격으로 평가
+    if holding.any():
+        idx = np.flatnonzero(holding)
+        ret = last_price[idx] / entry_price[idx] * (1 - fee) ** 2 - 1
+        trades.append((idx, entry_idx[idx], np.full(len(idx), n_dates - 1), entry_price[idx], last_price[idx],
+                       weight[idx], ret, np.full(len(idx), EXIT_REASONS.index("open"))))
+
+    return BacktestResult(
+        pd.Series(equity, index=panel.dates, name="Equity"),
+        pd.Series(exposure, index=panel.dates, name="Exposure"),
+        _make_trades(panel, trades),
+    )
+
+
+def _make_trades(panel: OhlcvPanel, trades: list[tuple]) -> pd.DataFrame:
+    if not trades:
+        return pd.DataFrame(columns=TRADE_COLUMNS)
+    ticker, entry, exit_, entry_price, exit_price, weight, ret, reason = (np.concatenate(x) for x in zip(*trades))
+    return pd.DataFrame({
+        "Ticker": panel.tickers[ticker],
+        "Entry Date": panel.dates[entry],
+        "Exit Date": panel.dates[exit_],
+        "Entry Price": entry_price,
+        "Exit Price": exit_price,
+        "Weight": weight,
+        "Return": ret,
+        "Exit Reason": np.array(EXIT_REASONS)[reason],
+    }).sort_values(["Entry Date", "Ticker"], ignore_index=True)
+
+
+# sweep worker 프로세스마다 한 번만 받는 panel과 신호
+_SWEEP_STATE = {}
+_BACKTEST_PARAMS = set(inspect.signature(run_backtest).parameters) - {"panel", "entry_signal"}
+
+
+def _init_sweep_worker(panel: OhlcvPanel, signal):
+    _SWEEP_STATE["panel"] = panel
+    _SWEEP_STATE["signal"] = signal
+    _SWEEP_STATE["signals"] = {}
+
+
+def _run_sweep_task(params: dict) -> dict[str, float]:
+    panel, signal = _SWEEP_STATE["panel"], _SWEEP_STATE["signal"]
+    backtest_params = {k: v for k, v in params.items() if k in _BACKTEST_PARAMS}
+    if callable(signal):
+        signal_params = {k: v for k, v in params.items() if k not in _BACKTEST_PARAMS}
+        key = tuple(sorted(signal_params.items()))
+        if key not in _SWEEP_STATE["signals"]:
+            _SWEEP_STATE["signals"][key] = signal(panel, **signal_params)
+        entry_signal = _SWEEP_STATE["signals"][key]
+    else:
+        entry_signal = signal
+    return run_backtest(panel, entry_signal, **backtest_params).stats
+
+
+def sweep(
+    panel: OhlcvPanel,
+    signal: np.ndarray | Callable[..., np.ndarray],
+    grid: dict[str, list],
+    max_workers: int | None = None,
+    **fixed_params,
+) -> pd.DataFrame:
+    """
+    파라미터 조합마다 run_backtest를 ProcessPool에서 실행합니다.
+
+    Args:
+        signal: entry 신호 배열 또는 signal(panel, **params) -> 배열 함수입니다. (프로세스로 넘기므로 모듈 수준 함수)
+        grid: {파라미터 이름: 값 목록} 입니다. run_backtest의 인자가 아닌 파라미터는 signal 함수로 넘깁니다.
+            (e.g. {"stop_loss": [0.06, 0.1, 0.15], "trailing_trigger": [0.12, 0.2, 0.25], "window": [20, 60]})
+        fixed_params: 모든 조합에 공통으로 쓸 파라미터입니다.
+
+    Returns:
+        grid 파라미터 index, stats 컬럼의 DataFrame입니다.
+    """
+    # signal 파라미터를 바깥 루프로 두어 같은 signal 조합이 같은 chunk(프로세스)에 모이게 함 (signal 재계산 감소)
+    names = sorted(grid, key=lambda name: name in _BACKTEST_PARAMS)
+    combos = list(itertools.product(*(grid[name] for name in names)))
+    tasks = [{**fixed_params, **dict(zip(names, combo))} for combo in combos]
+    with ProcessPoolExecutor(max_workers, initializer=_init_sweep_worker, initargs=(panel, signal)) as executor:
+        results = list(executor.map(_run_sweep_task, tasks, chunksize=max(1, len(tasks) // (4 * (max_workers or 8)))))
+    index = pd.MultiIndex.from_tuples(combos, names=names)
+    return pd.DataFrame(results, index=index)
@@ -0,0 +1,65 @@
+import os
+import shutil
+import hashlib
+
+import pandas as pd
+import pyarrow as pa
+
+
+def make_cache_key(version: str, source_paths: list[str], code_paths: list[str]) -> str:
+    # 버전, 원본 파일 수정 시각, 코드 내용 중 하나라도 바뀌면 다른 key가 됨
+    h = hashlib.sha1(version.encode())
+    for path in sorted(source_paths):
+        h.update(f"{os.path.basename(path)}:{os.stat(path).st_mtime_ns}".encode())
+    for path in code_paths:
+        with open(path, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()[:16]
+
+
+class FrameCache:
+    """
+    DataFrame을 압축하지 않은 Arrow IPC 파일(<root>/<key>/<name>.arrow)로 저장하고, memory map으로 읽는 캐시입니다.
+    숫자 컬럼은 파일을 복사하지 않고 그대로 참조하므로 큰 DataFrame도 바로 열립니다.
+    """
+    def __init__(self, root: str, key: str):
+        self.root = root
+        self.key = key
+        self.dir = os.path.join(root, key)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.dir, f"{name}.arrow")
+
+    def load(self, name: str) -> pd.DataFrame | None:
+        path = self._path(name)
+        if not os.path.exists(path):
+            return None
+        table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+        return table.to_pandas(split_blocks=True)
+
+    def load_many(self, *names: str) -> list[pd.DataFrame] | None:
+        # 하나라도 없으면 None
+        frames = [self.load(name) for name in names]
+        return None if any(df is None for df in frames) else frames
+
+    def prepare(self) -> str:
+        # 캐시 폴더를 만들고 이전 key의 캐시를 정리 (Arrow가 아닌 파일을 직접 쓸 때도 사용)
+        os.makedirs(self.dir, exist_ok=True)
+        self._prune()
+        return self.dir
+
+    def save(self, name: str, df: pd.DataFrame):
+        self.prepare()
+        table = pa.Table.from_pandas(df, preserve_index=True)
+        path = self._path(name)
+        tmp_path = f"{path}.tmp"
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+
+    def _prune(self):
+        # key가 바뀌어 더 이상 쓰지 않는 캐시 삭제
+        for name in os.listdir(self.root):
+            if name != self.key and os.path.isdir(os.path.join(self.root, name)):
+                shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+
+from core.factors import ttm, latest, free_cash_flow
+
+DCF_INDEX = ["Ticker", "Discount Rate", "Terminal Growth", "Margin Scale"]
+
+
+def _latest(df: pd.DataFrame) -> pd.DataFrame:
+    # 티커별 가장 최근 As Of Date 행
+    return df.sort_index().groupby(level="Ticker").tail(1).droplevel("As Of Date")
+
+
+def _ttm_free_cash_flow(cash_flow_quarter: pd.DataFrame) -> pd.Series:
+    # factors의 TTM Free Cash Flow와 같은 정의 (TTM 인정 기간, 가장 최근 TTM 분기)
+    return free_cash_flow(latest(ttm(cash_flow_quarter)))
+
+
+def make_dcf_inputs(
+    cash_flow: pd.DataFrame,
+    cash_flow_quarter: pd.DataFrame | None,
+    income_statement: pd.DataFrame,
+    info: pd.DataFrame,
+    growth: pd.Series | None = None,
+) -> pd.DataFrame:
+    """
+    티커별 DCF 입력값을 만듭니다.
+
+    Args:
+        cash_flow, cash_flow_quarter, income_statement, info: Database의 테이블입니다.
+        growth: 예측 기간 첫해의 매출 성장률입니다. (e.g. Sales YoY Growth CAGR) 없으면 Terminal Growth를 사용합니다.
+
+    Returns:
+        Ticker index, ["Revenue", "Free Cash Flow", "FCF Margin", "Growth", "Net Debt", "Shares Outstanding"]
+        FCF는 최근 4개 분기 합(TTM)을 우선 사용하고, 없으면 최근 연간 값을 사용합니다.
+    """
+    to_float = lambda s: pd.to_numeric(s.replace("", np.nan), errors="coerce")
+    fcf = free_cash_flow(_latest(cash_flow))
+    if cash_flow_quarter is not None:
+        fcf = _ttm_free_cash_flow(cash_flow_quarter).combine_first(fcf)
+    revenue = _latest(income_statement)["Total Revenue"]
+
+    inputs = pd.DataFrame(index=info.index)
+    inputs["Revenue"] = revenue.where(revenue > 0)
+    inputs["Free Cash Flow"] = fcf
+    inputs["FCF Margin"] = inputs["Free Cash Flow"] / inputs["Revenue"]
+    inputs["Growth"] = np.nan if growth is None else growth
+    inputs["Net Debt"] = to_float(info["Enterprise Value"]) - to_float(info["Market Cap"])
+    shares = to_float(info["Shares Outstanding"])
+    inputs["Shares Outstanding"] = shares.where(shares > 0)
+    return inputs
+
+
+def dcf_grid(
+    inputs: pd.DataFrame,
+    discount_rates: list[float],
+    terminal_growths: list[float],
+    margin_scales: list[float] = (1.0,),
+    years: int = 5,
+    prices: pd.Series | None = None,
+) -> pd.DataFrame:
+    """
+    모든 티커 x 할인율 x 영구성장률 x 마진 배수 조합의 주당 내재가치를 broadcasting으로 한 번에 계산합니다.
+
+    매출은 첫해 Growth에서 years년 동안 Terminal Growth까지 선형으로 줄어드는 성장률로 늘어나고,
+    FCF = 매출 * FCF Margin * Margin Scale 입니다.
+    내재가치 = (sum(FCF_t / (1 + r)^t) + FCF_N * (1 + g) / (r - g) / (1 + r)^N - Net Debt) / Shares Outstanding
+
+    Args:
+        inputs: make_dcf_inputs 결과입니다.
+        discount_rates, terminal_growths, margin_scales: 시나리오 값입니다. (r <= g인 조합은 NaN)
+        years: 예측 기간(년)입니다.
+        prices: 현재 주가입니다. 있으면 Upside(내재가치 / 주가 - 1) 컬럼을 추가합니다.
+
+    Returns:
+        (Ticker, Discount Rate, Terminal Growth, Margin Scale) index의 tidy DataFrame입니다.
+    """
+    r = np.asarray(discount_rates, dtype=float)
+    g = np.asarray(terminal_growths, dtype=float)
+    m = np.asarray(margin_scales, dtype=float)
+    t = np.arange(1, years + 1)
+
+    g0 = inputs["Growth"].to_numpy(dtype=float)
+    g0 = np.where(np.isnan(g0)[:, None], g[None, :], g0[:, None])  # (T, G)
+    growth_path = g0[:, :, None] + (g[None, :, None] - g0[:, :, None]) * (t / years)  # (T, G, N)
+    revenue = inputs["Revenue"].to_numpy(dtype=float)[:, None, None] * np.cumprod(1 + growth_path, axis=2)
+
+    discount = (1 + r[:, None]) ** -t[None, :]  # (R, N)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        terminal = np.where(r[:, None] > g[None, :], (1 + g[None, :]) / (r[:, None] - g[None, :]), np.nan)  # (R, G)
+    # 매출 기준 현재가치 합 (T, R, G)
+    pv_revenue = np.einsum("tgn,rn->trg", revenue, discount) + revenue[:, None, :, -1] * terminal * discount[:, -1][:, None]
+
+    margin = inputs["FCF Margin"].to_numpy(dtype=float)[:, None, None, None] * m  # (T, 1, 1, M)
+    enterprise_value = pv_revenue[..., None] * margin  # (T, R, G, M)
+    net_debt = inputs["Net Debt"].fillna(0).to_numpy(dtype=float)[:, None, None, None]
+    shares = inputs["Shares Outstanding"].to_numpy(dtype=float)[:, None, None, None]
+    value = (enterprise_value - net_debt) / shares
+
+    index = pd.MultiIndex.from_product([inputs.index, r, g, m], names=DCF_INDEX)
+    result = pd.DataFrame({"Enterprise Value": enterprise_value.ravel(), "Intrinsic Value": value.ravel()}, index=index)
+    if prices is not None:
+        price = prices.reindex(inputs.index).to_numpy(dtype=float)[:, None, None, None]
+        result["Upside"] = (value / np.where(price > 0, price, np.nan)).ravel() - 1
+    return result
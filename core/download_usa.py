@@ -1,10 +1,12 @@
+import asyncio
 import logging
 import os
 import time
 import random
 import traceback
-from typing import get_args, Literal
-from concurrent.futures import ThreadPoolExecutor
+from typing import get_args, Callable, Literal
+from itertools import repeat
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 
 import numpy as np
 import pandas as pd
@@ -12,6 +14,9 @@ from tqdm import tqdm
 import yfinance as yf
 
 from utils import *
+from core.manifest import *
+from core.staging import ShardStaging
+from core.raw_cache import RawCache
 
 YFDataType = Literal[
     "info",
@@ -34,11 +39,13 @@ def _camel_to_title_case(text: str) -> str:
     return title_case
 
 
-def _postprocess_info(info: dict, ticker: str) -> pd.DataFrame:
+def _postprocess_info(info: dict, ticker: str, as_of: pd.Timestamp | None = None) -> pd.DataFrame:
+    # as_of: 데이터를 받은 날짜 (원본으로 다시 후처리할 때 오늘 대신 사용)
+    as_of = pd.Timestamp.now() if as_of is None else as_of
     key_list = [
         "longName", "sector", "industry", "longBusinessSummary", "quoteType", "lastFiscalYearEnd", "sharesOutstanding",
         "marketCap", "enterpriseValue",
-        "trailingPE", "forwardPE", "trailingEps", "forwardEps", "trailingPegRatio", "beta",
+        "trailingPE", "forwardPE", "trailingEps", "forwardEps", "trailingPegRatio", "beta", "earningsTimestamp",
     ]
     str_key = ["longName", "sector", "industry", "longBusinessSummary", "quoteType"]
 
@@ -49,7 +56,12 @@ def _postprocess_info(info: dict, ticker: str) -> pd.DataFrame:
             if key in info:
                 df[key] = [pd.Timestamp(info[key], unit="s").date()]
             else:  # in case of missing lastFiscalYearEnd, set it to the last day of the previous year
-                df[key] = [datetime.date(year=pd.Timestamp.now().year-1, month=12, day=31)]
+                df[key] = [datetime.date(year=as_of.year-1, month=12, day=31)]
+        elif key == "earningsTimestamp":  # 다음(또는 직전) 실적 발표일, 증분 갱신 계획에 사용
+            if key in info:
+                df[key] = [pd.Timestamp(info[key], unit="s").date()]
+            else:
+                df[key] = [None]
         elif key == "longName":
             if key in info:
                 df[key] = [info[key]]
@@ -77,10 +89,9 @@ def _postprocess_fundamental(df: pd.DataFrame, ticker: str) -> pd.DataFrame:
         
         df = df.set_index(["Ticker", "As Of Date"])
     except Exception as e:
-        import pickle
-        with open(f"error_fundamental_{ticker}.pkl", "wb") as f:  # debug 용
-            pickle.dump(df, f)
-        raise e
+        # 원본은 raw cache에 남으므로 파일로 덤프하지 않고 로그만 남김
+        logging.warning(f"'{ticker}' 재무제표 후처리 실패 (shape={df.shape}): {e!r}")
+        raise
 
     df = df.dropna(axis=1, thresh=len(df)//2)
     for col in df.columns:
@@ -88,17 +99,20 @@ def _postprocess_fundamental(df: pd.DataFrame, ticker: str) -> pd.DataFrame:
     return df
 
 
-def _postprocess_estimates(df: pd.DataFrame, ticker: str, info: pd.DataFrame, value_type: str="EPS") -> pd.DataFrame:
+def _postprocess_estimates(
+    df: pd.DataFrame, ticker: str, info: pd.DataFrame, value_type: str="EPS", as_of: pd.Timestamp | None = None
+) -> pd.DataFrame:
+    as_of = pd.Timestamp.now() if as_of is None else as_of
     if info["Last Fiscal Year End"].item().month == 2 and info["Last Fiscal Year End"].item().day == 29:
         info["Last Fiscal Year End"] = info["Last Fiscal Year End"].item().replace(day=28)
     
     if info["Last Fiscal Year End"].item().month in [1, 2]:
         # 회계마감이 1월 또는 2월인 경우, 예측 연도를 +1 해주는게 맞음 (e.g. NVDA)
-        this_year = pd.Timestamp.now().year + 1
+        this_year = as_of.year + 1
     else:
-        this_year = pd.Timestamp.now().year
+        this_year = as_of.year
 
-    this_year = pd.Timestamp.now().year
+    this_year = as_of.year
     this_date = info.loc[:, "Last Fiscal Year End"].item().replace(year=this_year)
     next_date = info.loc[:, "Last Fiscal Year End"].item().replace(year=this_year+1)
 
@@ -135,39 +149,70 @@ def _postprocess_ohlcv(df: pd.DataFrame, ticker: str) -> pd.DataFrame:
     return df[["Open", "High", "Low", "Close", "Volume", "Trading Value"]]
 
 
-def _request_with_retry(yf_ticker: yf.Ticker, yfdata_type: YFDataType, max_retries: int, info: pd.DataFrame=None):
+# estimates는 EPS, Sales 두 번 요청하므로 토큰을 두 개 소모
+_REQUEST_COST = {"estimates": 2}
+
+
+def _fetch_raw(yf_ticker: yf.Ticker, yfdata_type: YFDataType):
+    if yfdata_type == "info":
+        return yf_ticker.info
+    elif yfdata_type == "income_statement":
+        return yf_ticker.get_income_stmt(freq="yearly")
+    elif yfdata_type == "income_statement_quarter":
+        return yf_ticker.get_income_stmt(freq="quarterly")
+    elif yfdata_type == "balance_sheet":
+        return yf_ticker.get_balance_sheet(freq="yearly")
+    elif yfdata_type == "balance_sheet_quarter":
+        return yf_ticker.get_balance_sheet(freq="quarterly")
+    elif yfdata_type == "cash_flow":
+        return yf_ticker.get_cashflow(freq="yearly")
+    elif yfdata_type == "cash_flow_quarter":
+        return yf_ticker.get_cashflow(freq="quarterly")
+    elif yfdata_type == "estimates":
+        return yf_ticker.get_earnings_estimate(), yf_ticker.get_revenue_estimate()
+    elif yfdata_type == "ohlcv":
+        return yf_ticker.history(period="1y", raise_errors=True)
+    raise ValueError(f"Unknown data type: {yfdata_type}")
+
+
+def _postprocess_raw(
+    raw, yfdata_type: YFDataType, ticker: str, info: pd.DataFrame=None, as_of: pd.Timestamp | None = None
+) -> pd.DataFrame:
+    if yfdata_type == "info":
+        return _postprocess_info(raw, ticker, as_of)
+    elif yfdata_type == "estimates":
+        earnings_estimate, revenue_estimate = raw
+        eps = _postprocess_estimates(earnings_estimate, ticker, info, "EPS", as_of)
+        sales = _postprocess_estimates(revenue_estimate, ticker, info, "Sales", as_of)
+        return eps.join(sales, how="inner")
+    elif yfdata_type == "ohlcv":
+        return _postprocess_ohlcv(raw, ticker)
+    else:
+        return _postprocess_fundamental(raw, ticker)
+
+
+def _request_once(
+    yf_ticker: yf.Ticker, yfdata_type: YFDataType, info: pd.DataFrame=None, raw_cache: RawCache | None = None
+) -> pd.DataFrame:
+    raw = _fetch_raw(yf_ticker, yfdata_type)
+    if raw_cache is not None:  # 후처리에 실패해도 원본은 남김
+        raw_cache.put(yf_ticker.ticker, yfdata_type, raw)
+    return _postprocess_raw(raw, yfdata_type, yf_ticker.ticker, info)
+
+
+def _request_with_retry(
+    yf_ticker: yf.Ticker,
+    yfdata_type: YFDataType,
+    max_retries: int,
+    info: pd.DataFrame=None,
+    raw_cache: RawCache | None = None,
+):
     ticker_name = yf_ticker.ticker
 
     time.sleep(1 + random.random())
     for retry in range(max_retries):
         try:
-            if yfdata_type == "info":
-                result = _postprocess_info(yf_ticker.info, ticker_name)
-            elif yfdata_type == "income_statement":
-                finance_df = yf_ticker.get_income_stmt(freq="yearly")
-                result = _postprocess_fundamental(finance_df, ticker_name)
-            elif yfdata_type == "income_statement_quarter":
-                finance_df = yf_ticker.get_income_stmt(freq="quarterly")
-                result = _postprocess_fundamental(finance_df, ticker_name)
-            elif yfdata_type == "balance_sheet":
-                finance_df = yf_ticker.get_balance_sheet(freq="yearly")
-                result = _postprocess_fundamental(finance_df, ticker_name)
-            elif yfdata_type == "balance_sheet_quarter":
-                finance_df = yf_ticker.get_balance_sheet(freq="quarterly")
-                result = _postprocess_fundamental(finance_df, ticker_name)
-            elif yfdata_type == "cash_flow":
-                finance_df = yf_ticker.get_cashflow(freq="yearly")
-                result = _postprocess_fundamental(finance_df, ticker_name)
-            elif yfdata_type == "cash_flow_quarter":
-                finance_df = yf_ticker.get_cashflow(freq="quarterly")
-                result = _postprocess_fundamental(finance_df, ticker_name)
-            elif yfdata_type == "estimates":
-                eps = _postprocess_estimates(yf_ticker.get_earnings_estimate(), ticker_name, info, "EPS")
-                sales = _postprocess_estimates(yf_ticker.get_revenue_estimate(), ticker_name, info, "Sales")
-                result = eps.join(sales, how="inner")
-            elif yfdata_type == "ohlcv":
-                result = _postprocess_ohlcv(yf_ticker.history(period="1y", raise_errors=True), ticker_name)
-            return result
+            return _request_once(yf_ticker, yfdata_type, info, raw_cache)
 
         except Exception as e:
             logging.warning(f"'{ticker_name}' 요청 실패 → 재시도: {e}")
@@ -179,19 +224,23 @@ def _request_with_retry(yf_ticker: yf.Ticker, yfdata_type: YFDataType, max_retri
     return None
 
 
-def _download_single_ticker(ticker: str, max_retries: int=10) -> tuple:
+def _download_single_ticker(
+    ticker: str, max_retries: int=10, data_types: list[YFDataType] | None=None, raw_cache: RawCache | None = None
+) -> tuple:
+    # data_types: 받을 데이터 타입 (None이면 전체). estimates를 받으려면 info가 포함되어야 함
     ticker_data = {}
     yf_ticker = yf.Ticker(ticker)
-    for yfdata_type in get_args(YFDataType):
+    info = None
+    for yfdata_type in data_types if data_types is not None else get_args(YFDataType):
         if yfdata_type == "info":
-            info = _request_with_retry(yf_ticker, yfdata_type, max_retries)
+            info = _request_with_retry(yf_ticker, yfdata_type, max_retries, raw_cache=raw_cache)
             if info is None:
                 ticker_data = None
                 break
             else:
                 ticker_data[yfdata_type] = info
         else:
-            result = _request_with_retry(yf_ticker, yfdata_type, max_retries, info)
+            result = _request_with_retry(yf_ticker, yfdata_type, max_retries, info, raw_cache)
             if result is None:
                 ticker_data = None
                 break
@@ -200,25 +249,513 @@ def _download_single_ticker(ticker: str, max_retries: int=10) -> tuple:
     return ticker_data
 
 
+def _check_data_types(data_types: list[YFDataType] | None):
+    # estimates 후처리에 info(회계연도 마감일)가 필요
+    if data_types is not None and "estimates" in data_types and "info" not in data_types:
+        raise ValueError("'estimates' requires 'info' in data_types.")
+
+
+def fetch_ohlcv_chunk(tickers: list[str], period: str = "1y") -> pd.DataFrame:
+    # 여러 티커의 일봉을 한 번에 요청. history()와 같은 수정주가, 거래소 timezone 날짜
+    return yf.download(
+        tickers, period=period, group_by="ticker", auto_adjust=True, ignore_tz=False, threads=False, progress=False
+    )
+
+
+def split_ohlcv_chunk(raw: pd.DataFrame, tickers: list[str]) -> tuple[dict[str, pd.DataFrame], list[str]]:
+    # 여러 티커 응답((티커, 필드) 컬럼)을 티커별 _postprocess_ohlcv 형식으로 나눔. 값이 없는 티커는 실패
+    results, failed = {}, []
+    if isinstance(raw.columns, pd.MultiIndex):
+        level = 0 if set(raw.columns.get_level_values(0)) & set(tickers) else 1
+        available = set(raw.columns.get_level_values(level))
+    else:
+        level, available = None, set(tickers[:1])  # 티커 하나만 요청하면 필드 컬럼만 옴
+    for ticker in tickers:
+        if ticker not in available:
+            failed.append(ticker)
+            continue
+        df = raw if level is None else raw.xs(ticker, axis=1, level=level)
+        df = df[df["Close"].notna()] if "Close" in df.columns else df.iloc[:0]
+        if df.empty:
+            failed.append(ticker)
+            continue
+        df = df.copy()
+        if df["Volume"].notna().all():
+            df["Volume"] = df["Volume"].astype("int64")  # 다른 티커와 날짜를 맞추며 float이 된 거래량을 history()와 같게
+        results[ticker] = _postprocess_ohlcv(df.rename_axis(columns=None), ticker)
+    return results, failed
+
+
+def download_ohlcv_batched(
+    tickers: list[str],
+    chunk_size: int = 100,
+    period: str = "1y",
+    max_retries: int = 3,
+    fetch_func: Callable[[list[str], str], pd.DataFrame] = fetch_ohlcv_chunk,
+    sleep: float = 1.0,
+) -> tuple[dict[str, pd.DataFrame], list[str]]:
+    """
+    티커를 chunk_size개씩 묶어서 일봉을 받고, 티커별 (Ticker, Date) DataFrame으로 나눕니다.
+
+    chunk 안에서 실패한 티커만 모아서 다시 chunk로 묶어 재시도합니다.
+
+    Args:
+        fetch_func: fetch_func(티커 목록, period) -> yf.download(group_by="ticker") 형식 DataFrame 입니다.
+            (네트워크 없이 테스트할 때 가짜 응답 함수를 넣을 수 있음)
+
+    Returns:
+        ({티커: ohlcv}, 끝까지 실패한 티커) 입니다.
+    """
+    results = {}
+    pending = list(dict.fromkeys(tickers))
+    for retry in range(max_retries):
+        failed = []
+        chunks = [pending[i:i + chunk_size] for i in range(0, len(pending), chunk_size)]
+        for chunk in tqdm(chunks, desc=f"ohlcv batch (try {retry + 1})"):
+            try:
+                raw = fetch_func(chunk, period)
+            except Exception as e:
+                logging.warning(f"ohlcv chunk({chunk[0]} 외 {len(chunk) - 1}개) 요청 실패: {e}")
+                failed += chunk
+                continue
+            chunk_results, chunk_failed = split_ohlcv_chunk(raw, chunk)
+            results.update(chunk_results)
+            failed += chunk_failed
+            time.sleep(sleep * random.random())
+        pending = failed
+        if not pending or retry == max_retries - 1:
+            break
+        logging.warning(f"ohlcv {len(pending)}개 티커 재시도")
+        time.sleep((2 ** retry) + random.random())
+    return results, pending
+
+
+def _rebuild_single_ticker(
+    raw_cache: RawCache, ticker: str, data_types: list[YFDataType], fetch_dates: list[str]
+) -> tuple[dict | None, dict[str, pd.Timestamp]]:
+    # 원본이 없는 타입은 건너뛰고, info가 없거나 후처리에 실패하면 None (다운로드에서 실패한 티커와 같게 처리)
+    ticker_data, fetched_dates = {}, {}
+    info = None
+    for yfdata_type in data_types:
+        fetch_date = raw_cache.find(ticker, yfdata_type, fetch_dates=fetch_dates)
+        if fetch_date is None:
+            if yfdata_type == "info":
+                return None, {}
+            continue
+        as_of = pd.to_datetime(fetch_date, format="%y%m%d")
+        try:
+            raw = raw_cache.load(ticker, yfdata_type, fetch_date)
+            result = _postprocess_raw(raw, yfdata_type, ticker, info, as_of)
+        except Exception as e:
+            logging.warning(f"'{ticker}'의 '{yfdata_type}' 후처리 실패: {e}")
+            return None, {}
+        if yfdata_type == "info":
+            info = result
+        ticker_data[yfdata_type] = result
+        fetched_dates[yfdata_type] = as_of
+    return ticker_data, fetched_dates
+
+
+class AsyncTokenBucket:
+    """모든 요청이 공유하는 초당 요청 수(rate) 제한. 최대 capacity개까지 토큰을 모아 burst를 허용한다."""
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        # 가장 비싼 요청(estimates)도 한 번에 보낼 수 있도록 capacity는 최소 요청 비용 이상
+        self.capacity = capacity if capacity is not None else max(rate, max(_REQUEST_COST.values(), default=1))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: float = 1):
+        # lock을 잡은 채로 기다려서 먼저 온 요청이 먼저 나가도록 함
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                # capacity보다 비싼 요청은 가득 찼을 때 보내고 모자란 만큼은 빚으로 남겨서 다음 요청이 기다림
+                need = min(tokens, self.capacity)
+                if self._tokens >= need:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((need - self._tokens) / self.rate)
+
+
+async def _request_with_retry_async(
+    yf_ticker: yf.Ticker,
+    yfdata_type: YFDataType,
+    max_retries: int,
+    limiter: AsyncTokenBucket,
+    executor: ThreadPoolExecutor,
+    info: pd.DataFrame=None,
+    raw_cache: RawCache | None = None,
+):
+    # yfinance는 동기 API이므로 executor에서 실행하고, 고정 sleep 대신 공유 limiter로 속도를 조절
+    loop = asyncio.get_running_loop()
+    ticker_name = yf_ticker.ticker
+
+    for retry in range(max_retries):
+        await limiter.acquire(_REQUEST_COST.get(yfdata_type, 1))
+        try:
+            return await loop.run_in_executor(executor, _request_once, yf_ticker, yfdata_type, info, raw_cache)
+
+        except Exception as e:
+            logging.warning(f"'{ticker_name}' 요청 실패 → 재시도: {e}")
+            error_msg = traceback.format_exc()
+            if retry < max_retries - 1:  # 마지막 실패 뒤에는 기다리지 않고 동시 요청 자리를 비움
+                await asyncio.sleep((2 ** retry) + random.random())
+
+    logging.warning(f"'{ticker_name}'의 '{yfdata_type}' 데이터 요청에 실패했습니다.")
+    logging.warning(error_msg)
+    return None
+
+
+async def _download_single_ticker_async(
+    ticker: str,
+    limiter: AsyncTokenBucket,
+    executor: ThreadPoolExecutor,
+    max_retries: int=10,
+    data_types: list[YFDataType] | None=None,
+    raw_cache: RawCache | None = None,
+) -> dict | None:
+    ticker_data = {}
+    yf_ticker = yf.Ticker(ticker)
+    info = None
+    for yfdata_type in data_types if data_types is not None else get_args(YFDataType):
+        # estimates 후처리에 info가 필요하므로 한 티커 안에서는 순서대로 요청
+        result = await _request_with_retry_async(
+            yf_ticker, yfdata_type, max_retries, limiter, executor, info, raw_cache
+        )
+        if result is None:
+            return None
+        if yfdata_type == "info":
+            info = result
+        ticker_data[yfdata_type] = result
+    return ticker_data
+
+
 class YFDownloader:
-    def __init__(self):
+    def __init__(self, save_dir: str | None = None, raw_cache: RawCache | None = None):
+        # save_dir를 주면 티커별 결과를 완료 즉시 staging 폴더(save_dir 옆의 _staging/<버전>)에 저장하고(메모리에 쌓지 않음),
+        # 같은 save_dir로 다시 실행하면 이미 완료된 티커는 건너뜀
+        # raw_cache를 주면 받은 원본을 후처리 전에 저장 (rebuild()로 다시 받지 않고 후처리만 다시 실행)
         self.data = {k: [] for k in get_args(YFDataType)}
+        self.manifest = []  # 티커, 데이터 타입별 수집 기록 (save 시 manifest.parquet로 저장)
+        self.save_dir = save_dir
+        self.staging = ShardStaging(save_dir) if save_dir is not None else None
+        self._previous_manifest = None
+        self.raw_cache = raw_cache
+        self._fetched_on = pd.Timestamp.today().normalize()
+
+    def download(
+        self,
+        tickers: str | list[str],
+        max_workers: int = 8,
+        engine: Literal["thread", "async"] = "thread",
+        requests_per_second: float = 8.0,
+        max_concurrency: int = 256,
+        data_types: list[YFDataType] | None = None,
+        ohlcv_chunk_size: int | None = None,
+    ):
+        # engine: "thread" = 티커당 고정 sleep + ThreadPool, "async" = 공유 token bucket으로 속도 조절하며 동시 요청
+        # data_types: 받을 데이터 타입 (None이면 전체, e.g. ohlcv는 OhlcvStore로 따로 받을 때 제외)
+        # ohlcv_chunk_size: ohlcv를 티커마다 요청하지 않고 이 개수씩 묶어서 먼저 받음 (download_ohlcv_batched)
+        if isinstance(tickers, str):
+            tickers = [tickers]
+
+        _check_data_types(data_types)
+        data_types_list = [list(get_args(YFDataType) if data_types is None else data_types)] * len(tickers)
+        data_types_list, handle = self._batch_ohlcv(tickers, data_types_list, self._append, ohlcv_chunk_size)
+        self._run(tickers, data_types_list, handle, max_workers, engine, requests_per_second, max_concurrency)
+
+    def refresh(
+        self,
+        tickers: str | list[str],
+        prev_dir: str,
+        max_workers: int = 8,
+        engine: Literal["thread", "async"] = "thread",
+        requests_per_second: float = 8.0,
+        max_concurrency: int = 256,
+        max_age_days: int = 91,
+        data_types: list[YFDataType] | None = None,
+        ohlcv_chunk_size: int | None = None,
+        universe_diff: dict | None = None,
+    ):
+        # 이전 버전(prev_dir)의 manifest를 보고 바뀌었을 수 있는 데이터만 새로 받고, 나머지는 이전 버전에서 가져옴
+        # universe_diff: diff_usa_universe(이전, 현재) 결과. 신규 티커는 전부 새로 받고, 티커만 바뀐 종목은
+        # 이전 티커의 기록과 데이터를 새 티커로 이어 씀 (상장 폐지 티커는 tickers에 없으므로 가져오지 않음)
+        if isinstance(tickers, str):
+            tickers = [tickers]
+
+        _check_data_types(data_types)
+        data_types = list(get_args(YFDataType)) if data_types is None else list(data_types)
+        renamed = {} if universe_diff is None else {
+            old: new for old, new in universe_diff["renamed"].items() if new in tickers
+        }
+        self._previous_manifest = load_manifest(prev_dir)
+        if renamed and self._previous_manifest is not None:
+            self._previous_manifest = self._previous_manifest.rename(index=renamed, level="Ticker")
+        available_types = [key for key in data_types if os.path.exists(os.path.join(prev_dir, f"{key}.parquet"))]
+        plan = plan_refresh(
+            tickers, data_types, self._previous_manifest, available_types, self._fetched_on, max_age_days=max_age_days
+        )
+        added = set() if universe_diff is None else set(universe_diff["added"]) & set(tickers)
+        for ticker in added:
+            plan[ticker] = list(data_types)
+        if universe_diff is not None:
+            logging.info(f"신규 {len(added)}개 티커 전체 요청, 티커 변경 {len(renamed)}개는 이전 티커 데이터 사용")
+        n_requests = sum(len(types) for types in plan.values())
+        logging.info(f"증분 갱신: {n_requests}/{len(tickers) * len(data_types)}개 요청")
+
+        done = set(self.staging.done_tickers()) if self.staging is not None else set()
+        carried = {}
+        for key in data_types:
+            carry_tickers = [ticker for ticker in tickers if key not in plan[ticker] and ticker not in done]
+            if not carry_tickers:
+                continue
+            frames = _load_carried_frames(os.path.join(prev_dir, f"{key}.parquet"), carry_tickers, renamed)
+            if self.staging is not None:
+                # staging 모드에서는 key 하나씩 바로 shard로 써서 메모리에 쌓지 않음 (완료 표시는 다운로드 후)
+                for ticker, df in frames.items():
+                    self.staging.write_frame(key, ticker, df)
+            else:
+                carried[key] = frames
+
+        def handle(ticker: str, results_dict: dict | None):
+            if results_dict is None:
+                return
+            fetched_types = list(results_dict)
+            carried_types = [key for key in data_types if key not in plan[ticker]]
+            for key in carried_types:
+                if key in carried and ticker in carried[key]:
+                    results_dict[key] = carried[key][ticker]
+            self._append(ticker, results_dict, fetched_types, carried_types)
+
+        data_types_list = [plan[ticker] for ticker in tickers]
+        data_types_list, handle = self._batch_ohlcv(tickers, data_types_list, handle, ohlcv_chunk_size)
+        self._run(tickers, data_types_list, handle, max_workers, engine, requests_per_second, max_concurrency)
 
-    def download(self, tickers: str | list[str], max_workers: int = 8):
+    def rebuild(
+        self,
+        raw_cache: RawCache,
+        fetch_date: str,
+        tickers: str | list[str] | None = None,
+        data_types: list[YFDataType] | None = None,
+        max_workers: int = 8,
+        prev_dir: str | None = None,
+    ):
+        """
+        yfinance에 다시 요청하지 않고 raw_cache의 원본을 후처리만 다시 실행해서 버전 데이터를 만듭니다.
+
+        Args:
+            fetch_date: 다시 만들 버전(yymmdd)입니다. 이 날짜에 받지 않은 데이터(증분 갱신으로 이전 버전에서 가져온 데이터)는
+                그 이전 가장 최근에 받은 원본을 사용하며, 후처리는 원본을 받은 날짜 기준으로 합니다.
+            tickers: None이면 fetch_date에 원본이 있는 모든 티커 입니다.
+            prev_dir: 이전 버전 폴더입니다. 원본이 없는 데이터(raw cache를 쓰기 전에 받아서 증분 갱신으로 가져온 재무제표 등)는
+                refresh()처럼 이전 버전 parquet에서 가져옵니다. 이전 버전에도 없으면 경고 후 제외하며 manifest에도 남기지 않습니다.
+        """
         if isinstance(tickers, str):
             tickers = [tickers]
+        tickers = raw_cache.tickers(fetch_date) if tickers is None else tickers
+        data_types = list(get_args(YFDataType)) if data_types is None else list(data_types)
+        self._fetched_on = pd.to_datetime(fetch_date, format="%y%m%d")
+
+        if self.staging is not None:
+            done = set(self.staging.done_tickers())
+            tickers = [ticker for ticker in tickers if ticker not in done]
+        fetch_dates = [d for d in raw_cache.fetch_dates() if d <= fetch_date]
+
+        missing = {
+            key: {ticker for ticker in tickers if raw_cache.find(ticker, key, fetch_dates=fetch_dates) is None}
+            for key in data_types
+        }
+        self._previous_manifest = load_manifest(prev_dir) if prev_dir is not None else None
+        carried, carried_keys = {}, []
+        for key, key_tickers in missing.items():
+            if not key_tickers:
+                continue
+            path = None if prev_dir is None else os.path.join(prev_dir, f"{key}.parquet")
+            if path is None or not os.path.exists(path):
+                logging.warning(f"'{key}': {len(key_tickers)}개 티커는 원본도 이전 버전 데이터도 없어서 제외합니다.")
+                continue
+            carried_keys.append(key)
+            frames = _load_carried_frames(path, sorted(key_tickers))
+            if self.staging is not None:
+                for ticker, df in frames.items():
+                    self.staging.write_frame(key, ticker, df)
+            else:
+                carried[key] = frames
+        if carried_keys:
+            logging.info(f"원본이 없어서 이전 버전에서 가져옴: {', '.join(f'{k}({len(missing[k])})' for k in carried_keys)}")
+
+        # 후처리는 CPU 작업이므로 process로 나눠서 실행
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(
+                _rebuild_single_ticker,
+                repeat(raw_cache), tickers, repeat(data_types), repeat(fetch_dates),
+                chunksize=max(1, min(64, len(tickers) // (max_workers * 4))),
+            )
+            for ticker, (results_dict, fetched_dates) in tqdm(zip(tickers, results), total=len(tickers)):
+                if results_dict is None:
+                    continue
+                carried_types = [key for key in carried_keys if ticker in missing[key]]
+                for key in carried_types:
+                    if key in carried and ticker in carried[key]:
+                        results_dict[key] = carried[key][ticker]
+                self._append(ticker, results_dict, list(fetched_dates), carried_types, fetched_dates)
+
+    def _batch_ohlcv(
+        self,
+        tickers: list[str],
+        data_types_list: list[list[YFDataType]],
+        handle: Callable,
+        chunk_size: int | None,
+    ) -> tuple[list[list[YFDataType]], Callable]:
+        # ohlcv를 chunk로 먼저 받아 두고, 티커별 요청에서는 ohlcv를 빼고 결과에 끼워 넣음.
+        # batch에서 끝까지 실패한 티커는 티커별 요청으로 한 번 더 받음
+        if chunk_size is None:
+            return data_types_list, handle
+        done = set(self.staging.done_tickers()) if self.staging is not None else set()
+        need = [t for t, types in zip(tickers, data_types_list) if "ohlcv" in types and t not in done]
+        prices, failed = download_ohlcv_batched(need, chunk_size)
+        if self.raw_cache is not None:
+            for ticker, df in prices.items():
+                self.raw_cache.put(ticker, "ohlcv", df.droplevel("Ticker").drop(columns="Trading Value"))
+        data_types_list = [
+            [t for t in types if t != "ohlcv" or ticker not in prices] for ticker, types in zip(tickers, data_types_list)
+        ]
+
+        def batched_handle(ticker: str, results_dict: dict | None):
+            ohlcv = prices.pop(ticker, None)
+            if results_dict is not None and ohlcv is not None:
+                results_dict["ohlcv"] = ohlcv
+            handle(ticker, results_dict)
+
+        return data_types_list, batched_handle
+
+    def _run(
+        self,
+        tickers: list[str],
+        data_types_list: list[list[YFDataType]] | None,
+        handle: Callable[[str, dict | None], None],
+        max_workers: int,
+        engine: Literal["thread", "async"],
+        requests_per_second: float,
+        max_concurrency: int,
+    ):
+        # 티커마다 handle(ticker, 결과 dict 또는 None)을 호출.
+        # 메모리 모드는 입력 순서대로, staging 모드는 완료되는 순서대로 호출하고 결과를 바로 버림
+        if engine not in ("thread", "async"):
+            raise ValueError("engine must be 'thread' or 'async'.")
+        if data_types_list is None:
+            data_types_list = [None] * len(tickers)
+
+        jobs = list(zip(tickers, data_types_list))
+        ordered = self.staging is None
+        if not ordered:
+            done = set(self.staging.done_tickers())
+            if done:
+                logging.info(f"이미 완료된 {len(done)}개 티커는 건너뜁니다.")
+            jobs = [(ticker, data_types) for ticker, data_types in jobs if ticker not in done]
+
+        if engine == "async":
+            asyncio.run(self._download_async(jobs, handle, ordered, requests_per_second, max_concurrency))
+        else:
+            self._download_threads(jobs, handle, ordered, max_workers)
 
+    def _download_threads(self, jobs: list[tuple], handle: Callable, ordered: bool, max_workers: int):
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            for results_dict in tqdm(executor.map(_download_single_ticker, tickers), total=len(tickers)):
-                if results_dict is not None:
-                    for key, df in results_dict.items():
-                        self.data[key].append(df)
+            futures = {
+                executor.submit(_download_single_ticker, ticker, data_types=data_types, raw_cache=self.raw_cache): ticker
+                for ticker, data_types in jobs
+            }
+            completed = list(futures) if ordered else as_completed(futures)
+            for future in tqdm(completed, total=len(futures)):
+                handle(futures.pop(future), future.result())
 
-    def save(self, save_dir: str):
-        # Save data to parquet files
+    async def _download_async(
+        self, jobs: list[tuple], handle: Callable, ordered: bool, requests_per_second: float, max_concurrency: int
+    ):
+        limiter = AsyncTokenBucket(requests_per_second)
+        semaphore = asyncio.Semaphore(max_concurrency)
+        progress = tqdm(total=len(jobs))
+        loop = asyncio.get_running_loop()
+
+        async def worker(ticker: str, data_types: list | None):
+            async with semaphore:
+                result = await _download_single_ticker_async(
+                    ticker, limiter, executor, data_types=data_types, raw_cache=self.raw_cache
+                )
+                if not ordered:
+                    # 파일 쓰기가 event loop를 막지 않도록 executor에서 처리하고 결과는 들고 있지 않음
+                    await loop.run_in_executor(executor, handle, ticker, result)
+                    result = None
+            progress.update()
+            return result
+
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            # gather는 입력 순서대로 결과를 돌려주므로 thread 엔진과 self.data 순서가 같음
+            results = await asyncio.gather(*(worker(ticker, data_types) for ticker, data_types in jobs))
+        progress.close()
+
+        if ordered:
+            for (ticker, _), result in zip(jobs, results):
+                handle(ticker, result)
+
+    def _append(
+        self,
+        ticker: str,
+        results_dict: dict | None,
+        fetched_types: list[str] | None = None,
+        carried_types: list[str] | None = None,
+        fetched_dates: dict[str, pd.Timestamp] | None = None,
+    ):
+        if results_dict is None:
+            return
+        records = make_manifest_records(
+            ticker,
+            results_dict,
+            list(results_dict) if fetched_types is None else fetched_types,
+            self._fetched_on,
+            self._previous_manifest,
+            carried_types,
+        )
+        if fetched_dates is not None:  # rebuild: 원본을 받은 날짜로 기록
+            for record in records:
+                record["Last Fetched"] = fetched_dates.get(record["Data Type"], record["Last Fetched"])
+        if self.staging is not None:
+            self.staging.commit(ticker, results_dict, records)
+        else:
+            for key, df in results_dict.items():
+                self.data[key].append(df)
+            self.manifest += records
+
+    def save(self, save_dir: str | None = None, batch_rows: int = 200_000):
+        save_dir = self.save_dir if save_dir is None else save_dir
+        if self.staging is not None:
+            # staging에 쌓인 shard를 <key>.parquet로 합친 뒤 staging 폴더 삭제
+            self.staging.compact(save_dir, batch_rows)
+            self.staging.cleanup()
+            return
+
+        # Save data to parquet files (티커별 DataFrame을 한 번에 concat 하지 않고 row group 단위로 씀)
         os.makedirs(save_dir, exist_ok=True)
         for key, df_list in self.data.items():
             if df_list:
-                combined_df = pd.concat(df_list, axis=0)
                 save_path = os.path.join(save_dir, f"{key}.parquet")
-                combined_df.to_parquet(save_path)
+                write_parquet_stream(lambda: df_list, save_path, batch_rows)
+        if self.manifest:
+            records_to_manifest(self.manifest).to_parquet(os.path.join(save_dir, MANIFEST_FILE))
+
+
+def _load_carried_frames(
+    path: str, tickers: list[str], renamed: dict[str, str] | None = None
+) -> dict[str, pd.DataFrame]:
+    # 이전 버전 parquet에서 tickers에 해당하는 행만 읽어 티커별로 나눔
+    # renamed: {이전 티커: 새 티커}. 이전 버전에는 이전 티커로 저장되어 있으므로 이전 티커로 읽어서 새 티커로 바꿈
+    renamed = renamed or {}
+    previous = {new: old for old, new in renamed.items()}
+    df = pd.read_parquet(path, filters=[("Ticker", "in", [previous.get(ticker, ticker) for ticker in tickers])])
+    if renamed:
+        df = df.rename(index=renamed, level="Ticker")
+    return {ticker: group for ticker, group in df.groupby(level="Ticker", sort=False)}
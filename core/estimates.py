@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+
+AGGREGATIONS = ["this", "next", "mean", "min", "max", "cagr"]
+
+
+class EstimatesMatrix:
+    """
+    estimates를 (티커, 티커별 Fiscal Period 순번) 2차원 배열로 한 번 펼쳐 두고, 집계를 numpy 연산 한 번으로 계산합니다.
+
+    순번 0이 this year, 1이 next year이며 groupby("Ticker").nth()와 같은 기준입니다.
+    해당 순번의 행이 없는 티커는 결과에서 빠지고(nth와 동일), 값이 NaN인 행은 mean/min/max에서 제외되고 cagr에서는 NaN이 됩니다.
+    """
+    def __init__(self, estimates: pd.DataFrame, columns: list[str] | None = None):
+        estimates = estimates.sort_index()
+        columns = list(estimates.columns) if columns is None else columns
+        codes, self.tickers = pd.factorize(estimates.index.get_level_values("Ticker"), sort=True)
+        self.tickers.name = "Ticker"
+        estimates, codes = estimates[codes >= 0], codes[codes >= 0]  # 티커가 비어 있는 행 제외 (groupby와 동일)
+
+        # 정렬되어 있으므로 티커가 바뀌는 위치부터 순번을 다시 셈
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        positions = np.arange(len(codes)) - np.repeat(starts, np.diff(np.r_[starts, len(codes)]))
+        shape = (len(self.tickers), positions.max() + 1 if len(positions) else 0)
+
+        self.exists = np.zeros(shape, dtype=bool)
+        self.exists[codes, positions] = True
+        self.fiscal_periods = np.full(shape, None, dtype=object)
+        self.fiscal_periods[codes, positions] = estimates.index.get_level_values("Fiscal Period").to_numpy()
+        self.values = {}
+        for col in columns:
+            matrix = np.full(shape, np.nan)
+            matrix[codes, positions] = estimates[col].to_numpy(dtype=float, na_value=np.nan)
+            self.values[col] = matrix
+
+    def aggregate(self, column: str, how: int | str) -> pd.Series:
+        # how: 0(this), 1(next), ... , "mean", "max", "min", "cagr"("gmean")
+        matrix = self.values[column]
+        how = how.lower() if isinstance(how, str) else how
+        how = {"this": 0, "next": 1, "gmean": "cagr"}.get(how, how)
+
+        if isinstance(how, (int, np.integer)):
+            if how >= matrix.shape[1]:
+                return pd.Series(dtype=float, index=self.tickers[:0], name=column)
+            has_row = self.exists[:, how]
+            return pd.Series(matrix[has_row, how], index=self.tickers[has_row], name=column)
+
+        valid = ~np.isnan(matrix)
+        count = valid.sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            if how == "mean":
+                result = np.where(valid, matrix, 0.0).sum(axis=1) / count
+            elif how == "max":
+                result = np.where(count > 0, np.where(valid, matrix, -np.inf).max(axis=1), np.nan)
+            elif how == "min":
+                result = np.where(count > 0, np.where(valid, matrix, np.inf).min(axis=1), np.nan)
+            elif how == "cagr":
+                # 기하평균(1 + 성장률) - 1, 없는 순번은 빼고 NaN이나 -100% 미만 성장률이 있으면 NaN
+                logs = np.where(self.exists, np.log(matrix + 1), 0.0)
+                result = np.exp(logs.sum(axis=1) / self.exists.sum(axis=1)) - 1
+            else:
+                raise ValueError("growth_agg must be 'mean', 'cagr', 'max' or 'min'.")
+        return pd.Series(result, index=self.tickers, name=column)
+
+    def summary(self, columns: list[str] | None = None) -> pd.DataFrame:
+        # 모든 컬럼 x 집계를 한 DataFrame으로 (컬럼 이름: "<column> (<aggregation>)")
+        columns = list(self.values) if columns is None else columns
+        return pd.DataFrame({
+            f"{col} ({how})": self.aggregate(col, how) for col in columns for how in AGGREGATIONS
+        }, index=self.tickers)
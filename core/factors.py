@@ -0,0 +1,114 @@
+from typing import Literal
+
+import numpy as np
+import pandas as pd
+
+# 4개 분기의 첫 분기말과 마지막 분기말 간격(일)이 이 범위면 연속된 4개 분기로 봄
+_TTM_SPAN_DAYS = (240, 300)
+
+
+def ttm(quarterly: pd.DataFrame, how: Literal["sum", "mean"] = "sum", columns: list[str] | None = None) -> pd.DataFrame:
+    """
+    분기 재무제표(Ticker, As Of Date)의 최근 4개 분기 합(손익/현금흐름) 또는 평균(재무상태표)을 모든 분기에 대해 계산합니다.
+
+    티커별로 정렬한 배열을 1~3칸씩 밀어서 한 번에 계산하며, 4개 분기 중 하나라도 없거나(분기 누락, 다른 티커)
+    값이 NaN이면 해당 분기의 TTM은 NaN입니다.
+
+    Returns:
+        quarterly와 같은 index의 DataFrame입니다. (정렬됨)
+    """
+    quarterly = quarterly.sort_index()
+    columns = list(quarterly.columns) if columns is None else columns
+    values = quarterly[columns].to_numpy(dtype=float)
+    tickers = quarterly.index.get_level_values("Ticker").to_numpy()
+    dates = pd.to_datetime(quarterly.index.get_level_values("As Of Date")).to_numpy()
+
+    n = len(values)
+    total = values.copy()
+    for lag in range(1, 4):
+        shifted = np.full_like(values, np.nan)
+        shifted[lag:] = values[:-lag]
+        total += shifted
+
+    valid = np.zeros(n, dtype=bool)
+    if n > 3:
+        span = (dates[3:] - dates[:-3]) / np.timedelta64(1, "D")
+        valid[3:] = (tickers[3:] == tickers[:-3]) & (span >= _TTM_SPAN_DAYS[0]) & (span <= _TTM_SPAN_DAYS[1])
+    total[~valid] = np.nan
+    if how == "mean":
+        total /= 4
+    return pd.DataFrame(total, index=quarterly.index, columns=columns)
+
+
+def latest(df: pd.DataFrame) -> pd.DataFrame:
+    # 티커별 TTM 값이 하나라도 있는 가장 최근 분기 (As Of Date 컬럼으로 남김)
+    df = df[df.notna().any(axis=1)]
+    df = df.groupby(level="Ticker").tail(1)
+    return df.reset_index(level="As Of Date")
+
+
+def _col(df: pd.DataFrame, name: str) -> pd.Series:
+    return df[name] if name in df.columns else pd.Series(np.nan, index=df.index)
+
+
+def free_cash_flow(cash_flow: pd.DataFrame) -> pd.Series:
+    # Free Cash Flow가 없으면 Operating Cash Flow + Capital Expenditure(음수)로 계산
+    return _col(cash_flow, "Free Cash Flow").fillna(
+        _col(cash_flow, "Operating Cash Flow") + _col(cash_flow, "Capital Expenditure")
+    )
+
+
+def make_factors(
+    income_statement_quarter: pd.DataFrame,
+    balance_sheet_quarter: pd.DataFrame,
+    cash_flow_quarter: pd.DataFrame,
+    info: pd.DataFrame,
+) -> pd.DataFrame:
+    """
+    분기 재무제표의 TTM 값으로 티커별 factor를 계산합니다. (README Valuation 기법 정리 참고)
+
+        NOPAT = EBIT * (1 - Tax Rate)
+        ROIC (Operating IC) = NOPAT / (Working Capital + Net PPE)
+        ROIC (Financing IC) = NOPAT / (Stockholders Equity + Total Debt)  # Yahoo Finance 방식
+        FCF Yield = FCF / Market Cap
+
+    손익/현금흐름은 최근 4개 분기 합, 재무상태표는 최근 4개 분기 평균을 사용합니다.
+
+    Returns:
+        info index의 DataFrame입니다.
+    """
+    rate_cols = [c for c in income_statement_quarter.columns if c == "Tax Rate For Calcs"]
+    income = ttm(income_statement_quarter.drop(columns=rate_cols))
+    income[rate_cols] = ttm(income_statement_quarter, how="mean", columns=rate_cols)  # 세율은 평균
+    income = latest(income)
+    balance = latest(ttm(balance_sheet_quarter, how="mean"))
+    cash_flow = latest(ttm(cash_flow_quarter))
+
+    factors = pd.DataFrame(index=info.index)
+    revenue = _col(income, "Total Revenue").reindex(factors.index)
+    revenue = revenue.where(revenue > 0)
+    ebit = _col(income, "EBIT").reindex(factors.index)
+
+    # 세율은 Tax Rate For Calcs, 없으면 Tax Provision / Pretax Income (0~100%)
+    implied_tax = (_col(income, "Tax Provision") / _col(income, "Pretax Income").where(lambda x: x > 0)).clip(0, 1)
+    tax = _col(income, "Tax Rate For Calcs").fillna(implied_tax).reindex(factors.index)
+    nopat = ebit * (1 - tax)
+
+    fcf = free_cash_flow(cash_flow).reindex(factors.index)
+    operating_ic = (_col(balance, "Working Capital") + _col(balance, "Net PPE")).reindex(factors.index)
+    financing_ic = (_col(balance, "Stockholders Equity") + _col(balance, "Total Debt")).reindex(factors.index)
+    market_cap = pd.to_numeric(info["Market Cap"].replace("", np.nan), errors="coerce")
+
+    factors["TTM As Of Date"] = pd.to_datetime(income["As Of Date"]).reindex(factors.index)
+    factors["TTM Revenue"] = revenue
+    factors["TTM EBIT"] = ebit
+    factors["TTM NOPAT"] = nopat
+    factors["TTM Free Cash Flow"] = fcf
+    factors["ROIC (Operating IC)"] = nopat / operating_ic.where(operating_ic > 0)
+    factors["ROIC (Financing IC)"] = nopat / financing_ic.where(financing_ic > 0)
+    factors["FCF Yield"] = fcf / market_cap.where(market_cap > 0)
+    factors["Gross Margin"] = _col(income, "Gross Profit").reindex(factors.index) / revenue
+    factors["Operating Margin"] = _col(income, "Operating Income").reindex(factors.index) / revenue
+    factors["Net Margin"] = _col(income, "Net Income").reindex(factors.index) / revenue
+    factors["FCF Margin"] = fcf / revenue
+    return factors
@@ -0,0 +1,112 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+PANEL_INDEX = ["Version", "Ticker", "Fiscal Period"]
+
+
+def _read_version(
+    read_table: Callable[[str, str, list[str] | None], pd.DataFrame],
+    version: str,
+    columns: list[str] | None,
+    info_columns: list[str] | None,
+) -> pd.DataFrame:
+    estimates = read_table(version, "estimates", columns)
+    # 예전 버전은 같은 index가 중복 저장된 경우가 있고, Fiscal Period가 Timestamp/date로 섞여 있음
+    estimates = estimates[~estimates.index.duplicated(keep="last")]
+    fiscal_period = pd.to_datetime(estimates.index.get_level_values("Fiscal Period"))
+    estimates = estimates.set_axis(
+        pd.MultiIndex.from_arrays([estimates.index.get_level_values("Ticker"), fiscal_period]), axis=0
+    )
+    estimates = estimates.sort_index()
+    if columns is not None:
+        estimates = estimates.reindex(columns=columns)  # 버전마다 컬럼 구성이 다를 수 있음
+    if info_columns:
+        info = read_table(version, "info", info_columns).reindex(columns=info_columns)
+        estimates = estimates.join(info, on="Ticker")
+    return estimates
+
+
+def load_history_panel(
+    read_table: Callable[[str, str, list[str] | None], pd.DataFrame],
+    versions: list[str],
+    columns: list[str] | None = None,
+    info_columns: list[str] | None = None,
+    max_workers: int = 8,
+) -> pd.DataFrame:
+    """
+    여러 버전의 estimates(와 info 컬럼)를 읽어서 하나의 (Version, Ticker, Fiscal Period) panel로 만듭니다.
+
+    Args:
+        read_table: (version, name, columns)를 받아 해당 버전의 테이블을 읽는 함수입니다.
+        versions: 읽을 버전(yymmdd) 목록입니다.
+        columns: 읽을 estimates 컬럼입니다. None이면 전체입니다.
+        info_columns: 티커별로 붙일 info 컬럼입니다. (e.g. ["Sector"])
+        max_workers: 버전을 동시에 읽을 thread 수입니다.
+
+    Returns:
+        Fiscal Period는 datetime64로 통일된, Version 순으로 정렬된 DataFrame입니다.
+    """
+    versions = sorted(versions)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        frames = list(executor.map(lambda v: _read_version(read_table, v, columns, info_columns), versions))
+    panel = pd.concat(frames, keys=versions, names=["Version"])
+    panel.index = panel.index.set_names(PANEL_INDEX)
+    return panel.sort_index()
+
+
+def _version_matrix(panel: pd.DataFrame, column: str) -> pd.DataFrame:
+    # (Ticker, Fiscal Period) x Version 행렬 (버전 순서대로 shift 하기 위함)
+    return panel[column].unstack("Version")
+
+
+def revision_trend(panel: pd.DataFrame, column: str = "EPS YoY Growth", weeks: int = 3) -> pd.Series:
+    """
+    README의 성장률 추적 아이디어: (이번 추정치) / (weeks 버전 전 추정치) - 1
+
+    같은 (Ticker, Fiscal Period)의 추정치를 weeks 버전 전과 비교하며, 이전 값이 없거나 0이면 NaN입니다.
+    """
+    matrix = _version_matrix(panel, column)
+    prev = matrix.shift(weeks, axis=1)
+    trend = matrix / prev.where(prev != 0) - 1
+    trend = trend.stack(future_stack=True).reorder_levels(PANEL_INDEX)
+    return trend.reindex(panel.index).rename(f"{column} {weeks}W Trend")
+
+
+def revision_breadth(
+    panel: pd.DataFrame,
+    column: str = "EPS Estimate",
+    weeks: int = 1,
+    forward: int = 0,
+    group: str = "Sector",
+) -> pd.DataFrame:
+    """
+    그룹별 추정치 상향/하향 비율입니다. breadth = (상향 티커 수 - 하향 티커 수) / 비교 가능한 티커 수
+
+    Args:
+        panel: group 컬럼이 포함된 load_history_panel 결과입니다.
+        column: 비교할 추정치 컬럼입니다.
+        weeks: 몇 버전 전 추정치와 비교할지입니다.
+        forward: 각 버전에서 몇 번째 Fiscal Period를 볼지입니다. (0 = this year, 1 = next year)
+        group: 묶을 컬럼입니다. (e.g. "Sector", "Industry")
+
+    Returns:
+        (Version, group) index, ["Up", "Down", "Total", "Breadth"] 컬럼의 DataFrame입니다.
+    """
+    matrix = _version_matrix(panel, column)
+    diff = np.sign(matrix - matrix.shift(weeks, axis=1))
+    diff = diff.stack(future_stack=True).reorder_levels(PANEL_INDEX).reindex(panel.index)
+
+    nth = panel.groupby(["Version", "Ticker"]).cumcount() == forward
+    df = pd.DataFrame({
+        "Version": panel.index.get_level_values("Version"),
+        group: panel[group].replace("", None).to_numpy(),  # 그룹이 비어 있는 티커는 제외
+        "Up": (diff > 0).to_numpy(),
+        "Down": (diff < 0).to_numpy(),
+        "Total": diff.notna().to_numpy(),
+    })[nth.to_numpy()]
+    breadth = df.groupby(["Version", group]).sum()
+    breadth["Breadth"] = (breadth["Up"] - breadth["Down"]) / breadth["Total"].where(breadth["Total"] > 0)
+    return breadth
@@ -0,0 +1,123 @@
+import numpy as np
+
+from core.ohlcv_panel import OhlcvPanel
+
+# (티커 x 날짜) 배열에 대한 rolling 계산. 날짜 축(axis=1)으로 누적합을 한 번 구해서 window 차이로 계산하며,
+# window 안에 NaN이 하나라도 있으면 결과는 NaN입니다.
+
+
+def shift(x: np.ndarray, periods: int = 1) -> np.ndarray:
+    out = np.full_like(x, np.nan, dtype=float)
+    if periods > 0:
+        out[:, periods:] = x[:, :-periods]
+    elif periods < 0:
+        out[:, :periods] = x[:, -periods:]
+    else:
+        out[:] = x
+    return out
+
+
+def _window_diff(cumsum: np.ndarray, window: int) -> np.ndarray:
+    # cumsum은 앞에 0 열을 붙인 누적합 (티커 x (날짜 + 1))
+    out = np.full((cumsum.shape[0], cumsum.shape[1] - 1), np.nan)
+    out[:, window - 1:] = cumsum[:, window:] - cumsum[:, :-window]
+    return out
+
+
+def _cumsum(x: np.ndarray) -> np.ndarray:
+    out = np.zeros((x.shape[0], x.shape[1] + 1))
+    np.cumsum(x, axis=1, out=out[:, 1:])
+    return out
+
+
+def rolling_sum(x: np.ndarray, window: int) -> np.ndarray:
+    missing = np.isnan(x)
+    total = _window_diff(_cumsum(np.where(missing, 0.0, x)), window)
+    n_missing = _window_diff(_cumsum(missing.astype(float)), window)
+    total[n_missing > 0] = np.nan
+    return total
+
+
+def rolling_mean(x: np.ndarray, window: int) -> np.ndarray:
+    return rolling_sum(x, window) / window
+
+
+def rolling_std(x: np.ndarray, window: int, ddof: int = 0) -> np.ndarray:
+    # 누적 제곱합의 자릿수 손실을 줄이려고 티커별 평균을 뺀 값으로 계산
+    count = (~np.isnan(x)).sum(axis=1, keepdims=True)
+    centered = x - np.nansum(x, axis=1, keepdims=True) / np.maximum(count, 1)
+    mean = rolling_mean(centered, window)
+    var = (rolling_sum(centered ** 2, window) - window * mean ** 2) / (window - ddof)
+    return np.sqrt(np.clip(var, 0, None))
+
+
+def sma(close: np.ndarray, window: int = 20) -> np.ndarray:
+    return rolling_mean(close, window)
+
+
+def bollinger_pct_b(close: np.ndarray, window: int = 20, num_std: float = 2.0) -> np.ndarray:
+    # %b = (종가 - 하단 밴드) / (상단 밴드 - 하단 밴드)
+    mid = rolling_mean(close, window)
+    band = num_std * rolling_std(close, window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (close - (mid - band)) / (2 * band)
+
+
+def disparity(close: np.ndarray, window: int = 20) -> np.ndarray:
+    # 이격도 = 종가 / 이동평균 * 100
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return close / rolling_mean(close, window) * 100
+
+
+def ratio_to_history(x: np.ndarray, window: int = 20) -> np.ndarray:
+    # 당일 값 / 직전 window일 평균 (e.g. 과거 대비 거래량 증가)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        prev_mean = shift(rolling_mean(x, window), 1)
+        return x / np.where(prev_mean > 0, prev_mean, np.nan)
+
+
+def pct_change(x: np.ndarray, periods: int = 1) -> np.ndarray:
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return x / shift(x, periods) - 1
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    # 전일 종가가 없으면 고가 - 저가
+    prev_close = shift(close, 1)
+    high_low = high - low
+    gap = np.fmax(np.abs(high - prev_close), np.abs(low - prev_close))
+    return np.where(np.isnan(high_low), np.nan, np.fmax(high_low, gap))
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, window: int = 14) -> np.ndarray:
+    # True Range의 단순 이동평균 (Wilder 평활 대신 SMA)
+    return rolling_mean(true_range(high, low, close), window)
+
+
+def compute_indicators(
+    panel: OhlcvPanel,
+    bollinger_window: int = 20,
+    disparity_windows: list[int] = (5, 20, 60),
+    ratio_window: int = 20,
+    atr_window: int = 14,
+) -> dict[str, np.ndarray]:
+    """
+    ohlcv panel에서 기본 차트 지표들을 한 번에 계산합니다.
+
+    Returns:
+        {지표 이름: (티커 x 날짜) 배열} 입니다. panel.last()로 최근 값, panel.to_long()으로 ohlcv 형태로 바꿀 수 있습니다.
+    """
+    close, volume, trading_value = panel["Close"], panel["Volume"], panel["Trading Value"]
+    indicators = {
+        f"%b ({bollinger_window})": bollinger_pct_b(close, bollinger_window),
+        "Return (1D)": pct_change(close, 1),
+        f"Return ({ratio_window}D)": pct_change(close, ratio_window),
+        f"Volume Ratio ({ratio_window})": ratio_to_history(volume, ratio_window),
+        f"Trading Value Ratio ({ratio_window})": ratio_to_history(trading_value, ratio_window),
+        f"ATR ({atr_window})": atr(panel["High"], panel["Low"], close, atr_window),
+    }
+    for window in disparity_windows:
+        indicators[f"Disparity ({window})"] = disparity(close, window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        indicators[f"ATR % ({atr_window})"] = indicators[f"ATR ({atr_window})"] / close
+    return indicators
@@ -0,0 +1,138 @@
+import os
+
+import pandas as pd
+
+MANIFEST_FILE = "manifest.parquet"
+MANIFEST_COLUMNS = ["Last Fetched", "Last As Of Date", "Next Earnings Date"]
+
+# 매주 값이 바뀌므로 항상 새로 받는 데이터
+ALWAYS_REFRESH = ("info", "estimates", "ohlcv")
+
+# 재무제표 보고 주기(일)
+STATEMENT_PERIOD_DAYS = {
+    "income_statement": 365,
+    "income_statement_quarter": 91,
+    "balance_sheet": 365,
+    "balance_sheet_quarter": 91,
+    "cash_flow": 365,
+    "cash_flow_quarter": 91,
+}
+
+
+def list_versions(root: str) -> list[str]:
+    # root 안의 yymmdd 버전 폴더 이름 (오래된 순, _staging 등 다른 폴더는 제외)
+    # 다운로드 전에 universe만 저장된 폴더나 중단된 폴더는 info.parquet가 없으므로 버전으로 보지 않음
+    if not os.path.isdir(root):
+        return []
+    return sorted(
+        f for f in os.listdir(root)
+        if len(f) == 6 and f.isdigit() and os.path.exists(os.path.join(root, f, "info.parquet"))
+    )
+
+
+def find_previous_version(root: str, before: str) -> str | None:
+    # root 안에서 before(yymmdd)보다 이전인 가장 최근 버전 폴더 이름
+    versions = [f for f in list_versions(root) if f < before]
+    return versions[-1] if versions else None
+
+
+def load_manifest(version_dir: str) -> pd.DataFrame | None:
+    path = os.path.join(version_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    return pd.read_parquet(path)
+
+
+def plan_refresh(
+    tickers: list[str],
+    data_types: list[str],
+    manifest: pd.DataFrame | None,
+    available_types: list[str],
+    today: pd.Timestamp,
+    max_age_days: int = 91,
+    filing_lag_days: int = 45,
+    earnings_settle_days: int = 7,
+) -> dict[str, list[str]]:
+    """
+    티커별로 새로 받아야 하는 데이터 타입을 정합니다. 나머지는 이전 버전에서 그대로 가져옵니다.
+
+    재무제표는 아래 중 하나라도 해당하면 다시 받습니다.
+        - manifest에 기록이 없거나, 마지막으로 받은 지 max_age_days 이상 지남
+        - 마지막으로 받은 이후 실적 발표일이 지났음 (발표 후 earnings_settle_days 동안은 계속 확인)
+        - 실적 발표일을 모르는데 마지막 As Of Date 이후 한 주기 + filing_lag_days가 지났음
+        - 이전 버전에 해당 데이터 파일이 없음
+
+    Returns:
+        {ticker: [data_type, ...]} (data_types 순서 유지)
+    """
+    today = pd.Timestamp(today).normalize()
+    statement_types = [t for t in data_types if t in STATEMENT_PERIOD_DAYS]
+    pairs = pd.MultiIndex.from_product([tickers, statement_types], names=["Ticker", "Data Type"])
+    if manifest is None:
+        manifest = pd.DataFrame(columns=MANIFEST_COLUMNS, index=pairs[:0], dtype="datetime64[ns]")
+    m = manifest.reindex(pairs)
+
+    last_fetched = pd.to_datetime(m["Last Fetched"])
+    last_as_of = pd.to_datetime(m["Last As Of Date"])
+    earnings = pd.to_datetime(m["Next Earnings Date"])
+    types = pairs.get_level_values("Data Type")
+    period = pd.to_timedelta(types.map(STATEMENT_PERIOD_DAYS).to_numpy(), unit="D")
+
+    stale = last_fetched.isna() | (today - last_fetched >= pd.Timedelta(days=max_age_days))
+    reported = (earnings <= today) & (last_fetched < earnings + pd.Timedelta(days=earnings_settle_days))
+    overdue = earnings.isna() & (today >= last_as_of + period + pd.Timedelta(days=filing_lag_days))
+    unavailable = ~types.isin(available_types)
+    needs_fetch = (stale | reported | overdue | unavailable).to_numpy().reshape(len(tickers), len(statement_types))
+
+    always = [t for t in data_types if t not in STATEMENT_PERIOD_DAYS]
+    plan = {}
+    for ticker, row in zip(tickers, needs_fetch):
+        fetch = set(always) | {t for t, need in zip(statement_types, row) if need}
+        plan[ticker] = [t for t in data_types if t in fetch]
+    return plan
+
+
+def make_manifest_records(
+    ticker: str,
+    frames: dict[str, pd.DataFrame],
+    fetched_types: list[str],
+    fetched_on: pd.Timestamp,
+    previous: pd.DataFrame | None = None,
+    carried_types: list[str] | None = None,
+) -> list[dict]:
+    # 새로 받은 데이터는 오늘 날짜로, 이전 버전에서 가져온 데이터는 이전 기록을 그대로 유지
+    next_earnings = pd.NaT
+    info = frames.get("info")
+    if info is not None and "Earnings Timestamp" in info.columns:
+        next_earnings = pd.to_datetime(info["Earnings Timestamp"].iloc[0])
+
+    # 이전 버전에 행이 없어 frames에 빠진 타입도 기록을 남겨야 매주 다시 받지 않음
+    keys = list(frames) + [t for t in (carried_types or []) if t not in frames]
+    records = []
+    for key in keys:
+        df = frames.get(key)
+        if key in fetched_types:
+            last_fetched = fetched_on
+            if df is not None and "As Of Date" in df.index.names and len(df):
+                last_as_of = pd.Timestamp(df.index.get_level_values("As Of Date").max())
+            else:
+                last_as_of = pd.NaT
+        elif previous is not None and (ticker, key) in previous.index:
+            last_fetched, last_as_of = previous.loc[(ticker, key), ["Last Fetched", "Last As Of Date"]]
+        else:
+            last_fetched, last_as_of = pd.NaT, pd.NaT
+        records.append({
+            "Ticker": ticker,
+            "Data Type": key,
+            "Last Fetched": last_fetched,
+            "Last As Of Date": last_as_of,
+            "Next Earnings Date": next_earnings,
+        })
+    return records
+
+
+def records_to_manifest(records: list[dict]) -> pd.DataFrame:
+    manifest = pd.DataFrame.from_records(records, columns=["Ticker", "Data Type"] + MANIFEST_COLUMNS)
+    for col in MANIFEST_COLUMNS:
+        manifest[col] = pd.to_datetime(manifest[col])
+    return manifest.set_index(["Ticker", "Data Type"])
@@ -0,0 +1,144 @@
+import os
+import json
+import shutil
+
+import numpy as np
+import pandas as pd
+
+OHLCV_FIELDS = ["Open", "High", "Low", "Close", "Volume", "Trading Value"]
+PANEL_DATA_FILE = "data.npy"
+PANEL_INDEX_FILE = "index.json"
+
+
+class OhlcvPanel:
+    """
+    (Ticker, Date) index의 ohlcv를 (티커 x 날짜 x 필드) 배열로 펼친 panel입니다.
+
+    모든 티커가 같은 날짜 축을 쓰며, 거래가 없는 날(상장 전, 거래 정지 등)은 NaN입니다.
+    save()로 저장한 panel은 open()으로 memory map해서 쓰며, 다른 프로세스로 넘길 때(pickle)도
+    배열 대신 경로만 넘기므로 여러 프로세스가 같은 파일을 복사 없이 공유합니다.
+    """
+    def __init__(self, data: np.ndarray, tickers: pd.Index, dates: pd.DatetimeIndex, fields: list[str]):
+        self.data = data
+        self.tickers = pd.Index(tickers, name="Ticker")
+        self.dates = pd.DatetimeIndex(dates, name="Date")
+        self.fields = list(fields)
+        self._field_idx = {field: i for i, field in enumerate(self.fields)}
+        self._source = None  # memory map한 panel이면 (경로, 시작 날짜 위치, 끝 날짜 위치)
+
+    @classmethod
+    def from_frame(
+        cls,
+        ohlcv: pd.DataFrame,
+        fields: list[str] | None = None,
+        dtype=np.float64,
+        path: str | None = None,
+    ) -> "OhlcvPanel":
+        # path를 주면 float32 파일에 바로 펼쳐서 저장하고 memory map한 panel을 반환
+        fields = [f for f in OHLCV_FIELDS if f in ohlcv.columns] if fields is None else fields
+        ticker_codes, tickers = pd.factorize(ohlcv.index.get_level_values("Ticker"), sort=True)
+        date_codes, dates = pd.factorize(ohlcv.index.get_level_values("Date"), sort=True)
+        shape = (len(tickers), len(dates), len(fields))
+
+        if path is None:
+            data = np.full(shape, np.nan, dtype=dtype)
+            data[ticker_codes, date_codes] = ohlcv[fields].to_numpy(dtype=dtype)
+            return cls(data, tickers, dates, fields)
+
+        tmp_path = _prepare_tmp_dir(path)
+        data = np.lib.format.open_memmap(os.path.join(tmp_path, PANEL_DATA_FILE), mode="w+", dtype=np.float32, shape=shape)
+        data[:] = np.nan
+        data[ticker_codes, date_codes] = ohlcv[fields].to_numpy(dtype=np.float32)
+        data.flush()
+        del data
+        _write_index(tmp_path, tickers, dates, fields)
+        _commit_tmp_dir(tmp_path, path)
+        return cls.open(path)
+
+    def save(self, path: str) -> "OhlcvPanel":
+        # float32 .npy + index.json으로 저장하고 memory map한 panel을 반환
+        tmp_path = _prepare_tmp_dir(path)
+        np.save(os.path.join(tmp_path, PANEL_DATA_FILE), self.data.astype(np.float32, copy=False))
+        _write_index(tmp_path, self.tickers, self.dates, self.fields)
+        _commit_tmp_dir(tmp_path, path)
+        return self.open(path)
+
+    @classmethod
+    def open(cls, path: str) -> "OhlcvPanel":
+        # 읽기 전용 memory map (파일을 읽어 들이지 않음)
+        with open(os.path.join(path, PANEL_INDEX_FILE), encoding="utf-8") as f:
+            index = json.load(f)
+        dates = pd.DatetimeIndex(np.array(index["dates"], dtype="datetime64[ns]"))
+        if index["tz"] is not None:
+            dates = dates.tz_localize("UTC").tz_convert(index["tz"])
+        data = np.load(os.path.join(path, PANEL_DATA_FILE), mmap_mode="r")
+        panel = cls(data, pd.Index(index["tickers"]), dates, index["fields"])
+        panel._source = (path, 0, len(dates))
+        return panel
+
+    def __reduce__(self):
+        if self._source is not None:
+            return _reopen, self._source
+        return OhlcvPanel, (self.data, self.tickers, self.dates, self.fields)
+
+    @property
+    def shape(self) -> tuple[int, int, int]:
+        return self.data.shape
+
+    def __getitem__(self, field: str) -> np.ndarray:
+        # (티커 x 날짜) 배열 (view)
+        return self.data[:, :, self._field_idx[field]]
+
+    def to_frame(self, values: np.ndarray, name: str | None = None) -> pd.DataFrame:
+        # (티커 x 날짜) 배열을 Ticker index, Date 컬럼의 DataFrame으로
+        return pd.DataFrame(values, index=self.tickers, columns=self.dates).rename_axis(columns=name)
+
+    def to_long(self, arrays: dict[str, np.ndarray], dropna: bool = True) -> pd.DataFrame:
+        # {이름: (티커 x 날짜) 배열}을 ohlcv와 같은 (Ticker, Date) index의 DataFrame으로
+        index = pd.MultiIndex.from_product([self.tickers, self.dates])
+        df = pd.DataFrame({name: values.ravel() for name, values in arrays.items()}, index=index)
+        return df.dropna(how="all") if dropna else df
+
+    def last(self, arrays: dict[str, np.ndarray]) -> pd.DataFrame:
+        # 티커별 마지막 날짜의 값 (Ticker index)
+        return pd.DataFrame({name: values[:, -1] for name, values in arrays.items()}, index=self.tickers)
+
+    def slice_dates(self, start=None, end=None) -> "OhlcvPanel":
+        return self._slice(*self.dates.slice_locs(start, end))
+
+    def _slice(self, lo: int, hi: int) -> "OhlcvPanel":
+        panel = OhlcvPanel(self.data[:, lo:hi], self.tickers, self.dates[lo:hi], self.fields)
+        if self._source is not None:
+            path, offset, _ = self._source
+            panel._source = (path, offset + lo, offset + hi)
+        return panel
+
+
+def _reopen(path: str, lo: int, hi: int) -> OhlcvPanel:
+    panel = OhlcvPanel.open(path)
+    return panel if (lo, hi) == (0, len(panel.dates)) else panel._slice(lo, hi)
+
+
+def _prepare_tmp_dir(path: str) -> str:
+    tmp_path = f"{os.path.normpath(path)}.tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    return tmp_path
+
+
+def _commit_tmp_dir(tmp_path: str, path: str):
+    # 다 쓴 뒤에 폴더를 바꿔서 읽는 쪽이 쓰다 만 파일을 보지 않도록 함
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+
+
+def _write_index(path: str, tickers: pd.Index, dates: pd.DatetimeIndex, fields: list[str]):
+    dates = pd.DatetimeIndex(dates)
+    index = {
+        "tickers": [str(t) for t in tickers],
+        "dates": dates.as_unit("ns").asi8.tolist(),  # tz가 있으면 UTC 기준
+        "tz": None if dates.tz is None else str(dates.tz),
+        "fields": list(fields),
+    }
+    with open(os.path.join(path, PANEL_INDEX_FILE), "w", encoding="utf-8") as f:
+        json.dump(index, f)
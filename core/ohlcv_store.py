@@ -0,0 +1,260 @@
+import os
+import time
+import random
+import logging
+from glob import glob
+from typing import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+import yfinance as yf
+
+OHLCV_STATE_FILE = "state.parquet"
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+_EVENT_COLUMNS = ["Dividends", "Stock Splits"]
+_COMPACTED_FILE = "part-compacted.parquet"
+_STATE_DTYPES = {
+    "First Date": "datetime64[ns]",
+    "Last Date": "datetime64[ns]",
+    "Last Close": float,
+    "Check Date": "datetime64[ns]",
+    "Check Close": float,
+    "Generation": np.int64,
+}
+
+
+def fetch_history(ticker: str, start: pd.Timestamp | None = None, period: str = "1y") -> pd.DataFrame:
+    # yfinance 수정주가 일봉. start가 있으면 start(포함)부터 오늘까지만 요청
+    yf_ticker = yf.Ticker(ticker)
+    if start is None:
+        return yf_ticker.history(period=period, raise_errors=True)
+    return yf_ticker.history(start=start.strftime("%Y-%m-%d"), raise_errors=True)
+
+
+def period_start(period: str, today: pd.Timestamp | None = None) -> pd.Timestamp:
+    # yfinance period 문자열(e.g. "1y", "6mo", "5d")의 시작일
+    today = pd.Timestamp.today().normalize() if today is None else today
+    units = {"y": "years", "mo": "months", "d": "days"}
+    for suffix, unit in units.items():
+        if period.endswith(suffix) and period[:-len(suffix)].isdigit():
+            return today - pd.DateOffset(**{unit: int(period[:-len(suffix)])})
+    raise ValueError(f"Unsupported period: {period}")
+
+
+def _fetch_with_retry(fetch_func: Callable, ticker: str, start, period: str, max_retries: int) -> pd.DataFrame | None:
+    for retry in range(max_retries):
+        try:
+            return fetch_func(ticker, start, period)
+        except Exception as e:
+            logging.warning(f"'{ticker}' ohlcv 요청 실패 → 재시도: {e}")
+            time.sleep((2 ** retry) + random.random())
+    logging.warning(f"'{ticker}'의 ohlcv 데이터 요청에 실패했습니다.")
+    return None
+
+
+def _normalize(raw: pd.DataFrame) -> pd.DataFrame:
+    # Date index, OHLCV + 배당/분할 컬럼 (없으면 0)
+    df = raw.rename_axis("Date")
+    df = df[df["Close"].notna()] if "Close" in df.columns else df.iloc[:0]
+    df = df.reindex(columns=OHLCV_COLUMNS + _EVENT_COLUMNS)
+    df[_EVENT_COLUMNS] = df[_EVENT_COLUMNS].fillna(0)
+    return df
+
+
+class OhlcvStore:
+    """
+    티커별로 마지막으로 저장한 일봉 이후만 받아서 월별 폴더(<root>/month=YYYY-MM/part-*.parquet)에 추가하는 ohlcv 저장소입니다.
+
+    state.parquet에 티커별 첫/마지막 날짜, 마지막 종가, 확인용 일봉(마지막 직전 일봉)의 날짜와 종가, generation을 기록합니다.
+    마지막 일봉은 장중에 받은 미완성 일봉일 수 있으므로 확인용 일봉부터 다시 받아서 마지막 일봉을 덮어씁니다.
+    새로 받은 구간에 배당/분할이 있거나 확인용 일봉의 (수정)종가가 달라졌으면 과거 수정주가가 바뀐 것이므로
+    그 티커만 전체 기간을 다시 받고 generation을 올립니다. 이전 generation의 행은 읽을 때 무시하고 compact()에서 지웁니다.
+    """
+    def __init__(self, root: str = "DB/usa_ohlcv"):
+        self.root = root
+        self._state_path = os.path.join(root, OHLCV_STATE_FILE)
+        if os.path.exists(self._state_path):
+            # 확인용 일봉 컬럼이 없는 이전 state는 NaT/NaN으로 채움 (다음 update 때 마지막 일봉으로 확인)
+            self.state = pd.read_parquet(self._state_path).reindex(columns=list(_STATE_DTYPES)).astype(_STATE_DTYPES)
+        else:
+            self.state = pd.DataFrame(
+                {col: pd.Series(dtype=dtype) for col, dtype in _STATE_DTYPES.items()},
+                index=pd.Index([], name="Ticker", dtype=object),
+            )
+
+    def update(
+        self,
+        tickers: list[str],
+        fetch_func: Callable[[str, pd.Timestamp | None, str], pd.DataFrame] = fetch_history,
+        period: str = "1y",
+        max_workers: int = 8,
+        max_retries: int = 5,
+        tolerance: float = 1e-4,
+    ) -> dict[str, list[str]]:
+        """
+        tickers의 일봉을 마지막 저장일부터 오늘까지 받아서 추가합니다.
+
+        Args:
+            fetch_func: fetch_func(ticker, start, period) -> yfinance history 형식 DataFrame 입니다.
+                start가 None이면 period만큼 받습니다. (처음 받는 티커)
+            tolerance: 확인용 일봉의 종가가 이 비율 이상 다르면 수정주가가 바뀐 것으로 봅니다.
+
+        Returns:
+            {"new": 처음 받은 티커, "appended": 이어 받은 티커, "refetched": 수정주가 변경으로 다시 받은 티커, "failed": 실패한 티커}
+        """
+        summary = {"new": [], "appended": [], "refetched": [], "failed": []}
+        state = self.state
+
+        def fetch(ticker: str):
+            start = None
+            if ticker in state.index:
+                check_date = state.at[ticker, "Check Date"]
+                start = pd.Timestamp(state.at[ticker, "Last Date"] if pd.isna(check_date) else check_date)
+            raw = _fetch_with_retry(fetch_func, ticker, start, period, max_retries)
+            if raw is None:
+                return ticker, None, None
+            new = _normalize(raw)
+            if start is None:
+                return ticker, new, "new"
+            if self._is_adjusted(ticker, new, tolerance):
+                first_date = pd.Timestamp(state.at[ticker, "First Date"])
+                raw = _fetch_with_retry(fetch_func, ticker, first_date, period, max_retries)
+                return (ticker, None, None) if raw is None else (ticker, _normalize(raw), "refetched")
+            return ticker, new[_naive_dates(new.index) > start], "appended"
+
+        frames, updates = [], {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for ticker, df, kind in tqdm(executor.map(fetch, tickers), total=len(tickers)):
+                if df is None:
+                    summary["failed"].append(ticker)
+                    continue
+                summary[kind].append(ticker)
+                if df.empty:  # 새 일봉 없음
+                    continue
+                generation = int(state["Generation"].get(ticker, -1)) + (kind != "appended")
+                frames.append(df[OHLCV_COLUMNS].assign(Ticker=ticker, Generation=generation))
+                dates = _naive_dates(df.index)
+                if len(df) >= 2:
+                    check_date, check_close = dates[-2], df["Close"].iloc[-2]
+                elif kind == "appended":  # 마지막 일봉만 다시 받음
+                    check_date, check_close = state.at[ticker, "Check Date"], state.at[ticker, "Check Close"]
+                else:
+                    check_date, check_close = pd.NaT, np.nan
+                updates[ticker] = {
+                    "First Date": dates.min() if kind != "appended" else state.at[ticker, "First Date"],
+                    "Last Date": dates.max(),
+                    "Last Close": df["Close"].iloc[-1],
+                    "Check Date": check_date,
+                    "Check Close": check_close,
+                    "Generation": generation,
+                }
+
+        if frames:
+            self._append(pd.concat(frames))
+        if updates:
+            updated = pd.DataFrame.from_dict(updates, orient="index").rename_axis("Ticker")
+            updated = updated.astype(self.state.dtypes.to_dict())
+            self.state = pd.concat([self.state.drop(updated.index, errors="ignore"), updated]).sort_index()
+            self._save_state()
+        logging.info(", ".join(f"{len(v)} {k}" for k, v in summary.items()))
+        return summary
+
+    def _is_adjusted(self, ticker: str, new: pd.DataFrame, tolerance: float) -> bool:
+        # 저장한 마지막 일봉 이후 배당/분할이 있었거나, 확인용 일봉의 종가가 달라졌으면 과거 수정주가가 바뀐 것
+        # (마지막 일봉은 장중 미완성 일봉일 수 있어서 비교하지 않음. 확인용 일봉이 없는 이전 state만 마지막 일봉으로 비교)
+        last_date = pd.Timestamp(self.state.at[ticker, "Last Date"])
+        dates = _naive_dates(new.index)
+        if (new.loc[dates > last_date, _EVENT_COLUMNS] != 0).any().any():
+            return True
+        check_date, check_close = self.state.loc[ticker, ["Check Date", "Check Close"]]
+        if pd.isna(check_date):
+            check_date, check_close = last_date, self.state.at[ticker, "Last Close"]
+        overlap = new.loc[dates == pd.Timestamp(check_date), "Close"]
+        if overlap.empty:
+            return False
+        return bool(abs(overlap.iloc[-1] / check_close - 1) > tolerance)
+
+    def _append(self, df: pd.DataFrame):
+        # 월별 폴더에 이번 실행의 part 파일 하나씩 추가
+        df = df.reset_index().set_index(["Ticker", "Date"])
+        months = _naive_dates(df.index.get_level_values("Date")).strftime("%Y-%m")
+        stamp = pd.Timestamp.now().strftime("%Y%m%d%H%M%S%f")
+        for month, part in df.groupby(months):
+            month_dir = os.path.join(self.root, f"month={month}")
+            os.makedirs(month_dir, exist_ok=True)
+            path = os.path.join(month_dir, f"part-{stamp}.parquet")
+            part.to_parquet(f"{path}.tmp")
+            os.replace(f"{path}.tmp", path)
+
+    def _save_state(self):
+        os.makedirs(self.root, exist_ok=True)
+        self.state.to_parquet(f"{self._state_path}.tmp")
+        os.replace(f"{self._state_path}.tmp", self._state_path)
+
+    def _month_dirs(self, start=None, end=None) -> list[str]:
+        months = sorted(glob(os.path.join(self.root, "month=*")))
+        lo = None if start is None else pd.Timestamp(start).strftime("%Y-%m")
+        hi = None if end is None else pd.Timestamp(end).strftime("%Y-%m")
+        return [
+            path for path in months
+            if (lo is None or path[-7:] >= lo) and (hi is None or path[-7:] <= hi)
+        ]
+
+    def _read_month(self, month_dir: str, tickers: list[str] | None = None) -> pd.DataFrame:
+        filters = None if tickers is None else [("Ticker", "in", list(tickers))]
+        # 같은 날짜가 여러 번 있으면 나중에 쓴 파일의 값을 쓰므로 compact한 파일을 가장 먼저 읽음
+        paths = sorted(glob(os.path.join(month_dir, "*.parquet")), key=lambda path: (not path.endswith(_COMPACTED_FILE), path))
+        frames = [pd.read_parquet(path, filters=filters) for path in paths]
+        if not frames:
+            return pd.DataFrame()
+        df = pd.concat(frames)
+        # 현재 generation의 행만 남기고, 같은 날짜가 여러 번 있으면 마지막에 쓴 값
+        current = self.state["Generation"].reindex(df.index.get_level_values("Ticker")).to_numpy()
+        df = df[df["Generation"].to_numpy() == current]
+        return df[~df.index.duplicated(keep="last")]
+
+    def read(self, start=None, end=None, tickers: list[str] | None = None) -> pd.DataFrame:
+        # ohlcv.parquet와 같은 형식 ((Ticker, Date) index, Trading Value 포함)
+        frames = [self._read_month(month_dir, tickers) for month_dir in self._month_dirs(start, end)]
+        frames = [df for df in frames if not df.empty]
+        if not frames:
+            return pd.DataFrame(columns=OHLCV_COLUMNS + ["Trading Value"])
+        df = pd.concat(frames).drop(columns="Generation").sort_index()
+        dates = _naive_dates(df.index.get_level_values("Date"))
+        mask = np.ones(len(df), dtype=bool)
+        if start is not None:
+            mask &= dates >= pd.Timestamp(start)
+        if end is not None:
+            mask &= dates <= pd.Timestamp(end)
+        df = df[mask].copy()
+        df["Trading Value"] = df["Close"] * df["Volume"]
+        return df
+
+    def export(self, save_path: str, start=None, end=None, tickers: list[str] | None = None):
+        # DB 버전 폴더의 ohlcv.parquet로 저장 (Database가 그대로 읽음)
+        df = self.read(start, end, tickers)
+        df.to_parquet(f"{save_path}.tmp")
+        os.replace(f"{save_path}.tmp", save_path)
+
+    def compact(self):
+        # 월별 part 파일을 하나로 합치고 이전 generation 행을 삭제 (이전 generation 행은 새 part 파일과 같이 생기므로
+        # 파일이 하나뿐인 달은 건너뜀)
+        for month_dir in self._month_dirs():
+            paths = sorted(glob(os.path.join(month_dir, "*.parquet")))
+            if len(paths) <= 1:
+                continue
+            df = self._read_month(month_dir).sort_index()
+            path = os.path.join(month_dir, _COMPACTED_FILE)
+            df.to_parquet(f"{path}.tmp")
+            os.replace(f"{path}.tmp", path)
+            for old_path in paths:
+                if old_path != path:
+                    os.remove(old_path)
+
+
+def _naive_dates(dates) -> pd.DatetimeIndex:
+    # 거래소 현지 날짜 (timezone 제거, 비교용)
+    dates = pd.DatetimeIndex(dates)
+    return dates.tz_localize(None) if dates.tz is not None else dates
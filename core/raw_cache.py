@@ -0,0 +1,59 @@
+import os
+import gzip
+import pickle
+from typing import Any
+
+from utils.date import get_today
+
+RAW_FILE_SUFFIX = ".pkl.gz"
+
+
+class RawCache:
+    """
+    yfinance 원본 응답(info dict, 재무제표/추정치 DataFrame, 일봉)을 후처리 전에 <root>/<fetch_date>/<ticker>/<data_type>.pkl.gz로 저장합니다.
+
+    fetch_date는 받은 날짜(yymmdd)로 DB/usa 버전 폴더 이름과 같습니다.
+    후처리 함수를 고치거나 후처리가 실패했을 때 다시 받지 않고 원본으로 버전 폴더를 다시 만듭니다. (YFDownloader.rebuild)
+    """
+    def __init__(self, root: str = "DB/usa_raw", fetch_date: str | None = None, compresslevel: int = 6):
+        self.root = root
+        self.fetch_date = get_today(to_str=True, str_format="%y%m%d") if fetch_date is None else fetch_date
+        self.compresslevel = compresslevel
+
+    def path(self, ticker: str, data_type: str, fetch_date: str | None = None) -> str:
+        fetch_date = self.fetch_date if fetch_date is None else fetch_date
+        return os.path.join(self.root, fetch_date, ticker, f"{data_type}{RAW_FILE_SUFFIX}")
+
+    def put(self, ticker: str, data_type: str, raw: Any):
+        path = self.path(ticker, data_type)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with gzip.open(tmp_path, "wb", compresslevel=self.compresslevel) as f:
+            pickle.dump(raw, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)  # 쓰다 만 파일이 남지 않도록
+
+    def load(self, ticker: str, data_type: str, fetch_date: str | None = None) -> Any:
+        with gzip.open(self.path(ticker, data_type, fetch_date), "rb") as f:
+            return pickle.load(f)
+
+    def fetch_dates(self) -> list[str]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            f for f in os.listdir(self.root)
+            if os.path.isdir(os.path.join(self.root, f)) and len(f) == 6 and f.isdigit()
+        )
+
+    def tickers(self, fetch_date: str | None = None) -> list[str]:
+        fetch_date_dir = os.path.join(self.root, self.fetch_date if fetch_date is None else fetch_date)
+        if not os.path.isdir(fetch_date_dir):
+            return []
+        return sorted(f for f in os.listdir(fetch_date_dir) if os.path.isdir(os.path.join(fetch_date_dir, f)))
+
+    def find(self, ticker: str, data_type: str, as_of: str | None = None, fetch_dates: list[str] | None = None) -> str | None:
+        # as_of(포함) 이전에 받은 가장 최근 원본의 fetch_date (증분 갱신으로 이전 버전에서 가져온 데이터는 그 이전 날짜에 있음)
+        fetch_dates = self.fetch_dates() if fetch_dates is None else fetch_dates
+        for fetch_date in reversed(fetch_dates):
+            if (as_of is None or fetch_date <= as_of) and os.path.exists(self.path(ticker, data_type, fetch_date)):
+                return fetch_date
+        return None
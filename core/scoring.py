@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+
+
+class ScoreItem:
+    """
+    점수 항목입니다. 순위 1등이 weight점, 꼴찌가 weight / n점을 받습니다. (n = 같은 그룹에서 값이 있는 티커 수)
+
+    ascending=True면 값이 작을수록 좋은 항목입니다. (e.g. PER, PBR)
+    """
+    def __init__(self, column: str, weight: float = 1.0, ascending: bool = False):
+        self.column = column
+        self.weight = weight
+        self.ascending = ascending
+
+
+def _block_codes(frame: pd.DataFrame, group: str | None, batch_level: str | list[str] | None) -> np.ndarray:
+    # 순위를 따로 매기는 단위(batch x 그룹) 번호. 그룹이 없는 티커는 -1
+    keys = []
+    if batch_level is not None:
+        levels = [batch_level] if isinstance(batch_level, str) else batch_level
+        keys += [frame.index.get_level_values(level) for level in levels]
+    if group is not None:
+        keys.append(frame[group].replace("", None))
+    if not keys:
+        return np.zeros(len(frame), dtype=np.int64)
+    codes = np.zeros(len(frame), dtype=np.int64)
+    missing = np.zeros(len(frame), dtype=bool)
+    for key in keys:
+        key_codes, uniques = pd.factorize(key)
+        missing |= key_codes < 0
+        codes = codes * (len(uniques) + 1) + key_codes
+    return np.where(missing, -1, pd.factorize(codes)[0])
+
+
+def min_ranks(values: np.ndarray, ascending: np.ndarray, codes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (티커 x 항목) 배열의 모든 항목을 블록(codes)별로 한 번의 정렬로 순위를 매깁니다. (pandas rank(method="min")과 같음)
+
+    Args:
+        values: (N, C) 값입니다.
+        ascending: (C,) 항목별 정렬 방향입니다.
+        codes: (N,) 블록 번호입니다. -1이면 순위를 매기지 않습니다.
+
+    Returns:
+        (순위, 블록 안에서 값이 있는 티커 수) 입니다. 둘 다 (N, C)이고 값이 없으면 NaN입니다.
+    """
+    n, c = values.shape
+    signed = np.where(ascending[None, :], values, -values).ravel(order="F")
+    n_blocks = int(codes.max()) + 1 if n else 0
+    block = (np.arange(c)[None, :] * n_blocks + codes[:, None]).ravel(order="F")
+    valid = ~np.isnan(signed) & np.broadcast_to((codes >= 0)[:, None], (n, c)).ravel(order="F")
+
+    pos = np.flatnonzero(valid)
+    order = pos[np.lexsort((signed[pos], block[pos]))]
+    sorted_values, sorted_block = signed[order], block[order]
+    idx = np.arange(len(order))
+    new_block = np.ones(len(order), dtype=bool)
+    new_block[1:] = sorted_block[1:] != sorted_block[:-1]
+    new_value = new_block.copy()
+    new_value[1:] |= sorted_values[1:] != sorted_values[:-1]
+    block_start = np.maximum.accumulate(np.where(new_block, idx, 0))
+    first_equal = np.maximum.accumulate(np.where(new_value, idx, 0))
+
+    ranks = np.full(n * c, np.nan)
+    ranks[order] = first_equal - block_start + 1
+    counts = np.full(n * c, np.nan)
+    counts[pos] = np.bincount(block[pos], minlength=n_blocks * c)[block[pos]]
+    return ranks.reshape((n, c), order="F"), counts.reshape((n, c), order="F")
+
+
+def make_scores(
+    frame: pd.DataFrame,
+    items: list[ScoreItem],
+    group: str | None = None,
+    batch_level: str | list[str] | None = None,
+    dropna: bool = True,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    항목별 순위와 점수를 계산합니다. 점수 = (n - 순위 + 1) / n * weight, 총점은 "총점" 컬럼입니다.
+
+    Args:
+        frame: 티커별 항목 값입니다. 여러 버전을 한 번에 계산하려면 (Version, Ticker) index로 이어 붙이고
+            batch_level="Version"을 줍니다. (e.g. pd.concat({version: df, ...}, names=["Version"]))
+        items: 점수 항목입니다.
+        group: 이 컬럼(e.g. "Sector")의 그룹 안에서 순위를 매깁니다. None이면 전체입니다.
+        batch_level: 따로 순위를 매길 index level입니다.
+        dropna: 항목 중 하나라도 값이 없는 행을 제외합니다. False면 값이 없는 항목은 0점이고, 모든 항목이 없으면 총점은 NaN입니다.
+
+    Returns:
+        (rank_df, score_df) 입니다.
+    """
+    columns = [item.column for item in items]
+    if dropna:
+        frame = frame.dropna(subset=columns)
+    values = frame[columns].to_numpy(dtype=float)
+    ascending = np.array([item.ascending for item in items])
+    weights = np.array([item.weight for item in items], dtype=float)
+
+    ranks, counts = min_ranks(values, ascending, _block_codes(frame, group, batch_level))
+    scores = (counts - ranks + 1) / counts * weights
+    rank_df = pd.DataFrame(ranks, index=frame.index, columns=columns)
+    score_df = pd.DataFrame(scores, index=frame.index, columns=columns)
+    # 점수가 하나도 없는 행(그룹 없음 등)은 0점이 아니라 NaN
+    score_df["총점"] = score_df[columns].sum(axis=1, min_count=1)
+    return rank_df, score_df
@@ -0,0 +1,157 @@
+from abc import ABC, abstractmethod
+
+import numpy as np
+import pandas as pd
+
+
+class Filter(ABC):
+    """
+    Screener 조건입니다. mask(screener)는 screener 티커 순서의 bool 배열을 반환합니다.
+
+    percentile, top-N 조건은 다른 조건으로 걸러지기 전의 전체 유니버스(또는 그룹) 기준입니다.
+    """
+    @abstractmethod
+    def mask(self, screener: "Screener") -> np.ndarray:
+        pass
+
+
+class Between(Filter):
+    # 절대값 조건 (min <= 값 <= max, NaN은 제외)
+    def __init__(self, column: str, min: float | None = None, max: float | None = None):
+        self.column = column
+        self.min = min
+        self.max = max
+
+    def mask(self, screener):
+        return _between(screener.values(self.column), self.min, self.max)
+
+
+class Percentile(Filter):
+    # 전체(group=None) 또는 Sector/Industry 안에서의 백분위 조건 (0 ~ 1, 클수록 값이 큼)
+    def __init__(self, column: str, min: float | None = None, max: float | None = None, group: str | None = None):
+        self.column = column
+        self.min = min
+        self.max = max
+        self.group = group
+
+    def mask(self, screener):
+        return _between(screener.percentile(self.column, self.group), self.min, self.max)
+
+
+class TopN(Filter):
+    # 전체 또는 그룹별 상위 n개 (ascending=True면 값이 작은 순, 동점은 모두 포함)
+    def __init__(self, column: str, n: int, group: str | None = None, ascending: bool = False):
+        self.column = column
+        self.n = n
+        self.group = group
+        self.ascending = ascending
+
+    def mask(self, screener):
+        rank = screener.rank(self.column, self.group, self.ascending)
+        return rank <= self.n  # NaN은 False
+
+
+class IsIn(Filter):
+    # 범주형 컬럼 조건 (e.g. IsIn("Sector", ["Technology"]))
+    def __init__(self, column: str, values: list):
+        self.column = column
+        self.values = values
+
+    def mask(self, screener):
+        return screener.frame[self.column].isin(self.values).to_numpy()
+
+
+def _between(values: np.ndarray, min: float | None, max: float | None) -> np.ndarray:
+    mask = ~np.isnan(values)
+    if min is not None:
+        mask &= values >= min
+    if max is not None:
+        mask &= values <= max
+    return mask
+
+
+class Screener:
+    """
+    숫자 컬럼의 순위와 백분위를 전체/그룹별로 미리 계산해 두고 여러 조건을 bool 배열 연산으로 한 번에 거는 screener입니다.
+
+    순위는 (ticker x 컬럼) 배열로 저장되므로 조건마다 groupby를 다시 하지 않습니다.
+    백분위는 pandas rank(pct=True, method="average")와 같습니다.
+    """
+    def __init__(self, frame: pd.DataFrame, groups: list[str] = ("Sector", "Industry")):
+        self.frame = frame
+        self.columns = frame.select_dtypes("number").columns.tolist()
+        self._col_idx = {col: i for i, col in enumerate(self.columns)}
+        numeric = frame[self.columns].astype(float)
+        self._values = numeric.to_numpy()
+
+        # scope(None = 전체, 그룹 컬럼 이름)별 오름차순 min/max 순위와 NaN이 아닌 개수
+        self._ranks = {None: self._make_ranks(numeric, None)}
+        for group in groups:
+            if group in frame.columns:
+                codes, _ = pd.factorize(frame[group].replace("", None))
+                self._ranks[group] = self._make_ranks(numeric, codes)
+
+    @staticmethod
+    def _make_ranks(numeric: pd.DataFrame, codes: np.ndarray | None) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if codes is None:
+            rank_min = numeric.rank(method="min")
+            rank_max = numeric.rank(method="max")
+            count = np.broadcast_to(numeric.count().to_numpy(dtype=float), numeric.shape)
+        else:
+            # 그룹이 없는 티커(code -1)는 NaN
+            grouped = numeric.groupby(np.where(codes >= 0, codes, np.nan))
+            rank_min = grouped.rank(method="min").reindex(numeric.index)
+            rank_max = grouped.rank(method="max").reindex(numeric.index)
+            count = grouped.transform("count").reindex(numeric.index).to_numpy(dtype=float)
+        return rank_min.to_numpy(dtype=float), rank_max.to_numpy(dtype=float), count
+
+    def _scope(self, group: str | None):
+        if group not in self._ranks:
+            raise ValueError(f"Group '{group}' is not precomputed. Available: {[g for g in self._ranks if g]}")
+        return self._ranks[group]
+
+    @property
+    def index(self) -> pd.Index:
+        return self.frame.index
+
+    def values(self, column: str) -> np.ndarray:
+        return self._values[:, self._col_idx[column]]
+
+    def percentile(self, column: str, group: str | None = None) -> np.ndarray:
+        rank_min, rank_max, count = self._scope(group)
+        i = self._col_idx[column]
+        return (rank_min[:, i] + rank_max[:, i]) / 2 / count[:, i]
+
+    def rank(self, column: str, group: str | None = None, ascending: bool = False) -> np.ndarray:
+        # 1부터 시작하는 순위 (동점은 같은 순위, method="min")
+        rank_min, rank_max, count = self._scope(group)
+        i = self._col_idx[column]
+        return rank_min[:, i] if ascending else count[:, i] - rank_max[:, i] + 1
+
+    def mask(self, filters: list[Filter]) -> np.ndarray:
+        mask = np.ones(len(self.frame), dtype=bool)
+        for f in filters:
+            mask &= f.mask(self)
+        return mask
+
+    def screen(
+        self,
+        filters: list[Filter],
+        columns: list[str] | None = None,
+        sort_by: str | None = None,
+        ascending: bool = False,
+    ) -> pd.DataFrame:
+        """
+        모든 조건을 만족하는 티커의 행을 반환합니다.
+
+        Args:
+            filters: Between, Percentile, TopN, IsIn 등의 조건입니다. (모두 AND)
+            columns: 결과에 포함할 컬럼입니다. None이면 전체입니다.
+            sort_by: 정렬 기준 컬럼입니다.
+        """
+        result = self.frame[self.mask(filters)]
+        if columns is not None:
+            result = result[columns]
+        if sort_by is not None:
+            result = result.sort_values(sort_by, ascending=ascending)
+        return result
@@ -0,0 +1,247 @@
+import os
+import json
+import datetime
+
+import pandas as pd
+import pyarrow.parquet as pq
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
+
+from utils.misc import adapt_parquet_filters
+
+META_FILE = "versions.json"
+DELETED_COL = "__deleted__"
+DUP_LEVEL = "__dup__"  # 같은 index가 여러 번 나오는 경우(e.g. 예전 estimates)를 구분하기 위한 순번
+
+
+def _column_family(dtype) -> str:
+    # 주가, 시가총액 같은 숫자는 매주 바뀌지만 회사 설명 같은 텍스트는 거의 바뀌지 않으므로 따로 저장
+    return "numeric" if is_numeric_dtype(dtype) or is_bool_dtype(dtype) else "text"
+
+
+def _normalize_index(df: pd.DataFrame) -> tuple[pd.DataFrame, list[str]]:
+    # 버전마다 날짜 index가 Timestamp/date로 다르게 저장되어 있어서, 비교와 저장은 datetime64로 통일
+    index_dtypes = []
+    for i, level in enumerate(df.index.levels):
+        if level.dtype == object and len(level) and isinstance(level[0], datetime.date):
+            index_dtypes.append("date")
+            df = df.set_axis(df.index.set_levels(pd.to_datetime(level), level=i), axis=0)
+        else:
+            index_dtypes.append(str(level.dtype))
+    return df, index_dtypes
+
+
+def _restore_index(df: pd.DataFrame, index_dtypes: list[str]) -> pd.DataFrame:
+    levels = []
+    for level, dtype in zip(df.index.levels, index_dtypes):
+        if dtype == "date":
+            levels.append(pd.Index(pd.to_datetime(level).date, dtype=object, name=level.name))
+        else:
+            levels.append(level.astype(dtype))
+    return df.set_axis(df.index.set_levels(levels), axis=0)
+
+
+def _row_hash(df: pd.DataFrame) -> pd.Series:
+    return pd.util.hash_pandas_object(df, index=False)
+
+
+class SnapshotStore:
+    """
+    주간 스냅샷(DB/usa/<yymmdd>/<key>.parquet)을 버전별 변경분만 저장하는 저장소입니다.
+
+    <root>/<key>/<family>/<version>.parquet 에는 이전 버전과 값이 달라진 행(추가 포함)과
+    삭제된 행(__deleted__=True)만 저장하고, 가끔 전체를 저장(checkpoint)합니다. 컬럼은 숫자(numeric)/텍스트(text) family로 나눠서,
+    시가총액만 바뀐 티커의 Long Business Summary는 다시 저장하지 않습니다.
+    read(key, version)은 마지막 checkpoint부터 version까지의 변경분을 순서대로 덮어써서 원래 DataFrame을 복원합니다.
+    """
+    def __init__(self, root: str = "DB/usa_store"):
+        self.root = root
+        self._meta_path = os.path.join(root, META_FILE)
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path, encoding="utf-8") as f:
+                self._meta = json.load(f)
+        else:
+            self._meta = {}
+
+    @property
+    def versions(self) -> list[str]:
+        return sorted(self._meta)
+
+    def keys(self, version: str | None = None) -> list[str]:
+        return list(self._meta[self._resolve_version(version)])
+
+    def _resolve_version(self, version: str | None) -> str:
+        if version is None:
+            if not self._meta:
+                raise FileNotFoundError(f"No versions in snapshot store '{self.root}'.")
+            return self.versions[-1]
+        if version not in self._meta:
+            raise FileNotFoundError(f"Version '{version}' not found in snapshot store '{self.root}'.")
+        return version
+
+    def _delta_path(self, key: str, family: str, version: str) -> str:
+        return os.path.join(self.root, key, family, f"{version}.parquet")
+
+    def commit(self, version: str, frames: dict[str, pd.DataFrame], checkpoint_ratio: float = 2.0):
+        """
+        frames를 version으로 저장합니다. 버전은 오래된 것부터 순서대로 commit 해야 합니다.
+
+        마지막 checkpoint 이후 쌓인 변경분 행 수가 전체 행 수의 checkpoint_ratio배를 넘으면
+        변경분 대신 전체를 저장(checkpoint)해서, 읽을 때 다시 적용할 변경분의 양을 제한합니다.
+        """
+        if self._meta and version <= self.versions[-1]:
+            raise ValueError(f"Version '{version}' must be newer than the latest version '{self.versions[-1]}'.")
+
+        version_meta = {}
+        for key, df in frames.items():
+            dup = df.groupby(level=list(range(df.index.nlevels)), sort=False).cumcount().rename(DUP_LEVEL)
+            df, index_dtypes = _normalize_index(df.set_index(dup, append=True))
+            families = {}
+            for col in df.columns:
+                families.setdefault(_column_family(df[col].dtype), []).append(col)
+
+            prev_version = self._latest_version_with(key)
+            prev = self._read_state(key, prev_version) if prev_version is not None else None
+            deltas = {}
+            for family, cols in families.items():
+                new = df[cols]
+                replay_rows = self._replay_rows(key, family, prev_version)
+                if replay_rows is None:
+                    # 처음 저장하거나 이전 버전에 없던 family는 전체를 저장
+                    delta, checkpoint = new.assign(**{DELETED_COL: False}), True
+                else:
+                    delta = self._make_delta(new, prev, cols)
+                    checkpoint = replay_rows + len(delta) > checkpoint_ratio * len(new)
+                    if checkpoint:
+                        delta = new.assign(**{DELETED_COL: False})
+                if len(delta) or checkpoint:
+                    path = self._delta_path(key, family, version)
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    delta.to_parquet(path)
+                    deltas[family] = {"rows": len(delta), "checkpoint": checkpoint}
+
+            version_meta[key] = {
+                "columns": list(df.columns),
+                "dtypes": {col: str(dtype) for col, dtype in df.dtypes.items()},
+                "families": families,
+                "index_dtypes": index_dtypes,
+                "deltas": deltas,
+            }
+
+        self._meta[version] = version_meta
+        os.makedirs(self.root, exist_ok=True)
+        with open(self._meta_path, "w", encoding="utf-8") as f:
+            json.dump(self._meta, f, ensure_ascii=False, indent=1)
+
+    def commit_dir(self, version_dir: str, version: str | None = None):
+        # DB/usa/<yymmdd> 폴더의 parquet 파일들을 한 버전으로 저장
+        version = os.path.basename(os.path.normpath(version_dir)) if version is None else version
+        frames = {
+            f[:-len(".parquet")]: pd.read_parquet(os.path.join(version_dir, f))
+            for f in sorted(os.listdir(version_dir)) if f.endswith(".parquet")
+        }
+        self.commit(version, frames)
+
+    def _latest_version_with(self, key: str, until: str | None = None) -> str | None:
+        versions = [v for v in self.versions if key in self._meta[v] and (until is None or v <= until)]
+        return versions[-1] if versions else None
+
+    def _replay_versions(self, key: str, family: str, version: str) -> list[str]:
+        # version 시점을 복원하기 위해 읽어야 하는 파일들의 버전 (마지막 checkpoint부터)
+        versions = [
+            v for v in self.versions
+            if v <= version and family in self._meta[v].get(key, {}).get("deltas", {})
+        ]
+        checkpoints = [i for i, v in enumerate(versions) if self._meta[v][key]["deltas"][family]["checkpoint"]]
+        return versions[checkpoints[-1]:] if checkpoints else []
+
+    def _replay_rows(self, key: str, family: str, version: str | None) -> int | None:
+        # 이전 버전에 family가 없었으면 None
+        if version is None or family not in self._meta[version][key]["families"]:
+            return None
+        return sum(self._meta[v][key]["deltas"][family]["rows"] for v in self._replay_versions(key, family, version)[1:])
+
+    @staticmethod
+    def _make_delta(new: pd.DataFrame, prev: pd.DataFrame | None, cols: list[str]) -> pd.DataFrame:
+        new = new.assign(**{DELETED_COL: False})
+        if prev is None:
+            return new
+
+        old = prev.reindex(columns=cols)
+        try:
+            old = old.astype(new[cols].dtypes)  # dtype이 달라서 hash가 달라지는 것을 방지
+        except (ValueError, TypeError):
+            pass
+        common = new.index.intersection(old.index)
+        changed = _row_hash(new.loc[common, cols]).to_numpy() != _row_hash(old.loc[common]).to_numpy()
+        added = ~new.index.isin(old.index)
+        changed_index = common[changed].append(new.index[added])
+
+        deleted = old.loc[~old.index.isin(new.index)].iloc[:, :0].assign(**{DELETED_COL: True})
+        return pd.concat([new.loc[new.index.isin(changed_index)], deleted], axis=0)
+
+    def read(
+        self,
+        key: str,
+        version: str | None = None,
+        columns: list[str] | None = None,
+        filters: list[tuple] | None = None,
+    ) -> pd.DataFrame:
+        """
+        version 시점의 key 데이터를 DB/usa/<version>/<key>.parquet와 같은 형태로 복원합니다.
+
+        Args:
+            key: 데이터 이름입니다. (e.g. "info", "estimates")
+            version: yymmdd 형식의 버전입니다. None이면 최신 버전입니다.
+            columns: 읽을 컬럼입니다. 필요한 family 파일만 읽습니다.
+            filters: pd.read_parquet의 filters와 같은 형식이며, 변경분 파일을 읽을 때 적용됩니다.
+
+        Returns:
+            index 순으로 정렬된 DataFrame입니다.
+        """
+        version = self._resolve_version(version)
+        df = self._read_state(key, version, columns, filters)
+        if DUP_LEVEL not in df.index.names:  # 비어 있는 경우
+            return df
+        return _restore_index(df, self._meta[version][key]["index_dtypes"]).droplevel(DUP_LEVEL)
+
+    def _read_state(
+        self,
+        key: str,
+        version: str | None = None,
+        columns: list[str] | None = None,
+        filters: list[tuple] | None = None,
+    ) -> pd.DataFrame:
+        version = self._resolve_version(version)
+        if key not in self._meta[version]:
+            raise FileNotFoundError(f"'{key}' is not stored in version '{version}'.")
+        meta = self._meta[version][key]
+        out_cols = meta["columns"] if columns is None else [c for c in meta["columns"] if c in columns]
+
+        parts = []
+        for family, family_cols in meta["families"].items():
+            read_cols = [c for c in family_cols if c in out_cols]
+            if not read_cols and parts:
+                continue
+            deltas = []
+            for v in self._replay_versions(key, family, version):
+                path = self._delta_path(key, family, v)
+                if os.path.exists(path):
+                    # 버전마다 컬럼 구성이 다를 수 있으므로 파일에 있는 컬럼만 골라서 읽음
+                    schema = pq.read_schema(path)
+                    load_cols = [c for c in read_cols if c in schema.names] + [DELETED_COL]
+                    file_filters = adapt_parquet_filters(filters, schema)
+                    delta = pd.read_parquet(path, columns=load_cols, filters=file_filters)
+                    deltas.append(delta.reindex(columns=read_cols + [DELETED_COL]))
+            if not deltas:
+                continue
+            state = pd.concat(deltas, axis=0)
+            state = state[~state.index.duplicated(keep="last")]  # 가장 최근 버전 값이 남음
+            state = state[~state[DELETED_COL].astype(bool)].drop(columns=DELETED_COL)
+            parts.append(state)
+
+        if not parts:
+            return pd.DataFrame(columns=out_cols).astype({col: meta["dtypes"][col] for col in out_cols})
+        df = pd.concat(parts, axis=1) if len(parts) > 1 else parts[0]
+        df = df.reindex(columns=out_cols)
+        df = df.astype({col: meta["dtypes"][col] for col in out_cols})
+        return df.sort_index()
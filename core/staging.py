@@ -0,0 +1,89 @@
+import os
+import shutil
+import threading
+from typing import Iterator
+
+import pandas as pd
+
+from core.manifest import MANIFEST_FILE, records_to_manifest
+from utils.misc import write_parquet_stream
+
+STAGING_DIR = "_staging"
+DONE_FILE = "_done.txt"
+MANIFEST_KEY = "_manifest"
+
+
+class ShardStaging:
+    """
+    티커별 후처리 결과를 완료되는 즉시 <save_dir의 상위 폴더>/_staging/<버전>/<key>/<ticker>.parquet에 저장합니다.
+    (버전 폴더 밖에 두어서 다운로드 중이거나 중단된 버전을 최신 버전으로 읽지 않도록 함)
+    _done.txt에 기록된 티커만 완료된 것으로 보며, 같은 save_dir로 다시 실행하면 완료된 티커는 건너뜁니다.
+    compact()가 완료된 티커들의 shard를 <save_dir>/<key>.parquet로 합칩니다.
+    """
+    def __init__(self, save_dir: str):
+        self.save_dir = save_dir
+        save_dir = os.path.normpath(save_dir)
+        self.root = os.path.join(os.path.dirname(save_dir), STAGING_DIR, os.path.basename(save_dir))
+        os.makedirs(self.root, exist_ok=True)
+        self._done_path = os.path.join(self.root, DONE_FILE)
+        self._lock = threading.Lock()
+
+    def done_tickers(self) -> list[str]:
+        if not os.path.exists(self._done_path):
+            return []
+        with open(self._done_path, encoding="utf-8") as f:
+            # 기록 도중 종료되어 줄바꿈 없이 잘린 마지막 줄은 완료로 보지 않음
+            lines = f.read().split("\n")[:-1]
+        return list(dict.fromkeys(line for line in lines if line))
+
+    def _shard_path(self, key: str, ticker: str) -> str:
+        return os.path.join(self.root, key, f"{ticker}.parquet")
+
+    def write_frame(self, key: str, ticker: str, df: pd.DataFrame):
+        path = self._shard_path(key, ticker)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        df.to_parquet(tmp_path)
+        os.replace(tmp_path, path)  # 쓰다 만 파일이 shard로 남지 않도록
+
+    def commit(self, ticker: str, frames: dict[str, pd.DataFrame], manifest_records: list[dict] | None = None):
+        # 모든 shard를 쓴 뒤에 _done.txt에 기록해야 재시작 시 반쯤 저장된 티커를 건너뛰지 않음
+        for key, df in frames.items():
+            self.write_frame(key, ticker, df)
+        if manifest_records:
+            self.write_frame(MANIFEST_KEY, ticker, records_to_manifest(manifest_records))
+        with self._lock:
+            with open(self._done_path, "a", encoding="utf-8") as f:
+                f.write(f"{ticker}\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def keys(self) -> list[str]:
+        return sorted(
+            f for f in os.listdir(self.root)
+            if os.path.isdir(os.path.join(self.root, f)) and f != MANIFEST_KEY
+        )
+
+    def read_frames(self, key: str) -> Iterator[pd.DataFrame]:
+        # 완료된 티커만 티커 순서대로 읽음 (실패한 티커의 shard는 무시)
+        for ticker in sorted(self.done_tickers()):
+            path = self._shard_path(key, ticker)
+            if os.path.exists(path):
+                yield pd.read_parquet(path)
+
+    def compact(self, save_dir: str | None = None, batch_rows: int = 200_000):
+        # shard를 batch_rows 단위로 흘려 쓰므로 메모리는 batch 하나 크기만 사용
+        save_dir = self.save_dir if save_dir is None else save_dir
+        os.makedirs(save_dir, exist_ok=True)
+        for key in self.keys():
+            write_parquet_stream(
+                lambda: self.read_frames(key), os.path.join(save_dir, f"{key}.parquet"), batch_rows
+            )
+        write_parquet_stream(
+            lambda: self.read_frames(MANIFEST_KEY), os.path.join(save_dir, MANIFEST_FILE), batch_rows
+        )
+
+    def cleanup(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+        if os.path.isdir(os.path.dirname(self.root)) and not os.listdir(os.path.dirname(self.root)):
+            os.rmdir(os.path.dirname(self.root))
@@ -0,0 +1,110 @@
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+PERIODS = {0: "(This Year)", 1: "(Next Year)"}
+
+
+class ValuationModel:
+    """
+    peer 그룹의 중앙값 배수(multiple)로 적정 주가를 계산하는 모델입니다.
+
+    multiple(inputs)는 티커별 배수(peer 중앙값 계산에 사용, 음수는 NaN)를,
+    fair_price(inputs, peer_multiple)는 peer 중앙값 배수를 적용한 적정 주가를 반환합니다.
+    inputs는 컬럼 이름을 키로 하는 numpy 배열 dict입니다. (get_valuation_inputs 참고)
+    """
+    def __init__(
+        self,
+        name: str,
+        multiple: Callable[[dict[str, np.ndarray]], np.ndarray],
+        fair_price: Callable[[dict[str, np.ndarray], np.ndarray], np.ndarray],
+    ):
+        self.name = name
+        self.multiple = multiple
+        self.fair_price = fair_price
+
+
+VALUATION_MODELS: dict[str, ValuationModel] = {}
+
+
+def register_valuation_model(model: ValuationModel) -> ValuationModel:
+    VALUATION_MODELS[model.name] = model
+    return model
+
+
+def _positive(x: np.ndarray) -> np.ndarray:
+    return np.where(x > 0, x, np.nan)
+
+
+def _per(inputs):
+    # seeking alpha 검증 결과 음수 PER은 중앙값 계산시 제외하는 것으로 보임
+    return _positive(inputs["Price"] / _positive(inputs["EPS"]))
+
+
+register_valuation_model(ValuationModel(
+    "Forward PER",
+    multiple=_per,
+    fair_price=lambda inputs, peer: peer * inputs["EPS"],
+))
+
+# fair PER = peer PEGR * EPS growth(%), fair price = (fair PER / forward PER) * price = fair PER * EPS
+register_valuation_model(ValuationModel(
+    "Forward PEGR",
+    multiple=lambda inputs: _per(inputs) / _positive(inputs["EPS Growth"] * 100),
+    fair_price=lambda inputs, peer: peer * _positive(inputs["EPS Growth"] * 100) * inputs["EPS"],
+))
+
+# 영업이익 적자 회사들은 PER 대신 PSR 사용 가능
+register_valuation_model(ValuationModel(
+    "Forward PSR",
+    multiple=lambda inputs: _positive(inputs["Market Cap"] / _positive(inputs["Sales"])),
+    fair_price=lambda inputs, peer: peer * inputs["Sales"] / _positive(inputs["Shares Outstanding"]),
+))
+
+# 적정 EV에서 순부채(EV - 시가총액)를 빼서 주주가치로 환산
+register_valuation_model(ValuationModel(
+    "Forward EV/Sales",
+    multiple=lambda inputs: _positive(inputs["Enterprise Value"] / _positive(inputs["Sales"])),
+    fair_price=lambda inputs, peer: (
+        peer * inputs["Sales"] - (inputs["Enterprise Value"] - inputs["Market Cap"])
+    ) / _positive(inputs["Shares Outstanding"]),
+))
+
+
+def _group_median(values: np.ndarray, groups: pd.Series) -> np.ndarray:
+    # 그룹별 중앙값을 한 번의 groupby로 구해서 티커 순서로 다시 펼침 (그룹이 없는 티커는 NaN)
+    codes, uniques = pd.factorize(groups)
+    medians = pd.DataFrame(values).groupby(codes).median().reindex(range(len(uniques))).to_numpy()
+    medians = np.vstack([medians, np.full((1, values.shape[1]), np.nan)])
+    return medians[codes]  # code -1(그룹 없음)은 마지막 NaN 행
+
+
+def compute_valuations(
+    inputs: dict[int, dict[str, np.ndarray]],
+    groups: pd.Series,
+    models: list[str] | None = None,
+    suffix: str = "",
+) -> pd.DataFrame:
+    """
+    모든 모델 x 기간의 적정 주가를 한 번에 계산합니다.
+
+    Args:
+        inputs: {forward: {컬럼 이름: groups와 같은 순서의 배열}} 입니다. (forward: 0 = this year, 1 = next year)
+        groups: 티커별 peer 그룹입니다. (e.g. stocks_df["Sector"])
+        models: VALUATION_MODELS의 이름입니다. None이면 전체입니다.
+        suffix: 결과 컬럼 이름 뒤에 붙일 문자열입니다.
+
+    Returns:
+        groups index, "<model> Fair Price <period><suffix>" 컬럼의 DataFrame입니다.
+    """
+    models = list(VALUATION_MODELS) if models is None else models
+    pairs = [(VALUATION_MODELS[name], forward) for name in models for forward in inputs]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        multiples = np.column_stack([model.multiple(inputs[forward]) for model, forward in pairs])
+        peer = _group_median(multiples, groups)
+        fair_prices = {
+            f"{model.name} Fair Price {PERIODS[forward]}{suffix}": model.fair_price(inputs[forward], peer[:, i])
+            for i, (model, forward) in enumerate(pairs)
+        }
+    return pd.DataFrame(fair_prices, index=groups.index)
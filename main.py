@@ -1,16 +1,76 @@
+import argparse
 import datetime
+import logging
+from typing import get_args
 import requests
 
-from core import YFDownloader
+from core import YFDownloader, YFDataType, find_previous_version
+from core.ohlcv_store import OhlcvStore, period_start
+from core.raw_cache import RawCache
 from utils import *
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--engine", choices=["thread", "async"], default="thread")
+    parser.add_argument("--max-workers", type=int, default=8)
+    parser.add_argument("--rps", type=float, default=8.0, help="async engine: 초당 요청 수")
+    parser.add_argument("--max-concurrency", type=int, default=256, help="async engine: 동시 요청 티커 수")
+    parser.add_argument("--refresh", action="store_true", help="이전 버전에서 바뀌지 않은 데이터는 다시 받지 않음")
+    parser.add_argument("--ohlcv-store", default=None, help="ohlcv를 이 OhlcvStore에 이어 받고 버전 폴더로 내보냄 (e.g. DB/usa_ohlcv)")
+    parser.add_argument("--ohlcv-chunk-size", type=int, default=None, help="ohlcv를 이 개수씩 묶어서 요청 (기본: 티커마다 요청)")
+    parser.add_argument("--raw-dir", default="DB/usa_raw", help="yfinance 원본 응답 저장 폴더 (scripts/rebuild_from_raw.py로 다시 후처리)")
+    parser.add_argument("--no-raw-cache", action="store_true", help="원본 응답을 저장하지 않음")
+    parser.add_argument("--offline-universe", action="store_true", help="티커 목록을 nasdaqtrader 대신 가장 최근에 저장된 원천 파일에서 만듦")
+    args = parser.parse_args()
+
     set_logger()
 
-    all_tickers = get_all_usa_tickers()
     today = get_today(to_str=True, str_format="%y%m%d")
+    offline_dir = find_latest_universe_dir("DB/usa") if args.offline_universe else None
+    if args.offline_universe and offline_dir is None:
+        raise FileNotFoundError("No saved symbol files in DB/usa")
+    usa_df = get_all_usa_tickers(as_df=True, save_dir=f"DB/usa/{today}", offline_dir=offline_dir)
+    all_tickers = usa_df.index.tolist()
+
+    download_kwargs = dict(
+        max_workers=args.max_workers,
+        engine=args.engine,
+        requests_per_second=args.rps,
+        max_concurrency=args.max_concurrency,
+    )
+    if args.ohlcv_store is not None:
+        download_kwargs["data_types"] = [t for t in get_args(YFDataType) if t != "ohlcv"]
+    elif args.ohlcv_chunk_size is not None:
+        download_kwargs["ohlcv_chunk_size"] = args.ohlcv_chunk_size
+    prev_version = find_previous_version("DB/usa", before=today) if args.refresh else None
+
+    # 신규 상장/상장 폐지/티커 변경을 버전 폴더에 기록하고 refresh에 넘김
+    # (신규 티커는 전부 새로 받고, 티커 변경은 이전 티커의 데이터를 이어 쓰고, 폐지 티커는 가져오지 않음)
+    prev_universe_dir = find_previous_version("DB/usa", before=today)
+    prev_usa_df = load_usa_universe(f"DB/usa/{prev_universe_dir}") if prev_universe_dir else None
+    universe_diff = None
+    if prev_usa_df is not None:
+        universe_diff = diff_usa_universe(prev_usa_df, usa_df)
+        save_universe_diff(f"DB/usa/{today}", universe_diff, prev_universe_dir)
+        logging.info(
+            f"Universe {prev_universe_dir} -> {today}: {len(universe_diff['added'])} added, "
+            f"{len(universe_diff['removed'])} removed, {len(universe_diff['renamed'])} renamed"
+        )
+        for old, new in universe_diff["renamed"].items():
+            logging.info(f"Renamed: {old} -> {new}")
+
+    # 중간에 멈춰도 같은 날 다시 실행하면 완료된 티커부터 이어서 받음
+    raw_cache = None if args.no_raw_cache else RawCache(args.raw_dir, fetch_date=today)
+    yf_downloader = YFDownloader(save_dir=f"DB/usa/{today}", raw_cache=raw_cache)
+    if prev_version is None:
+        yf_downloader.download(all_tickers, **download_kwargs)
+    else:
+        yf_downloader.refresh(all_tickers, f"DB/usa/{prev_version}", universe_diff=universe_diff, **download_kwargs)
+    yf_downloader.save()
 
-    yf_downloader = YFDownloader()
-    yf_downloader.download(all_tickers, max_workers=8)
-    yf_downloader.save(f"DB/usa/{today}")
+    if args.ohlcv_store is not None:
+        ohlcv_store = OhlcvStore(args.ohlcv_store)
+        ohlcv_store.update(all_tickers, max_workers=args.max_workers)
+        ohlcv_store.compact()
+        ohlcv_store.export(f"DB/usa/{today}/ohlcv.parquet", start=period_start("1y"), tickers=all_tickers)
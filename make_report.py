@@ -1,81 +1,69 @@
-import traceback
-import logging
-import time
-import random
-from concurrent.futures import ProcessPoolExecutor
+import argparse
 
 import numpy as np
 import pandas as pd
 
-from core import *
-from utils import write_excel
-
-
-def get_company_fundamental(ticker, random_request=True):
-    """ticker 회사의 기본 fundamental 정보를 가져옵니다."""
-    print(f"##### ticker:{ticker} start #####")
-    try:
-        extractor = YahooFinanceInfoExtractor()
-        extractor.setup_ticker(ticker)
-        name = extractor.get_company_name()
-        data = {"ticker": ticker, "name": name}
-        data.update({
-            "섹터": extractor.get_sector(),
-            "업종": extractor.get_industry(),
-            "가격": extractor.get_price()
-        })
-        data.update({
-            "작년 동분기 순수익": extractor.get_net_income(before=4),
-            "직전분기 순수익": extractor.get_net_income(before=1),
-            "현분기 순수익": extractor.get_net_income(before=0)
-        })
-        data.update({
-            "작년 동분기 영업이익": extractor.get_operating_income(before=4),
-            "직전분기 영업이익": extractor.get_operating_income(before=1),
-            "현분기 영업이익": extractor.get_operating_income(before=0)
-        })
-        data.update({
-            "작년 동분기 순매출": extractor.get_operating_revenue(before=4),
-            "직전분기 순매출": extractor.get_operating_revenue(before=1),
-            "현분기 순매출": extractor.get_operating_revenue(before=0)
-        })
-        data.update({
-            "작년 동분기 영업활동현금흐름": extractor.get_operating_cashflow(before=4),
-            "직전분기 영업활동현금흐름": extractor.get_operating_cashflow(before=1),
-            "현분기 영업활동현금흐름": extractor.get_operating_cashflow(before=0)
-        })
-        data.update({
-            "EPS": extractor.get_eps(),
-            "BPS": extractor.get_bps(),
-            "SPS": extractor.get_sps(),
-            "ROE": extractor.get_roe(),
-            "PEGR": extractor.get_pegr(),
-            "PBR": extractor.get_pbr(),
-            "PSR": extractor.get_psr(),
-        })
-    except:
-        logging.error(f"~~~~~~~~~~ ticker:{ticker} error ~~~~~~~~~~")
-        logging.error(traceback.format_exc())
-        exit(1)
-    
-    if random_request:
-        time.sleep(random.randrange(3, 5))
-
-    return data
-
-
-def make_base_sheet(excel_path):
-    all_tickers = get_all_stocks_info()
-    all_tickers_list = all_tickers["symbol"].to_list()
-    df = []
-    with ProcessPoolExecutor(max_workers=8) as executor:
-        for data in executor.map(get_company_fundamental, all_tickers_list):
-            df.append(data)
-    write_excel(df, save_path=excel_path, sheet_name="Base", rewrite=True)
-
-
-def make_growth_sheet(excel_path):
-    base_df = pd.read_excel(excel_path, sheet_name="Base", index_col="ticker").dropna()
+from core.analysis import Database
+from core.scoring import ScoreItem, make_scores
+from utils import *
+
+# (분기 재무제표, 컬럼, 이름) : 현분기(0), 직전분기(1), 작년 동분기(4) 값을 Base sheet에 씀
+QUARTER_ITEMS = [
+    ("income_statement_quarter", "Net Income", "순수익"),
+    ("income_statement_quarter", "Operating Income", "영업이익"),
+    ("income_statement_quarter", "Operating Revenue", "순매출"),
+    ("cash_flow_quarter", "Operating Cash Flow", "영업활동현금흐름"),
+]
+QUARTER_BEFORE = {0: "현분기", 1: "직전분기", 4: "작년 동분기"}
+ADJUSTED_COLS = ["PEGR(adjusted)", "PBR(adjusted)", "PSR(adjusted)"]
+# Growth sheet 컬럼별 점수 (ROE와 배수는 15점, 성장률은 5점, 배수는 작을수록 좋음)
+SCORE_WEIGHTS = {"ROE": 15, **{col: 15 for col in ADJUSTED_COLS}}
+
+
+def _nth_quarters(quarterly: pd.DataFrame, column: str, positions: list[int]) -> pd.DataFrame:
+    # 티커별 최근 분기부터의 순번(0 = 현분기)에 해당하는 값을 (Ticker x 순번) 표로
+    values = quarterly[column].sort_index(ascending=[True, False])
+    order = values.groupby(level="Ticker").cumcount().to_numpy()
+    values = values[np.isin(order, positions)]
+    table = pd.Series(values.to_numpy(), index=[values.index.get_level_values("Ticker"), order[np.isin(order, positions)]])
+    return table.unstack().reindex(columns=positions)
+
+
+def make_base_df(db: Database) -> pd.DataFrame:
+    """Database 스냅샷에서 티커별 기본 fundamental 정보를 만듭니다. (네트워크 요청 없음)"""
+    stocks_df, factors_df = db.stocks_df, db.factors_df
+    to_float = lambda s: pd.to_numeric(s.replace("", np.nan), errors="coerce")
+
+    base_df = pd.DataFrame(index=stocks_df.index)
+    base_df["name"] = stocks_df["Long Name"]
+    base_df["섹터"] = stocks_df["Sector"]
+    base_df["업종"] = stocks_df["Industry"]
+    base_df["가격"] = stocks_df["Price"]
+
+    for table, column, name in QUARTER_ITEMS:
+        quarterly = getattr(db, table)
+        if column not in quarterly.columns:
+            continue
+        nth = _nth_quarters(quarterly, column, list(QUARTER_BEFORE)).reindex(base_df.index)
+        for before in sorted(QUARTER_BEFORE, reverse=True):
+            base_df[f"{QUARTER_BEFORE[before]} {name}"] = nth[before]
+
+    shares = to_float(stocks_df["Shares Outstanding"])
+    shares = shares.where(shares > 0)
+    equity = db.balance_sheet_quarter["Stockholders Equity"].sort_index().groupby(level="Ticker").last()
+    ttm_net_income = factors_df["Net Margin"] * factors_df["TTM Revenue"]
+    base_df["EPS"] = to_float(stocks_df["Trailing Eps"])
+    base_df["BPS"] = nandiv(equity.reindex(base_df.index), shares)
+    base_df["SPS"] = nandiv(factors_df["TTM Revenue"], shares)
+    base_df["ROE"] = nandiv(ttm_net_income, equity.reindex(base_df.index).where(lambda x: x > 0))
+    base_df["PEGR"] = to_float(stocks_df["Trailing Peg Ratio"])
+    base_df["PBR"] = nandiv(base_df["가격"], base_df["BPS"])
+    base_df["PSR"] = nandiv(base_df["가격"], base_df["SPS"])
+    return base_df.rename_axis("Ticker")
+
+
+def make_growth_df(base_df: pd.DataFrame) -> pd.DataFrame:
+    base_df = base_df.dropna()
     compare_dict = {
         "작년 동분기 대비 순수익성장률": ("현분기 순수익", "작년 동분기 순수익"),
         "작년 동분기 영업이익성장률": ("현분기 영업이익", "작년 동분기 영업이익"),
@@ -94,46 +82,39 @@ def make_growth_sheet(excel_path):
     for k, v in compare_dict.items():
         if isinstance(v, tuple):
             this, prev = v
-            growth_df[k] = base_df.apply(lambda x: calc_growth_rate(x[this], x[prev]), axis=1)
+            growth_df[k] = calc_growth_rate(base_df[this].to_numpy(), base_df[prev].to_numpy())
+        elif k in ADJUSTED_COLS:
+            # 음수 배수는 최댓값보다 나쁘게 (max - 값)
+            growth_df[k] = np.where(base_df[v] < 0, base_df[v].max() - base_df[v], base_df[v])
         else:
-            if k in ["PEGR(adjusted)", "PBR(adjusted)", "PSR(adjusted)"]:
-                growth_df[k] = base_df[v].apply(lambda row: -1 * (row - base_df[v].max()) if row < 0 else row)
-            else:
-                growth_df[k] = base_df[v]
-    growth_df = growth_df.round(4)
-    write_excel(growth_df, save_path=excel_path, sheet_name="Growth")
-
-
-def make_score_sheet(excel_path):
-    growth_df = pd.read_excel(excel_path, sheet_name="Growth", index_col="ticker").dropna()
-    rank_df = pd.DataFrame(columns=growth_df.columns, index=growth_df.index)
-    for col in rank_df:
-        if col in ["PEGR(adjusted)", "PBR(adjusted)", "PSR(adjusted)"]:
-            rank_df[col] = growth_df[col].rank(method="min", ascending=True)
-        else:
-            rank_df[col] = growth_df[col].rank(method="min", ascending=False)
-    write_excel(rank_df, save_path=excel_path, sheet_name="Rank")
-    
-    score_df = pd.DataFrame(columns=growth_df.columns, index=growth_df.index)
-    for col in score_df:
-        ranking_ratio = (len(rank_df.index) - rank_df[col] + 1) / len(rank_df.index)
-        if col in ["ROE", "PEGR(adjusted)", "PBR(adjusted)", "PSR(adjusted)"]:
-            score_df[col] = ranking_ratio * 15
-        else:
-            score_df[col] = ranking_ratio * 5
-    score_df["총점"] = score_df.sum(axis=1)
-    score_df = score_df.round(2)
-    write_excel(score_df, save_path=excel_path, sheet_name="Score")
+            growth_df[k] = base_df[v]
+    return growth_df.round(4)
 
 
-if __name__ == "__main__":
+def make_rank_and_score_df(growth_df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    items = [ScoreItem(col, SCORE_WEIGHTS.get(col, 5), ascending=col in ADJUSTED_COLS) for col in growth_df.columns]
+    rank_df, score_df = make_scores(growth_df, items)
+    return rank_df, score_df.round(2)
 
-    # 로그 설정
-    logging.basicConfig(filename='log.txt', level=logging.ERROR, format='%(asctime)s - %(levelname)s - %(message)s')
 
+def make_report(db: Database, excel_path: str):
+    base_df = make_base_df(db)
+    growth_df = make_growth_df(base_df)
+    rank_df, score_df = make_rank_and_score_df(growth_df)
+    with ReportWriter(excel_path) as writer:
+        writer.add_sheet(base_df, "Base")
+        writer.add_sheet(growth_df, "Growth")
+        writer.add_sheet(rank_df, "Rank")
+        writer.add_sheet(score_df, "Score")
 
-    # make fundamental info sheet
-    excel_path = f"stock_{get_today(to_str=True)}.xlsx"
-    make_base_sheet(excel_path)
-    make_growth_sheet(excel_path)
-    make_score_sheet(excel_path)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--load-dir", default=None, help="DB/usa/<yymmdd> 폴더 (기본: 최신 버전)")
+    parser.add_argument("--store", default=None, help="SnapshotStore 경로 (e.g. DB/usa_store)")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    db = Database(load_dir=args.load_dir, store=args.store)
+    excel_path = f"stock_{db.version}.xlsx" if args.output is None else args.output
+    make_report(db, excel_path)
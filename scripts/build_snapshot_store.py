@@ -0,0 +1,25 @@
+import os
+import sys
+import argparse
+
+PROJECT_HOME = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_HOME)
+
+from tqdm import tqdm
+
+from core.manifest import list_versions
+from core.snapshot_store import SnapshotStore
+
+
+if __name__ == "__main__":
+    # DB/usa/<yymmdd> 폴더들 중 아직 store에 없는 버전을 오래된 순서대로 변경분만 저장
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db-dir", default="DB/usa")
+    parser.add_argument("--store-dir", default="DB/usa_store")
+    args = parser.parse_args()
+
+    store = SnapshotStore(args.store_dir)
+    latest = store.versions[-1] if store.versions else ""
+    versions = [f for f in list_versions(args.db_dir) if f > latest]
+    for version in tqdm(versions):
+        store.commit_dir(os.path.join(args.db_dir, version))
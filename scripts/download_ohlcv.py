@@ -1,39 +1,39 @@
 import os
 import sys
-import time
-import random
-from glob import glob
-from concurrent.futures import ThreadPoolExecutor
+import argparse
 
 PROJECT_HOME = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 sys.path.append(PROJECT_HOME)
 
 import pandas as pd
-from tqdm import tqdm
-import yfinance as yf
 
-
-def download_ohlcv(ticker: str, max_retries: int=10):
-    company = yf.Ticker(ticker)
-    time.sleep(1 + random.random())
-    for retry in range(max_retries):
-        try:
-            ohlcv = company.history(period="1y", raise_errors=True)
-        except Exception as e:
-            time.sleep((2 ** retry) + random.random())
-    ohlcv["Ticker"] = ticker
-    ohlcv = ohlcv.reset_index().set_index(["Ticker", "Date"])
-    return ohlcv
+from core.manifest import list_versions
+from core.ohlcv_store import OhlcvStore, period_start
+from utils import *
 
 
 if __name__ == "__main__":
-    parquet_paths = glob("DB/**/price.parquet")
-    df = pd.read_parquet(parquet_paths[-1])
-    tickers = df.index.to_list()
-
-    df_list = []
-    with ThreadPoolExecutor(max_workers=8) as executor:
-        for result_df in tqdm(executor.map(download_ohlcv, tickers), total=len(tickers)):
-            df_list.append(result_df)
-    ohlcv_df = pd.concat(df_list, axis=0)
-    ohlcv_df.to_parquet("ASSETS/ohlcv.parquet")
+    # 마지막으로 저장한 일봉 이후만 받아서 OhlcvStore에 추가하고, 필요하면 DB 버전 폴더의 ohlcv.parquet로 내보냄
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--store", default="DB/usa_ohlcv")
+    parser.add_argument("--load-dir", default=None, help="티커 목록을 읽을 DB/usa/<yymmdd> 폴더 (기본: 최신 버전)")
+    parser.add_argument("--export", default=None, help="ohlcv.parquet 저장 경로 (e.g. DB/usa/<yymmdd>/ohlcv.parquet)")
+    parser.add_argument("--period", default="1y", help="처음 받는 티커의 기간, export 기간")
+    parser.add_argument("--max-workers", type=int, default=8)
+    parser.add_argument("--no-compact", action="store_true", help="받은 뒤 월별 part 파일을 합치지 않음")
+    args = parser.parse_args()
+
+    set_logger()
+
+    load_dir = args.load_dir
+    if load_dir is None:
+        load_dir = f"DB/usa/{list_versions('DB/usa')[-1]}"
+    universe = load_usa_universe(load_dir)
+    tickers = universe.index.tolist() if universe is not None else pd.read_parquet(f"{load_dir}/info.parquet").index.tolist()
+
+    store = OhlcvStore(args.store)
+    store.update(tickers, period=args.period, max_workers=args.max_workers)
+    if not args.no_compact:
+        store.compact()
+    if args.export is not None:
+        store.export(args.export, start=period_start(args.period), tickers=tickers)
@@ -0,0 +1,40 @@
+import os
+import sys
+import argparse
+
+PROJECT_HOME = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_HOME)
+
+from core import YFDownloader, find_previous_version
+from core.raw_cache import RawCache
+from utils import *
+
+
+if __name__ == "__main__":
+    # DB/usa_raw에 저장된 원본으로 후처리만 다시 실행해서 DB/usa/<yymmdd>를 다시 만듦 (yfinance 요청 없음)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--raw-dir", default="DB/usa_raw")
+    parser.add_argument("--fetch-date", default=None, help="다시 만들 버전 yymmdd (기본: 원본이 있는 가장 최근 날짜)")
+    parser.add_argument("--save-dir", default=None, help="기본: DB/usa/<fetch-date>")
+    parser.add_argument("--data-types", nargs="+", default=None, help="다시 만들 데이터 타입 (기본: 전체, manifest에도 이 타입만 남음)")
+    parser.add_argument("--prev-dir", default=None, help="원본이 없는 데이터를 가져올 이전 버전 폴더 (기본: save-dir 이전 버전)")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    set_logger()
+
+    raw_cache = RawCache(args.raw_dir)
+    fetch_dates = raw_cache.fetch_dates()
+    if not fetch_dates:
+        raise FileNotFoundError(f"No raw data in {args.raw_dir}")
+    fetch_date = fetch_dates[-1] if args.fetch_date is None else args.fetch_date
+    save_dir = f"DB/usa/{fetch_date}" if args.save_dir is None else args.save_dir
+    prev_dir = args.prev_dir
+    if prev_dir is None:
+        db_dir = os.path.dirname(os.path.normpath(save_dir))
+        prev_version = find_previous_version(db_dir, before=fetch_date)
+        prev_dir = None if prev_version is None else os.path.join(db_dir, prev_version)
+
+    yf_downloader = YFDownloader(save_dir=save_dir)
+    yf_downloader.rebuild(raw_cache, fetch_date, data_types=args.data_types, max_workers=args.max_workers, prev_dir=prev_dir)
+    yf_downloader.save()
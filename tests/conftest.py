@@ -0,0 +1,5 @@
+import os
+import sys
+
+PROJECT_HOME = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_HOME)
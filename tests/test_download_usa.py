@@ -0,0 +1,161 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("yfinance")
+
+from core import download_usa
+from core.download_usa import AsyncTokenBucket, download_ohlcv_batched, split_ohlcv_chunk
+
+DATES = pd.bdate_range("2025-01-02", periods=10, tz="America/New_York", name="Date")
+
+
+def _bars(close: float = 100.0) -> pd.DataFrame:
+    # yf.download 한 티커 분량 (다른 티커와 날짜를 맞추느라 Volume이 float)
+    c = close + np.arange(len(DATES), dtype=float)
+    return pd.DataFrame(
+        {"Open": c, "High": c + 1, "Low": c - 1, "Close": c, "Volume": np.arange(len(DATES), dtype=float) * 100},
+        index=DATES,
+    )
+
+
+def _response(frames: dict[str, pd.DataFrame]) -> pd.DataFrame:
+    # yf.download(group_by="ticker") 형식: (Ticker, Price) 컬럼
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, axis=1, names=["Ticker", "Price"])
+
+
+class FakeProvider:
+    """티커별로 정해진 횟수만큼 실패(빈 값)한 뒤 일봉을 돌려주는 가짜 yf.download"""
+    def __init__(self, fail_times: dict[str, int] | None = None, missing: tuple[str, ...] = (), raise_on: tuple[str, ...] = ()):
+        self.fail_times = dict(fail_times or {})
+        self.missing = missing
+        self.raise_on = raise_on
+        self.calls = []
+
+    def __call__(self, tickers: list[str], period: str) -> pd.DataFrame:
+        self.calls.append(list(tickers))
+        if any(t in self.raise_on for t in tickers):
+            self.raise_on = ()  # 한 번만 실패
+            raise ConnectionError("rate limited")
+        frames = {}
+        for ticker in tickers:
+            if ticker in self.missing:
+                continue
+            if self.fail_times.get(ticker, 0) > 0:
+                self.fail_times[ticker] -= 1
+                frames[ticker] = _bars() * np.nan
+            else:
+                frames[ticker] = _bars()
+        return _response(frames)
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(download_usa.time, "sleep", lambda seconds: None)
+
+
+def test_split_matches_per_ticker_layout():
+    results, failed = split_ohlcv_chunk(_response({"AAA": _bars(), "BBB": _bars(50)}), ["AAA", "BBB"])
+
+    assert failed == []
+    expected = download_usa._postprocess_ohlcv(_bars().astype({"Volume": "int64"}), "AAA")
+    pd.testing.assert_frame_equal(results["AAA"], expected)
+    assert results["BBB"].index.names == ["Ticker", "Date"]
+    assert results["BBB"]["Volume"].dtype == np.int64
+
+
+def test_split_single_ticker_response():
+    # 티커 하나만 요청하면 필드 컬럼만 옴
+    results, failed = split_ohlcv_chunk(_bars(), ["AAA"])
+
+    assert failed == []
+    assert results["AAA"].index.get_level_values("Ticker").unique().tolist() == ["AAA"]
+
+
+def test_split_reports_empty_and_missing_tickers():
+    raw = _response({"AAA": _bars(), "EMPTY": _bars() * np.nan})
+    results, failed = split_ohlcv_chunk(raw, ["AAA", "EMPTY", "MISSING"])
+
+    assert list(results) == ["AAA"]
+    assert failed == ["EMPTY", "MISSING"]
+
+
+def test_split_drops_rows_before_listing():
+    bars = _bars()
+    bars.iloc[:3] = np.nan  # 다른 티커보다 늦게 상장
+    results, _ = split_ohlcv_chunk(_response({"AAA": _bars(), "NEW": bars}), ["AAA", "NEW"])
+
+    assert len(results["NEW"]) == len(DATES) - 3
+
+
+def test_batched_retries_only_failed_tickers():
+    provider = FakeProvider(fail_times={"FLAKY": 1})
+    tickers = ["AAA", "BBB", "FLAKY", "CCC", "DDD"]
+    results, failed = download_ohlcv_batched(tickers, chunk_size=2, fetch_func=provider, sleep=0)
+
+    assert failed == []
+    assert sorted(results) == sorted(tickers)
+    assert provider.calls == [["AAA", "BBB"], ["FLAKY", "CCC"], ["DDD"], ["FLAKY"]]
+
+
+def test_batched_reports_tickers_that_never_succeed():
+    provider = FakeProvider(fail_times={"EMPTY": 99}, missing=("MISSING",))
+    results, failed = download_ohlcv_batched(
+        ["AAA", "EMPTY", "MISSING"], chunk_size=10, max_retries=3, fetch_func=provider, sleep=0
+    )
+
+    assert list(results) == ["AAA"]
+    assert failed == ["EMPTY", "MISSING"]
+    assert provider.calls == [["AAA", "EMPTY", "MISSING"]] + [["EMPTY", "MISSING"]] * 2
+
+
+def test_batched_retries_chunk_that_raised():
+    provider = FakeProvider(raise_on=("BBB",))
+    results, failed = download_ohlcv_batched(["AAA", "BBB", "CCC"], chunk_size=2, fetch_func=provider, sleep=0)
+
+    assert failed == []
+    assert sorted(results) == ["AAA", "BBB", "CCC"]
+    assert provider.calls == [["AAA", "BBB"], ["CCC"], ["AAA", "BBB"]]
+
+
+def test_token_bucket_default_capacity_fits_estimates():
+    # rps가 estimates 비용(2)보다 작아도 estimates 요청이 나갈 수 있어야 함
+    async def run():
+        await asyncio.wait_for(AsyncTokenBucket(1.0).acquire(2), timeout=1)
+
+    asyncio.run(run())
+
+
+def test_token_bucket_charges_debt_above_capacity():
+    async def run():
+        limiter = AsyncTokenBucket(10.0, capacity=1)
+        await asyncio.wait_for(limiter.acquire(2), timeout=1)  # 가득 찬 1개로 보내고 1개는 빚
+        start = time.monotonic()
+        await limiter.acquire(1)
+        return time.monotonic() - start
+
+    assert asyncio.run(run()) >= 0.15  # 빚 1개 + 요청 1개 = 0.2초
+
+
+def test_async_download_with_estimates_at_one_rps(monkeypatch):
+    def fake_request_once(yf_ticker, yfdata_type, info=None, raw_cache=None):
+        return pd.DataFrame({"Type": [yfdata_type]}, index=pd.Index([yf_ticker.ticker], name="Ticker"))
+
+    monkeypatch.setattr(download_usa, "_request_once", fake_request_once)
+
+    async def run():
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            return await asyncio.wait_for(
+                download_usa._download_single_ticker_async(
+                    "AAA", AsyncTokenBucket(1.0), executor, data_types=["info", "estimates"]
+                ),
+                timeout=5,
+            )
+
+    assert sorted(asyncio.run(run())) == ["estimates", "info"]
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+from natsort import natsorted
+
+from utils.misc import ReportWriter
+
+
+def _frame(tickers: list[str]) -> pd.DataFrame:
+    n = len(tickers)
+    return pd.DataFrame(
+        {
+            "Ticker": tickers,
+            "Name": [f"{t} Inc" for t in tickers],
+            "Score": np.linspace(0, 1, n),
+            "Upside": [np.nan if i % 3 == 0 else i * 0.1 for i in range(n)],
+        }
+    )
+
+
+def _write(path, sheets: dict, streaming: bool) -> dict[str, pd.DataFrame]:
+    with ReportWriter(str(path), streaming=streaming) as writer:
+        for name, df in sheets.items():
+            writer.add_sheet(df, name)
+    return pd.read_excel(path, sheet_name=None)
+
+
+@pytest.mark.parametrize(
+    "sheet",
+    [
+        _frame(["T10", "T2", "T1", "AAPL"]),
+        _frame(["B", "A"]).to_dict("records"),
+    ],
+    ids=["frame", "records"],
+)
+def test_streaming_matches_non_streaming(tmp_path, sheet):
+    expected = _write(tmp_path / "memory.xlsx", {"Base": sheet}, streaming=False)
+    actual = _write(tmp_path / "stream.xlsx", {"Base": sheet}, streaming=True)
+
+    pd.testing.assert_frame_equal(actual["Base"], expected["Base"])
+    assert actual["Base"]["Ticker"].tolist() == natsorted(actual["Base"]["Ticker"])
+
+
+def test_streaming_accepts_list_of_frames(tmp_path):
+    chunks = [_frame(["A1", "A2"]), _frame(["B1", "B2"])]
+    expected = _write(tmp_path / "memory.xlsx", {"Base": pd.concat(chunks)}, streaming=False)
+    actual = _write(tmp_path / "stream.xlsx", {"Base": chunks}, streaming=True)
+
+    pd.testing.assert_frame_equal(actual["Base"], expected["Base"])
+
+
+def test_streaming_writes_inf_without_error(tmp_path):
+    df = _frame(["A", "B"]).assign(Upside=[np.inf, -np.inf])
+    actual = _write(tmp_path / "stream.xlsx", {"Base": df}, streaming=True)
+
+    assert actual["Base"]["Upside"].isna().all()
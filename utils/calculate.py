@@ -2,6 +2,7 @@ import math
 
 
 def nandiv(numerator, denominator):
+    # numpy 배열, Series도 그대로 원소별로 계산됨 (NaN은 NaN)
     if numerator is None or denominator is None:
         return None
     else:
@@ -11,6 +12,7 @@ def nandiv(numerator, denominator):
 def calc_growth_rate(value_base, value_before):
     """
     value_before 값과 비교하여 value_base 값의 증가 비율을 계산합니다.
+    numpy 배열이나 Series를 넣으면 원소별로 한 번에 계산합니다. (값이 없으면 NaN)
 
     Args:
         value_base: 기준 값입니다.
@@ -26,4 +28,32 @@ def calc_growth_rate(value_base, value_before):
     
 
 def calc_error_rate(true_value, estimated_value):
-    return abs(true_value - estimated_value) / (true_value + 1e-10)
\ No newline at end of file
+    return abs(true_value - estimated_value) / (true_value + 1e-10)
+
+
+def kelly_betsize(p, b):
+    """
+    Kelly Criterion으로 승률과 손익비에 따른 베팅 비율을 계산합니다. (numpy 배열도 원소별로 계산됨)
+
+    Args:
+        p: 승률입니다. (0 ~ 1)
+        b: 손익비(평균 이익 / 평균 손실)입니다. (e.g. 2.0이면 이길 때 건 돈의 2배를 얻음)
+
+    Returns:
+        자산 대비 베팅 비율입니다. 음수면 베팅하지 않는 것이 유리합니다.
+    """
+    return (p * b - (1 - p)) / b
+
+
+def kelly_rr_ratio(p, f):
+    """
+    승률과 베팅 비율로 Kelly Criterion을 만족하는 손익비를 계산합니다. (kelly_betsize의 역함수)
+
+    Args:
+        p: 승률입니다. (0 ~ 1)
+        f: 자산 대비 베팅 비율입니다. (0 ~ 1)
+
+    Returns:
+        손익비입니다.
+    """
+    return (p - 1) / (f - p)
@@ -2,7 +2,11 @@ import os
 import re
 import string
 
+from typing import Callable, Iterable
+
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from natsort import natsort_keygen
 
 from utils.date import get_today
@@ -42,52 +46,211 @@ def camel_to_title_case(text):
     return title_case
 
 
-def measure_excel_col_length(df: pd.DataFrame):
-    max_value_lengths = df.map(lambda x: len(str(x))).median()
-    columns = df.columns
+def excel_col_name(idx: int) -> str:
+    # 0 -> A, 25 -> Z, 26 -> AA, ...
+    name = ""
+    idx += 1
+    while idx > 0:
+        idx, rem = divmod(idx - 1, 26)
+        name = string.ascii_uppercase[rem] + name
+    return name
+
+
+def _title_length(title) -> float:
+    return sum(1.5 if is_alphabet(char) else 2 if is_korean(char) else 0 for char in str(title))
+
+
+def measure_excel_col_length(df: pd.DataFrame, sample_rows: int = 10_000):
+    # 컬럼별 값 길이의 중앙값과 제목 길이 중 큰 값 (큰 시트는 sample_rows개 행만 봄)
+    sample = df.sample(sample_rows, random_state=0) if len(df) > sample_rows else df
+    value_lengths = {col: sample[col].astype(str).str.len().median() for col in sample.columns}
     col_lengths = {}
-    for idx, col in enumerate(columns):
-        title_length = 0
-        for char in col:
-            title_length += 1.5 if is_alphabet(char) else 0
-            title_length += 2 if is_korean(char) else 0
-        value_length = max_value_lengths[col]
-
-        if title_length > value_length:
-            col_lengths[string.ascii_uppercase[idx + 1]] = round(title_length)  # idx + 1은 인덱스 컬럼 A를 제외하기 위함
-        else:
-            col_lengths[string.ascii_uppercase[idx + 1]] = round(value_length)
+    for idx, col in enumerate(df.columns):
+        value_length = value_lengths[col] if pd.notna(value_lengths[col]) else 0
+        # 인덱스 컬럼(A, ...)은 제외
+        col_lengths[excel_col_name(idx + df.index.nlevels)] = round(max(_title_length(col), value_length))
     return col_lengths
 
 
-def write_excel(df: pd.DataFrame | list[dict], save_path=None, sheet_name=None, rewrite=False):
+def _prepare_sheet(df: pd.DataFrame | list[dict]) -> pd.DataFrame:
     if isinstance(df, list):
         df = pd.DataFrame.from_dict(df)
-
     if "Ticker" in df.columns:
         df = df.set_index("Ticker")
+    return df.sort_index(key=natsort_keygen())
 
-    df = df.sort_index(key=natsort_keygen())
 
-    if save_path is None:
-        save_path = f"stock_{get_today(to_str=True)}.xlsx"
+def _is_single_sheet(df) -> bool:
+    # DataFrame 하나 또는 dict 목록(행들)이면 조각 하나, 그 밖의 iterable은 DataFrame 조각들
+    return isinstance(df, pd.DataFrame) or (isinstance(df, list) and all(isinstance(row, dict) for row in df))
 
-    if not rewrite and os.path.exists(save_path):
-        sheet_dict = pd.read_excel(save_path, sheet_name=None, index_col="Ticker")
-        if sheet_name in sheet_dict:
-            sheet_dict.pop(sheet_name)  # 중복되는 name의 sheet는 다시 써야 하므로 제거
 
-    new_sheet_name = f"Sheet{len(sheet_dict)+1}" if sheet_name is None else sheet_name
+class ReportWriter:
+    """
+    여러 시트를 모아서 workbook을 한 번에 씁니다.
+
+    streaming=True이면 add_sheet를 호출할 때 바로 행 단위로 쓰고 메모리에 남기지 않습니다.
+    (xlsxwriter constant_memory 모드, 시트는 추가한 순서대로 쓰이며 DataFrame 조각들의 iterator도 받음)
+
+    e.g.
+        with ReportWriter("stock.xlsx") as writer:
+            writer.add_sheet(base_df, "Base")
+            writer.add_sheet(score_df, "Score")
+    """
+    def __init__(self, save_path: str | None = None, streaming: bool = False):
+        self.save_path = f"stock_{get_today(to_str=True)}.xlsx" if save_path is None else save_path
+        self.streaming = streaming
+        self._sheets = {}
+        self._workbook = None
+        if streaming:
+            import xlsxwriter
+            # inf는 xlsxwriter가 숫자로 쓰지 못하므로 #NUM! 오류 셀로 씀
+            self._workbook = xlsxwriter.Workbook(self.save_path, {"constant_memory": True, "nan_inf_to_errors": True})
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.save()
+
+    @property
+    def sheet_names(self) -> list[str]:
+        if self.streaming:
+            return [sheet.name for sheet in self._workbook.worksheets()]
+        return list(self._sheets)
+
+    def add_sheet(self, df: pd.DataFrame | list[dict] | Iterable[pd.DataFrame], sheet_name: str | None = None):
+        sheet_name = f"Sheet{len(self.sheet_names) + 1}" if sheet_name is None else sheet_name
+        if self.streaming:
+            self._write_stream([df] if _is_single_sheet(df) else df, sheet_name)
+        else:
+            self._sheets[sheet_name] = _prepare_sheet(df)  # 같은 이름이면 덮어씀
 
-    with pd.ExcelWriter(save_path, engine="xlsxwriter") as writer:
-        if not rewrite:
-            for sheet_name, exist_df in sheet_dict.items():
-                exist_df.to_excel(writer, sheet_name=sheet_name, freeze_panes=(1, 1))
-                excel_col_length = measure_excel_col_length(exist_df)
-                for alphabet_col, length in excel_col_length.items():
+    def save(self):
+        if self.streaming:
+            self._workbook.close()
+            return
+        with pd.ExcelWriter(self.save_path, engine="xlsxwriter") as writer:
+            for sheet_name, df in self._sheets.items():
+                df.to_excel(writer, sheet_name=sheet_name, freeze_panes=(1, df.index.nlevels))
+                for alphabet_col, length in measure_excel_col_length(df).items():
                     writer.sheets[sheet_name].set_column(f"{alphabet_col}:{alphabet_col}", length)
 
-        df.to_excel(writer, sheet_name=new_sheet_name, freeze_panes=(1, 1))
-        excel_col_length = measure_excel_col_length(df)
-        for alphabet_col, length in excel_col_length.items():
-            writer.sheets[new_sheet_name].set_column(f"{alphabet_col}:{alphabet_col}", length)
\ No newline at end of file
+    def _write_stream(self, chunks: Iterable[pd.DataFrame | list[dict]], sheet_name: str):
+        worksheet = self._workbook.add_worksheet(sheet_name)
+        row = 0
+        for df in chunks:
+            # 스트리밍이 아닐 때와 같은 정렬 (조각 안에서만 정렬되므로 조각은 순서대로 넘겨야 함)
+            df = _prepare_sheet(df).reset_index()
+            if row == 0:
+                worksheet.freeze_panes(1, 1)
+                worksheet.write_row(0, 0, [str(col) for col in df.columns])
+                for alphabet_col, length in measure_excel_col_length(df.set_index(df.columns[0])).items():
+                    worksheet.set_column(f"{alphabet_col}:{alphabet_col}", length)
+                row = 1
+            # 날짜는 문자열로, NaN은 빈 칸으로
+            for col in df.columns:
+                if not (pd.api.types.is_numeric_dtype(df[col]) or pd.api.types.is_bool_dtype(df[col])):
+                    df[col] = df[col].astype(str).where(df[col].notna())
+            for values in df.astype(object).where(df.notna(), None).itertuples(index=False):
+                worksheet.write_row(row, 0, values)
+                row += 1
+
+
+def write_excel(df: pd.DataFrame | list[dict], save_path=None, sheet_name=None, rewrite=False):
+    # 기존 시트를 모두 다시 읽어서 쓰므로, 여러 시트를 쓸 때는 ReportWriter를 사용
+    writer = ReportWriter(save_path)
+    if not rewrite and os.path.exists(writer.save_path):
+        for exist_name, exist_df in pd.read_excel(writer.save_path, sheet_name=None, index_col="Ticker").items():
+            if exist_name != sheet_name:  # 중복되는 name의 sheet는 새로 씀
+                writer.add_sheet(exist_df, exist_name)
+    writer.add_sheet(df, sheet_name)
+    writer.save()
+
+
+def write_parquet_stream(
+    frames: Callable[[], Iterable[pd.DataFrame]], save_path: str, batch_rows: int = 200_000
+) -> bool:
+    """
+    여러 DataFrame을 pd.concat 한 결과와 같은 parquet 파일을, 전체를 한 번에 합치지 않고 row group 단위로 씁니다.
+
+    Args:
+        frames: 호출할 때마다 같은 DataFrame들을 같은 순서로 돌려주는 함수입니다. (스키마 확정, 쓰기 두 번 호출)
+        save_path: 저장할 parquet 경로입니다.
+        batch_rows: 한 번에 합쳐서 쓰는 행 수입니다. 메모리 사용량은 이 크기에 비례합니다.
+
+    Returns:
+        파일을 썼으면 True, 입력이 비어 있으면 False입니다.
+    """
+    # 1) 각 DataFrame의 첫 행만 합쳐서 전체 concat과 같은 컬럼 순서, dtype을 정함
+    heads = [df.head(1) for df in frames()]
+    if not heads:
+        return False
+    template = pd.concat(heads, axis=0)
+    columns, dtypes = template.columns, template.dtypes
+    schema = pa.Table.from_pandas(template, preserve_index=True).schema
+    del heads, template
+
+    # 첫 행이 모두 None인 object 컬럼은 null 타입이 되므로, 값이 있는 DataFrame에서 타입을 찾음
+    null_fields = [field.name for field in schema if pa.types.is_null(field.type)]
+    for df in frames() if null_fields else []:
+        for name in list(null_fields):
+            if name in df.columns:
+                values = df[name]
+            elif name in df.index.names:
+                values = df.index.get_level_values(name)
+            else:
+                continue
+            field_type = pa.Array.from_pandas(values).type
+            if not pa.types.is_null(field_type):
+                index = schema.get_field_index(name)
+                schema = schema.set(index, schema.field(index).with_type(field_type))
+                null_fields.remove(name)
+        if not null_fields:
+            break
+
+    # 2) batch_rows 단위로 합쳐서 스키마에 맞춘 뒤 row group으로 씀
+    def to_table(batch: list[pd.DataFrame]) -> pa.Table:
+        chunk = pd.concat(batch, axis=0).reindex(columns=columns).astype(dtypes)
+        return pa.Table.from_pandas(chunk, schema=schema, preserve_index=True)
+
+    tmp_path = f"{save_path}.tmp"
+    with pq.ParquetWriter(tmp_path, schema) as writer:
+        batch, n_rows = [], 0
+        for df in frames():
+            batch.append(df)
+            n_rows += len(df)
+            if n_rows >= batch_rows:
+                writer.write_table(to_table(batch))
+                batch, n_rows = [], 0
+        if batch:
+            writer.write_table(to_table(batch))
+    os.replace(tmp_path, save_path)
+    return True
+
+
+def _to_parquet_scalar(value, field_type: pa.DataType):
+    ts = pd.Timestamp(value)
+    if pa.types.is_date(field_type):
+        return ts.date()
+    if field_type.tz is not None:
+        return ts.tz_localize(field_type.tz) if ts.tz is None else ts.tz_convert(field_type.tz)
+    return ts.tz_localize(None) if ts.tz is not None else ts
+
+
+def adapt_parquet_filters(filters: list[tuple] | None, schema: pa.Schema) -> list[tuple] | None:
+    # pd.read_parquet filters의 날짜 비교값을 파일에 저장된 타입(date32, timestamp[tz])에 맞춤
+    if filters is None:
+        return None
+    adapted = []
+    for column, op, value in filters:
+        index = schema.get_field_index(column)
+        if index >= 0:
+            field_type = schema.field(index).type
+            if pa.types.is_date(field_type) or pa.types.is_timestamp(field_type):
+                if op in ("in", "not in"):
+                    value = [_to_parquet_scalar(v, field_type) for v in value]
+                else:
+                    value = _to_parquet_scalar(value, field_type)
+        adapted.append((column, op, value))
+    return adapted
@@ -1,4 +1,7 @@
+import io
+import os
 import re
+import bisect
 import requests
 
 import pandas as pd
@@ -35,41 +38,159 @@ def _get_special_ticker(ticker_series):
     return ticker_series[mask].index.tolist()
 
 
-def _get_duplicate_usa_tickers(usa_df):
+class _PrefixIndex:
+    # 정렬된 이름 목록에서 prefix로 시작하는 이름들의 위치를 이분 탐색으로 찾음
+    def __init__(self, names: list[str]):
+        self.order = sorted(range(len(names)), key=names.__getitem__)
+        self.sorted_names = [names[i] for i in self.order]
+
+    def match(self, prefix: str) -> list[int]:
+        lo = bisect.bisect_left(self.sorted_names, prefix)
+        hi = bisect.bisect_left(self.sorted_names, prefix + "\U0010ffff", lo)
+        return self.order[lo:hi]
+
+
+def find_duplicate_usa_ticker_groups(usa_df) -> tuple[list[str], dict[str, list[str]]]:
+    """
+    Security Name이 같은 단어로 시작하는 티커들을 묶어서 보통주가 아닌 티커(우선주, Warrant, Class B 등)를 찾습니다.
+
+    Returns:
+        (제거할 티커 목록, {기준 티커: 같은 이름으로 시작하는 다른 티커 목록}) 입니다.
+    """
+    tickers = usa_df.index.tolist()
+    names = usa_df["Security Name"].tolist()
+    criteria = [remove_parentheses(name) for name in names]
+    index = _PrefixIndex(criteria)
+    is_special = dict(zip(tickers, usa_df.index.isin(_get_special_ticker(usa_df["Security Name"]))))
+
     duplicate_tickers = set()
-    criteria = usa_df["Security Name"].apply(remove_parentheses)
-    for row in usa_df.itertuples():
-        base = row[0]
+    groups = {}
+    for i, base in enumerate(tickers):
         if base in duplicate_tickers:
             continue
-        security_name = remove_parentheses(row[1])
-        target_name = to_raw_char(get_start_words(security_name))
-        target_criteria = criteria[criteria.index != base]  # 자기 자신 제외
-        mask = target_criteria.str.startswith(target_name)
-        if mask.any():
-            duplicate_candidates = target_criteria.index[mask].tolist()
+        target_name = to_raw_char(get_start_words(criteria[i]))
+        duplicate_candidates = [tickers[j] for j in sorted(index.match(target_name)) if tickers[j] != base]  # 자기 자신 제외
+        if duplicate_candidates:
+            groups[base] = duplicate_candidates
             for dup_cand in duplicate_candidates:
                 if dup_cand.startswith(base):
                     duplicate_tickers.add(dup_cand)
-            special_tickers = _get_special_ticker(usa_df.loc[[base] + duplicate_candidates, "Security Name"])
-            duplicate_tickers.update(special_tickers)
+            duplicate_tickers.update(t for t in [base] + duplicate_candidates if is_special[t])
 
-    return list(duplicate_tickers)
+    return sorted(duplicate_tickers), groups
 
 
-def get_all_usa_tickers(do_filter=True, as_df=False):
-    # 1) 원천 파일 URL
-    url_nasdaq = "https://www.nasdaqtrader.com/dynamic/symdir/nasdaqlisted.txt"
-    url_other  = "https://www.nasdaqtrader.com/dynamic/symdir/otherlisted.txt"
+def _get_duplicate_usa_tickers(usa_df):
+    return find_duplicate_usa_ticker_groups(usa_df)[0]
+
+
+SYMBOL_URLS = {
+    "nasdaqlisted.txt": "https://www.nasdaqtrader.com/dynamic/symdir/nasdaqlisted.txt",
+    "otherlisted.txt": "https://www.nasdaqtrader.com/dynamic/symdir/otherlisted.txt",
+}
+SYMBOL_DIR = "symbols"
+UNIVERSE_FILE = "universe.parquet"
+UNIVERSE_CHANGES_FILE = "universe_changes.parquet"
+
+
+def fetch_usa_symbol_files() -> dict[str, str]:
+    # nasdaqtrader 원천 파일 내용 {파일 이름: text}
+    symbol_files = {}
+    for file_name, url in SYMBOL_URLS.items():
+        response = requests.get(url, timeout=30)
+        response.raise_for_status()
+        symbol_files[file_name] = response.text
+    return symbol_files
+
+
+def load_usa_symbol_files(version_dir: str) -> dict[str, str]:
+    # DB/usa/<version>/symbols에 저장해 둔 원천 파일 (offline 모드)
+    symbol_files = {}
+    for file_name in SYMBOL_URLS:
+        path = os.path.join(version_dir, SYMBOL_DIR, file_name)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Symbol file not found: {path}")
+        with open(path, encoding="utf-8") as f:
+            symbol_files[file_name] = f.read()
+    return symbol_files
+
+
+def find_latest_universe_dir(root: str = "DB/usa") -> str | None:
+    # 원천 파일이 저장된 가장 최근 버전 폴더
+    versions = [
+        f for f in os.listdir(root)
+        if os.path.isdir(os.path.join(root, f, SYMBOL_DIR))
+    ] if os.path.isdir(root) else []
+    return os.path.join(root, max(versions)) if versions else None
+
+
+def save_usa_universe(version_dir: str, symbol_files: dict[str, str], usa_df: pd.DataFrame):
+    # 원천 파일과 필터링된 티커 목록을 버전 폴더에 함께 저장
+    os.makedirs(os.path.join(version_dir, SYMBOL_DIR), exist_ok=True)
+    for file_name, text in symbol_files.items():
+        with open(os.path.join(version_dir, SYMBOL_DIR, file_name), "w", encoding="utf-8") as f:
+            f.write(text)
+    usa_df.to_parquet(os.path.join(version_dir, UNIVERSE_FILE))
+
+
+def load_usa_universe(version_dir: str) -> pd.DataFrame | None:
+    path = os.path.join(version_dir, UNIVERSE_FILE)
+    return pd.read_parquet(path) if os.path.exists(path) else None
+
+
+def diff_usa_universe(prev_df: pd.DataFrame, curr_df: pd.DataFrame) -> dict:
+    """
+    두 버전의 티커 목록(get_all_usa_tickers(as_df=True))을 비교합니다.
+
+    Security Name(괄호 제외)이 같은데 티커만 바뀐 경우는 added/removed 대신 renamed로 분류합니다.
+
+    Returns:
+        {"added": [티커], "removed": [티커], "renamed": {이전 티커: 새 티커}}
+    """
+    added = curr_df.index.difference(prev_df.index)
+    removed = prev_df.index.difference(curr_df.index)
+    prev_names = prev_df.loc[removed, "Security Name"].map(remove_parentheses)
+    curr_names = curr_df.loc[added, "Security Name"].map(remove_parentheses)
+    # 같은 이름이 여러 개면 어느 티커로 바뀌었는지 알 수 없으므로 제외
+    prev_names = prev_names[~prev_names.duplicated(keep=False)]
+    curr_names = curr_names[~curr_names.duplicated(keep=False)]
+    name_to_new = pd.Series(curr_names.index, index=curr_names.to_numpy())
+    renamed = {
+        old: name_to_new[name] for old, name in prev_names.items() if name in name_to_new.index
+    }
+    renamed_to = set(renamed.values())
+    return {
+        "added": [t for t in added if t not in renamed_to],
+        "removed": [t for t in removed if t not in renamed],
+        "renamed": renamed,
+    }
+
+
+def save_universe_diff(version_dir: str, diff: dict, prev_version: str):
+    # 신규 상장/상장 폐지/티커 변경을 버전 폴더에 기록 (상장 폐지 티커는 이 버전 데이터에 없음)
+    rows = [(ticker, "added", None) for ticker in diff["added"]]
+    rows += [(ticker, "removed", None) for ticker in diff["removed"]]
+    rows += [(new, "renamed", old) for old, new in diff["renamed"].items()]
+    changes = pd.DataFrame(rows, columns=["Ticker", "Change", "Previous Ticker"]).set_index("Ticker").sort_index()
+    changes["Previous Version"] = prev_version
+    os.makedirs(version_dir, exist_ok=True)
+    changes.to_parquet(os.path.join(version_dir, UNIVERSE_CHANGES_FILE))
+
+
+def get_all_usa_tickers(do_filter=True, as_df=False, save_dir: str | None = None, offline_dir: str | None = None):
+    # save_dir: 원천 파일과 필터링된 티커 목록을 저장할 버전 폴더
+    # offline_dir: 네트워크 대신 이 버전 폴더에 저장된 원천 파일을 사용
+    # 1) 원천 파일
+    symbol_files = fetch_usa_symbol_files() if offline_dir is None else load_usa_symbol_files(offline_dir)
 
     # 2) NASDAQ 전체 상장 (ETF/TestIssue 제외)
-    nasdaq = pd.read_csv(url_nasdaq, sep="|", dtype=str)
+    nasdaq = pd.read_csv(io.StringIO(symbol_files["nasdaqlisted.txt"]), sep="|", dtype=str)
     nasdaq = nasdaq[~nasdaq["Symbol"].str.startswith("File Creation Time", na=False)]
     nasdaq = nasdaq[(nasdaq["ETF"] == "N") & (nasdaq["Test Issue"] == "N")]
     nasdaq = nasdaq[~nasdaq['Symbol'].isna()]
 
     # 3) NYSE+AMEX 전체 상장 (ETF/TestIssue 제외)
-    other = pd.read_csv(url_other, sep="|", dtype=str)
+    other = pd.read_csv(io.StringIO(symbol_files["otherlisted.txt"]), sep="|", dtype=str)
     other = other[~other.iloc[:,0].str.startswith("File Creation Time", na=False)]
     nyse_amex = other[other["Exchange"].isin(["N","A"])]                      # N=NYSE, A=NYSE American
     nyse_amex = nyse_amex[(nyse_amex["ETF"] == "N") & (nyse_amex["Test Issue"] == "N")]
@@ -106,6 +227,9 @@ def get_all_usa_tickers(do_filter=True, as_df=False):
         usa_df = usa_df[~usa_df.index.isin(duplicate_tickers)]
         usa_df.index = usa_df.index.str.replace(".", "-")
 
+    if save_dir is not None:
+        save_usa_universe(save_dir, symbol_files, usa_df)
+
     if as_df:
         return usa_df
     else: